@@ -7,7 +7,7 @@ downloading data.
 """
 import logging
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import click
 import rich
@@ -97,3 +97,124 @@ Data path: {current_data_path}
         table.add_row(str(rel_path), str(n_files))
 
     rich.print(table)
+
+
+#
+# ipwgml repack
+#
+
+@ipwgml.command(name="repack")
+@click.argument("output_path")
+@click.option("--data_path", type=str, default=None, help="The local directory containing the SatRain dataset.")
+@click.option("--base_sensor", type=str, default="gmi", help="The base sensor of the data to repack.")
+@click.option("--geometry", type=str, default="gridded", help="The geometry of the data to repack ('on_swath' or 'gridded').")
+@click.option("--split", type=str, default="training", help="The split to repack ('training', 'validation', 'testing').")
+@click.option("--subset", type=str, default="xl", help="The subset to repack.")
+@click.option(
+    "--inputs",
+    type=str,
+    default=None,
+    help="Comma-separated list of the retrieval inputs to include ('gmi', 'atms', 'geo', 'geo_ir', 'geo_t', 'geo_ir_t', 'ancillary')"
+)
+@click.option("--stack/--no_stack", default=True, help="Whether to stack the inputs along the feature axis.")
+@click.option("--tile_size", type=int, default=None, help="If given, scenes are split into tiles of this size.")
+@click.option("--overlap", type=int, default=0, help="The overlap between neighboring tiles.")
+@click.option("--samples_per_shard", type=int, default=256, help="The number of samples in each shard.")
+@click.option("--compression", type=click.Choice(["gzip", "zstd"]), default=None, help="The compression to apply.")
+@click.option("--n_workers", type=int, default=0, help="The number of processes to use to load the samples.")
+def repack(
+    output_path: str,
+    data_path: Optional[str] = None,
+    base_sensor: str = "gmi",
+    geometry: str = "gridded",
+    split: str = "training",
+    subset: str = "xl",
+    inputs: Optional[str] = None,
+    stack: bool = True,
+    tile_size: Optional[int] = None,
+    overlap: int = 0,
+    samples_per_shard: int = 256,
+    compression: Optional[str] = None,
+    n_workers: int = 0,
+):
+    """
+    Repack spatial SatRain data into shards for sequential reading.
+    """
+    from ipwgml.pytorch.datasets import SatRainSpatial, SatRainTiles, write_shards
+
+    if inputs is not None:
+        inputs = [inpt.strip() for inpt in inputs.split(",")]
+
+    kwargs = dict(
+        base_sensor=base_sensor,
+        geometry=geometry,
+        split=split,
+        subset=subset,
+        retrieval_input=inputs,
+        stack=stack,
+        augment=False,
+        ipwgml_path=data_path,
+        download=False,
+    )
+    if tile_size is None:
+        dataset = SatRainSpatial(**kwargs)
+    else:
+        dataset = SatRainTiles(tile_size=tile_size, overlap=overlap, **kwargs)
+
+    LOGGER.info("Repacking %s samples into %s.", len(dataset), output_path)
+    index_file = write_shards(
+        dataset,
+        output_path,
+        samples_per_shard=samples_per_shard,
+        compression=compression,
+        n_workers=n_workers,
+    )
+    LOGGER.info("Wrote shard index to %s.", index_file)
+
+
+#
+# ipwgml convert_to_zarr
+#
+
+@ipwgml.command(name="convert_to_zarr")
+@click.option("--data_path", type=str, default=None, help="The local directory containing the SatRain dataset.")
+@click.option("--base_sensor", type=str, default="gmi", help="The base sensor of the data to convert.")
+@click.option("--geometry", type=str, default="gridded", help="The geometry of the data to convert ('on_swath' or 'gridded').")
+@click.option("--split", type=str, default="training", help="The split to convert ('training', 'validation', 'testing').")
+@click.option("--subset", type=str, default="xl", help="The subset to convert.")
+@click.option("--domain", type=str, default="conus", help="The domain to convert (only relevant for the testing split).")
+@click.option(
+    "--chunks",
+    type=str,
+    default=None,
+    help="Comma-separated list of chunk sizes of the form 'dim=size'. By default, each variable is stored as a single chunk."
+)
+def convert_to_zarr(
+    data_path: Optional[str] = None,
+    base_sensor: str = "gmi",
+    geometry: str = "gridded",
+    split: str = "training",
+    subset: str = "xl",
+    domain: str = "conus",
+    chunks: Optional[str] = None,
+):
+    """
+    Convert SatRain NetCDF files to consolidated Zarr stores.
+    """
+    if chunks is not None:
+        chunks = {
+            dim.strip(): int(size)
+            for dim, size in [chunk.split("=") for chunk in chunks.split(",")]
+        }
+    stores = data.convert_to_zarr(
+        base_sensor=base_sensor,
+        geometry=geometry,
+        split=split,
+        subset=subset,
+        domain=domain,
+        data_path=data_path,
+        chunks=chunks,
+        progress_bar=True,
+    )
+    for store in stores:
+        LOGGER.info("Created Zarr store %s.", store)
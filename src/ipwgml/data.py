@@ -4,16 +4,17 @@ ipwgml.data
 
 Provides functionality to access IPWG ML datasets.
 """
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import contextmanager
-from functools import cache
+from functools import cache, partial
 import gzip
 import json
 import logging
 import multiprocessing
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 import re
 
 import click
@@ -31,7 +32,13 @@ from ipwgml.definitions import (
     SIZES,
     SPLITS,
 )
-from ipwgml.utils import get_median_time, extract_samples
+from ipwgml.utils import (
+    get_median_time,
+    extract_samples,
+    load_dataset,
+    load_subset,
+    write_atomically,
+)
 from ipwgml import config
 import ipwgml.logging
 
@@ -235,6 +242,9 @@ def download_missing(
     """
     Download missing file from dataset.
 
+    Files are considered present if they exist locally or if the corresponding scene
+    has been converted to a Zarr store using :func:`convert_to_zarr`.
+
     Args:
         dataset_name: The name of the dataset, i.e., 'satrain' for the Satellite
             Rain Estimation and Detection (SatRain) dataset.
@@ -268,7 +278,13 @@ def download_missing(
     else:
         all_files = all_files[base_sensor][split][subset][geometry].get(source, [])
 
-    missing = set(all_files) - set(local_files)
+    # Scenes converted to a Zarr store are listed as groups of the store, so files
+    # are matched by their scene name.
+    local_scenes = set([Path(path).stem for path in local_files])
+    missing = [
+        path for path in all_files
+        if Path(path).stem not in local_scenes and not (destination / path).exists()
+    ]
     downloaded = download_files(
         get_data_url(dataset_name),
         missing,
@@ -351,6 +367,186 @@ def download_dataset(
     return paths
 
 
+def get_zarr_store(split_path: Path) -> Path:
+    """
+    Get the path of the Zarr store holding the data from a split directory.
+
+    Args:
+        split_path: The directory containing the NetCDF files of the split.
+
+    Return:
+        The path of the corresponding Zarr store.
+    """
+    split_path = Path(split_path)
+    return split_path.parent / (split_path.name + ".zarr")
+
+
+def find_source_files(split_path: Path, source: str) -> List[Path]:
+    """
+    Find the files of a source in a split directory or the corresponding Zarr store.
+
+    Args:
+        split_path: The directory containing the NetCDF files of the split.
+        source: The name of the source.
+
+    Return:
+        A list of the files of the source sorted by time. If a Zarr store exists for
+        the split, scenes in the store are represented by the paths of their groups
+        and scenes that were added after the conversion by their NetCDF files.
+    """
+    files = sorted(list(split_path.glob(f"**/{source}_??????????????.nc")))
+    store = get_zarr_store(split_path)
+    if not store.exists():
+        return files
+    groups = list((store / source).glob(f"{source}_??????????????"))
+    converted = set([group.name for group in groups])
+    files = groups + [path for path in files if path.stem not in converted]
+    return sorted(files, key=lambda path: path.name)
+
+
+def get_zarr_encoding(
+        data: xr.Dataset,
+        chunks: Optional[Dict[str, int]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the encoding for writing a training scene to a Zarr store.
+
+    Args:
+        data: The dataset containing the data of the training scene.
+        chunks: An optional dictionary mapping dimension names to chunk sizes. Dimensions
+            that are not contained in the dictionary are not chunked. If not given, each
+            variable is stored as a single chunk.
+
+    Return:
+        A dictionary containing the encoding for each variable in 'data'.
+    """
+    if chunks is None:
+        chunks = {}
+    encoding = {}
+    for name, var in data.variables.items():
+        var_encoding = {
+            key: val for key, val in var.encoding.items()
+            if key in ["dtype", "scale_factor", "add_offset", "_FillValue", "units", "calendar"]
+        }
+        if 0 < var.ndim:
+            var_encoding["chunks"] = tuple([
+                size if chunks.get(dim, -1) < 0 else min(chunks[dim], size)
+                for dim, size in zip(var.dims, var.shape)
+            ])
+        encoding[name] = var_encoding
+    return encoding
+
+
+def convert_to_zarr(
+        base_sensor: str,
+        geometry: str,
+        split: str,
+        subset: str = "xl",
+        domain: str = "conus",
+        data_path: Optional[Path] = None,
+        chunks: Optional[Dict[str, int]] = None,
+        progress_bar: bool = False
+) -> List[Path]:
+    """
+    Convert the NetCDF files of a split of the SatRain dataset to consolidated Zarr stores.
+
+    One store is created for each of the directories from which :func:`get_local_files`
+    collects the files of the split. Each store contains a group for every source, which
+    contains a sub-group for every scene, and a scene index at its root holding the
+    names, median times, and the latitude and longitude bounds of the scenes. Once a
+    store exists, :func:`get_local_files` returns the scene groups in the store instead
+    of the NetCDF files so that the datasets and the Evaluator read the Zarr store.
+    Existing stores are not modified. Scenes added to a split after its conversion
+    are read from their NetCDF files.
+
+    Args:
+        base_sensor: The name of the reference sensor.
+        geometry: The viewing geometry.
+        split: The split name.
+        subset: The subset name (only relevant for training and validation splits).
+        domain: The domain name (only relevant for testing split).
+        data_path: The root directory containing IPWG data.
+        chunks: An optional dictionary mapping names of dimensions to chunk sizes. Small
+            spatial chunks reduce the data read for spatial crops, while the default of
+            storing each variable of a scene as a single chunk is optimal for loading
+            full scenes.
+        progress_bar: Whether or not to display a progress bar.
+
+    Return:
+        A list containing the paths of the created Zarr stores.
+    """
+    try:
+        import zarr
+    except ImportError:
+        raise RuntimeError(
+            "Converting data to Zarr format requires the 'zarr' package to be installed."
+        )
+
+    if data_path is None:
+        data_path = config.get_data_path()
+    else:
+        data_path = Path(data_path)
+
+    if split == "testing":
+        rel_paths = [f"satrain/{base_sensor}/{split}/{domain}/{geometry}"]
+    else:
+        rel_paths = [
+            f"satrain/{base_sensor}/{split}/{SIZES[size_ind]}/{geometry}"
+            for size_ind in range(SIZES.index(subset) + 1)
+        ]
+
+    stores = []
+    for rel_path in rel_paths:
+        split_path = data_path / rel_path
+        store = get_zarr_store(split_path)
+        target_files = sorted(list(split_path.glob("**/target_??????????????.nc")))
+        if store.exists() or len(target_files) == 0:
+            continue
+
+        sources = [base_sensor, "ancillary", "geo", "geo_t", "geo_ir", "geo_ir_t", "target"]
+        files = [
+            path for source in sources
+            for path in sorted(list(split_path.glob(f"**/{source}_??????????????.nc")))
+        ]
+
+        with write_atomically(store, directory=True) as tmp:
+            scenes = {
+                "name": [], "time": [],
+                "latitude_min": [], "latitude_max": [],
+                "longitude_min": [], "longitude_max": [],
+            }
+            for path in target_files:
+                with xr.open_dataset(path, engine="h5netcdf") as data:
+                    scenes["name"].append(path.stem)
+                    scenes["time"].append(np.datetime64(get_median_time(path), "ns"))
+                    scenes["latitude_min"].append(float(data.latitude.min()))
+                    scenes["latitude_max"].append(float(data.latitude.max()))
+                    scenes["longitude_min"].append(float(data.longitude.min()))
+                    scenes["longitude_max"].append(float(data.longitude.max()))
+            index = xr.Dataset({
+                name: (("scenes",), np.array(values)) for name, values in scenes.items()
+            })
+            index.to_zarr(tmp, mode="w", consolidated=False)
+
+            with Progress(disable=not progress_bar) as progress:
+                task = progress.add_task(f"Converting {rel_path}:", total=len(files))
+                for path in files:
+                    source = path.name.rsplit("_", 1)[0]
+                    data = xr.load_dataset(path, engine="h5netcdf")
+                    data.to_zarr(
+                        tmp,
+                        group=f"{source}/{path.stem}",
+                        mode="a",
+                        encoding=get_zarr_encoding(data, chunks),
+                        consolidated=False
+                    )
+                    progress.advance(task)
+
+            zarr.consolidate_metadata(str(tmp))
+        stores.append(store)
+    return stores
+
+
 def get_local_files(
         dataset_name: str,
         base_sensor: str,
@@ -365,6 +561,10 @@ def get_local_files(
     """
     Get all locally available files.
 
+    If a Zarr store created using :func:`convert_to_zarr` exists for a split, the paths
+    of the scene groups in the store are returned instead of the NetCDF files of the
+    converted scenes.
+
     Args:
         base_sensor: The name of the referene sensor.
         geometry: The viewing geometry.
@@ -391,14 +591,14 @@ def get_local_files(
             for size_ind in range(SIZES.index(subset) + 1):
                 rel_path = f"{dataset_name}/{base_sensor}/{split}/{SIZES[size_ind]}/{geometry}/"
                 split_path = data_path / rel_path
-                source_files = sorted(list(split_path.glob(f"**/{source}_??????????????.nc")))
+                source_files = find_source_files(split_path, source)
                 if relative_to is not None:
                     source_files = [path.relative_to(relative_to) for path in source_files]
                 files[source] += source_files
         else:
             rel_path = f"{dataset_name}/{base_sensor}/{split}/{domain}/{geometry}/"
             split_path = data_path / rel_path
-            source_files = sorted(list(split_path.glob(f"**/{source}_??????????????.nc")))
+            source_files = find_source_files(split_path, source)
             if relative_to is not None:
                 source_files = [path.relative_to(relative_to) for path in source_files]
             files[source] += source_files
@@ -593,6 +793,288 @@ def cli(
     config.set_data_path(data_path)
 
 
+def _load_scene_mask(
+        target_config: "TargetConfig",
+        target_file: Path,
+        stratify: bool = False
+) -> Tuple[xr.DataArray, Optional[np.ndarray]]:
+    """
+    Load the mask identifying the valid samples in a training scene.
+
+    If 'stratify' is 'True', the precipitation class of each valid sample is returned
+    as well: 0 for samples without precipitation, 1 for samples with precipitation,
+    and 2 for samples with heavy precipitation.
+    """
+    target_data = load_subset(target_file, target_config.get_required_variables())
+    valid = ~target_config.get_mask(target_data)
+    strata = None
+    if stratify:
+        precip = target_data[target_config.target].data[valid]
+        strata = (
+            (target_config.precip_threshold <= precip).astype(np.int8)
+            + (target_config.heavy_precip_threshold <= precip)
+        )
+    return xr.DataArray(data=valid, dims=target_data[target_config.target].dims), strata
+
+
+def _select_samples(
+        n_samples: int,
+        n_selected: int,
+        rng: np.random.Generator,
+        strata: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Randomly select samples without replacement.
+
+    If strata are given, the selected samples are distributed as evenly as possible
+    across the strata so that all samples from strata with less than their share are
+    retained.
+
+    Args:
+        n_samples: The total number of samples.
+        n_selected: The number of samples to select.
+        rng: The random number generator to use.
+        strata: An optional array assigning each sample to a stratum.
+
+    Return:
+        A sorted array containing the indices of the selected samples.
+    """
+    if strata is None:
+        return np.sort(rng.choice(n_samples, n_selected, replace=False))
+
+    strata_inds = [np.flatnonzero(strata == stratum) for stratum in np.unique(strata)]
+    strata_inds = sorted(strata_inds, key=len)
+    selected = []
+    n_remaining = n_selected
+    for ind, inds in enumerate(strata_inds):
+        n_stratum = min(len(inds), n_remaining // (len(strata_inds) - ind))
+        selected.append(rng.choice(inds, n_stratum, replace=False))
+        n_remaining -= n_stratum
+    return np.sort(np.concatenate(selected))
+
+
+def get_sample_masks(
+        target_files: List[Path],
+        target_config: "TargetConfig",
+        subsample: Optional[float | int] = None,
+        stratify: bool = False,
+        seed: int = 42,
+        n_workers: int = 1,
+) -> List[xr.DataArray]:
+    """
+    Get masks identifying the samples to extract from a sequence of training scenes.
+
+    Args:
+        target_files: The target files of the training scenes.
+        target_config: The TargetConfig used to determine the valid samples.
+        subsample: An optional fraction (if float) or number (if int) of the valid
+            samples to select at random.
+        stratify: If 'True', the subsampled valid samples are distributed evenly
+            across samples without precipitation, with precipitation, and with heavy
+            precipitation.
+        seed: Seed for the random selection of the subsampled samples.
+        n_workers: The number of processes to use to load the masks.
+
+    Return:
+        A list containing the masks of the samples to extract for all scenes.
+    """
+    stratify = stratify and subsample is not None
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(
+                partial(_load_scene_mask, target_config, stratify=stratify), target_files
+            ))
+    else:
+        results = [
+            _load_scene_mask(target_config, target_file, stratify=stratify)
+            for target_file in target_files
+        ]
+    masks = [mask for mask, _ in results]
+    if subsample is None:
+        return masks
+
+    counts = [int(mask.sum()) for mask in masks]
+    offsets = np.cumsum([0] + counts)
+    n_samples = offsets[-1]
+    if isinstance(subsample, float):
+        n_selected = int(round(subsample * n_samples))
+    else:
+        n_selected = subsample
+    n_selected = min(n_selected, n_samples)
+
+    strata = None
+    if stratify:
+        strata = np.concatenate([scene_strata for _, scene_strata in results])
+    selected = _select_samples(
+        n_samples, n_selected, np.random.default_rng(seed), strata=strata
+    )
+    bounds = np.searchsorted(selected, offsets)
+    for ind, mask in enumerate(masks):
+        valid = np.flatnonzero(mask.data)
+        scene_selected = valid[selected[bounds[ind]:bounds[ind + 1]] - offsets[ind]]
+        subsampled = np.zeros(mask.shape, dtype=bool)
+        subsampled.ravel()[scene_selected] = True
+        masks[ind] = mask.copy(data=subsampled)
+    return masks
+
+
+def _load_scene_samples(
+        paths: Dict[str, Path],
+        valid: xr.DataArray
+) -> Dict[str, xr.Dataset]:
+    """
+    Extract the valid samples from the files of a training scene.
+    """
+    return {
+        source: extract_samples(load_dataset(path), valid)
+        for source, path in paths.items()
+    }
+
+
+def _map_bounded(
+        pool: Executor,
+        fn: Callable,
+        *iterables,
+        max_in_flight: int
+) -> Iterator[Any]:
+    """
+    Map a function over iterables using an executor while limiting the number of
+    pending tasks.
+
+    In contrast to ``Executor.map``, which submits all tasks immediately, new tasks
+    are only submitted once the result of the oldest pending task has been consumed.
+    This bounds the number of results held in memory when they are consumed more
+    slowly than they are produced.
+
+    Args:
+        pool: The executor to use to run the tasks.
+        fn: The function to apply.
+        *iterables: Iterables providing the arguments to 'fn'.
+        max_in_flight: The maximum number of tasks submitted to the pool
+            whose results have not been consumed.
+
+    Return:
+        An iterator over the results of 'fn' in the order of the arguments.
+    """
+    pending = deque()
+    for args in zip(*iterables):
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+        pending.append(pool.submit(fn, *args))
+    while pending:
+        yield pending.popleft().result()
+
+
+def load_tabular_samples(
+        files: Dict[str, List[Path]],
+        sources: List[str],
+        target_config: "TargetConfig",
+        n_workers: int = 1,
+        progress_bar: bool = False,
+        subsample: Optional[float | int] = None,
+        stratify: bool = False,
+        seed: int = 42,
+) -> Dict[str, xr.Dataset]:
+    """
+    Extract the valid samples from a sequence of training scenes.
+
+    The scenes are processed in two passes. The first pass determines the valid
+    samples in each scene, which are used to allocate the output arrays. The second
+    pass extracts the valid samples from each scene and writes them directly into
+    the output arrays. The samples are ordered by scene independently of the number
+    of workers.
+
+    Args:
+        files: A dictionary mapping source names to lists of the corresponding
+            training files.
+        sources: The names of the sources for which to load the samples. The 'target'
+            source is always loaded.
+        target_config: The TargetConfig used to determine the valid samples.
+        n_workers: The number of processes to use to load the scenes. At most
+            2 * n_workers loaded scenes are kept in memory at a time.
+        progress_bar: Whether or not to display a progress bar.
+        subsample: An optional fraction (if float) or number (if int) of the valid
+            samples to load. See :func:`get_sample_masks`.
+        stratify: Whether to stratify the subsampling by precipitation class.
+        seed: Seed for the random selection of the subsampled samples.
+
+    Return:
+        A dictionary mapping the source names to xarray.Datasets containing the
+        samples extracted from all scenes along the 'samples' dimension.
+    """
+    target_files = files["target"]
+    sources = ["target"] + [source for source in sources if source != "target"]
+    for source in sources[1:]:
+        for target_file, source_file in zip(target_files, files[source]):
+            if get_median_time(target_file) != get_median_time(source_file):
+                raise ValueError(
+                    f"Encountered an input file {source_file} that is inconsistent with the "
+                    f"corresponding reference file {target_file}. This indicates "
+                    "that the dataset has not been downloaded properly."
+                )
+    scene_paths = [
+        {source: files[source][ind] for source in sources} for ind in range(len(target_files))
+    ]
+
+    masks = get_sample_masks(
+        target_files,
+        target_config,
+        subsample=subsample,
+        stratify=stratify,
+        seed=seed,
+        n_workers=n_workers
+    )
+
+    if n_workers > 1:
+        pool = ProcessPoolExecutor(max_workers=n_workers)
+        pool_map = partial(_map_bounded, pool, max_in_flight=2 * n_workers)
+    else:
+        pool = None
+        pool_map = map
+
+    try:
+        counts = [int(mask.sum()) for mask in masks]
+        offsets = np.cumsum([0] + counts)
+        n_samples = offsets[-1]
+
+        samples = {}
+        coords = {}
+        with progress_bar_or_not(progress_bar=progress_bar) as progress:
+            if progress is not None:
+                bar = progress.add_task(
+                    f"Loading {len(target_files)} scenes:", total=len(target_files)
+                )
+            scenes = pool_map(_load_scene_samples, scene_paths, masks)
+            for ind, scene in enumerate(scenes):
+                for source, data in scene.items():
+                    if source not in samples:
+                        samples[source] = {
+                            name: (
+                                var.dims,
+                                np.empty((n_samples,) + var.shape[1:], dtype=var.dtype),
+                                var.attrs
+                            )
+                            for name, var in data.variables.items()
+                            if var.dims[:1] == ("samples",)
+                        }
+                        coords[source] = {
+                            name: coord for name, coord in data.coords.items()
+                            if not set(coord.dims) & set(masks[ind].dims + ("samples",))
+                        }
+                    for name, (_, arr, _) in samples[source].items():
+                        arr[offsets[ind]:offsets[ind + 1]] = data[name].data
+                if progress is not None:
+                    progress.advance(bar, advance=1)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {
+        source: xr.Dataset(samples[source], coords=coords[source])
+        for source in sources
+    }
+
+
 def load_tabular_data(
         dataset_name: str,
         base_sensor: str,
@@ -601,7 +1083,11 @@ def load_tabular_data(
         subset: str,
         retrieval_input: List[str | Dict[str, Any] | "InputConfig"],
         target_config: Optional["TargetConfig"] = None,
-        data_path: Optional[Path] = None
+        data_path: Optional[Path] = None,
+        n_workers: int = 1,
+        subsample: Optional[float | int] = None,
+        stratify: bool = False,
+        seed: int = 42,
 ):
     """
     Load data in tabular format.
@@ -615,6 +1101,13 @@ def load_tabular_data(
         retrieval_input: A list specifying the retrieval input.
         target_config: A config dict or object defining the target data configuration.
         data_path: Optional path pointing to the local data path.
+        n_workers: The number of processes to use to load the training scenes.
+        subsample: An optional fraction (if float) or number (if int) of the valid
+            samples to load.
+        stratify: If 'True', the subsampled samples are distributed evenly across
+            samples without precipitation, with precipitation, and with heavy
+            precipitation.
+        seed: Seed for the random selection of the subsampled samples.
 
     Return:
         A tuple ``input_data, target`` with ``input_data`` being a dictionary containing
@@ -647,39 +1140,15 @@ def load_tabular_data(
         dataset_name, base_sensor, retrieval_input, split, geometry, subset=subset, data_path=data_path
     )
 
-    target_files = files["target"]
-
-    target_data = []
-    input_data = {inpt.name: [] for inpt in retrieval_input}
-
-    from tqdm import tqdm
-    for ind, target_file in tqdm(enumerate(target_files), total=len(target_files)):
-        data = xr.load_dataset(target_file)
-        valid = ~target_config.get_mask(data)
-        valid = xr.DataArray(
-            data=valid,
-            dims=data.surface_precip.dims
-        )
-        data = extract_samples(data, valid)
-        if "time" in data.coords:
-            data = data.reset_index("time")
-        target_data.append(data)
-
-        ref_time = get_median_time(target_file)
-
-        for inpt in retrieval_input:
-            input_time = get_median_time(files[inpt.name][ind])
-            if ref_time != input_time:
-                raise ValueError(
-                    "Encountered an input files %s that is inconsistent with the corresponding "
-                    "reference file %s. This indicates that the dataset has not been downloaded "
-                    "properly."
-                )
-            data = extract_samples(xr.load_dataset(files[inpt.name][ind]), valid)
-            if "time" in data.coords:
-                data = data.reset_index("time")
-            input_data[inpt.name].append(data)
-
-    target_data = xr.concat(target_data, dim="samples")
-    input_data = {name: xr.concat(data, dim="samples") for name, data in input_data.items()}
-    return input_data, target_data
+    samples = load_tabular_samples(
+        files,
+        [inpt.name for inpt in retrieval_input],
+        target_config,
+        n_workers=n_workers,
+        progress_bar=True,
+        subsample=subsample,
+        stratify=stratify,
+        seed=seed,
+    )
+    target_data = samples.pop("target")
+    return samples, target_data
@@ -21,14 +21,23 @@ Members
 -------
 """
 
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait
+)
 from copy import copy
 from dataclasses import dataclass
 from datetime import datetime
 import logging
 from math import trunc, ceil
+import os
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Tuple
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import h5netcdf
 import numpy as np
@@ -43,15 +52,37 @@ from ipwgml.definitions import DOMAINS, ALL_INPUTS
 import ipwgml.logging
 import ipwgml.metrics
 from ipwgml.plotting import cmap_precip
-from ipwgml.metrics import Metric
+from ipwgml.metrics import Metric, MetricSuite
 from ipwgml.tiling import DatasetTiler
 from ipwgml.input import InputConfig, parse_retrieval_inputs
-from ipwgml.target import TargetConfig
+from ipwgml.target import TargetBundle, TargetConfig
+from ipwgml.utils import get_median_time, load_subset, open_dataset
 
 
 LOGGER = logging.getLogger(__name__)
 
 
+METRIC_GROUPS = (
+    "precip_quantification_metrics",
+    "precip_detection_metrics",
+    "prob_precip_detection_metrics",
+    "heavy_precip_detection_metrics",
+    "prob_heavy_precip_detection_metrics",
+)
+
+
+# Reference data variables that are added to the retrieval results of each scene.
+AUXILIARY_TARGET_VARIABLES = [
+    "radar_quality_index",
+    "valid_fraction",
+    "precip_fraction",
+    "snow_fraction",
+    "convective_fraction",
+    "stratiform_fraction",
+    "hail_fraction",
+]
+
+
 def get_expected_dims(input_data: xr.Dataset) -> Tuple[str]:
     """
     Given an xarray.Dataset containing the retrieval input data, calculate
@@ -137,37 +168,182 @@ def _check_retrieval_results(
             LOGGER.warning(msg)
 
 
-def process(
-    retrieval_fn: Callable[[xr.Dataset], xr.Dataset],
-    input_data: xr.Dataset,
-    coords: Tuple[int, int],
+def get_feature_variables(input_data: xr.Dataset) -> List[str]:
+    """
+    Get the names of the retrieval input variables in a dataset of retrieval input data.
+
+    Args:
+        input_data: An xarray.Dataset containing retrieval input data.
+
+    Return:
+        A list containing the names of all variables with a 'features_*' dimension.
+    """
+    return [
+        name for name, var in input_data.data_vars.items()
+        if any(dim.startswith("features_") for dim in var.dims)
+    ]
+
+
+class ArrayRetrieval(ABC):
+    """
+    Base class for retrievals that operate directly on numpy arrays.
+
+    Instead of an xarray.Dataset, the evaluator passes a dictionary mapping the
+    names of the retrieval inputs to contiguous arrays of shape ``(B, C, H, W)``
+    for spatial retrievals and ``(B, C)`` for tabular retrievals to the retrieval's
+    ``retrieve_arrays`` method. It expects a dictionary containing arrays of shape
+    ``(B, H, W)`` or ``(B,)`` for the retrieved variables in return. Tiles smaller
+    than the batch shape are padded with NaNs.
+
+    Retrievals subclass ArrayRetrieval and implement ``retrieve_arrays``. Functions
+    implementing the same signature can be wrapped using
+    :class:`ArrayFunctionRetrieval`. Calling the retrieval with an xarray.Dataset
+    converts the dataset to arrays, so that array retrievals also support the
+    xarray-based callback interface.
+    """
+
+    @abstractmethod
+    def retrieve_arrays(self, inputs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Run the retrieval on a batch of input arrays.
+
+        Args:
+            inputs: A dictionary mapping the names of the retrieval inputs to arrays of
+                shape ``(B, C, H, W)`` or ``(B, C)``.
+
+        Return:
+            A dictionary mapping the names of the retrieved variables to arrays of
+            shape ``(B, H, W)`` or ``(B,)``.
+        """
+
+    def __call__(self, input_data: xr.Dataset) -> xr.Dataset:
+        """
+        Run the retrieval on input data in xarray format.
+
+        Args:
+            input_data: An xarray.Dataset containing the retrieval input data.
+
+        Return:
+            An xarray.Dataset containing the retrieval results.
+        """
+        dims = get_expected_dims(input_data)
+        batched = "batch" in dims
+        inputs = {}
+        for name in get_feature_variables(input_data):
+            var = input_data[name]
+            feature_dim = [dim for dim in var.dims if dim.startswith("features_")][0]
+            if batched:
+                var = var.transpose("batch", feature_dim, *dims[1:])
+                inputs[name] = np.ascontiguousarray(var.data)
+            else:
+                var = var.transpose(feature_dim, *dims)
+                inputs[name] = np.ascontiguousarray(var.data[None])
+
+        retrieved = self.retrieve_arrays(inputs)
+        results = xr.Dataset()
+        for name, arr in retrieved.items():
+            if not batched:
+                arr = arr[0]
+            results[name] = (dims, arr)
+        return results
+
+
+class ArrayFunctionRetrieval(ArrayRetrieval):
+    """
+    Array retrieval wrapping a function that operates on numpy arrays.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[Dict[str, np.ndarray]], Dict[str, np.ndarray]]
+    ):
+        """
+        Args:
+            fn: A function implementing the array-based retrieval. It receives a
+                dictionary mapping the names of the retrieval inputs to arrays and
+                returns a dictionary mapping the names of the retrieved variables to
+                arrays.
+        """
+        self.fn = fn
+
+    def retrieve_arrays(self, inputs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Run the wrapped function on a batch of input arrays.
+        """
+        return self.fn(inputs)
+
+
+def _add_tile_arrays(
+    retrieved: Dict[str, np.ndarray],
     result_tiler: DatasetTiler,
+    coords: Tuple[int, int],
 ) -> List[str]:
     """
-    Performs the retrieval on a single tile adds the retrieval
-    results to the corresponding result tile.
+    Add array-valued retrieval results from a single tile to the results dataset.
 
     Args:
-        retrieval_fn: The retrieval callback function.
-        input_data: An xarray.Dataset containing the tiled retrieval
-            input data.
-        coords: A tuple containing the row- and column-index of
-            the tile that is being processed.
-        result_tiler: The tiler providing access to the result
-            dataset.
+        retrieved: A dictionary mapping variable names to arrays containing the
+            retrieval results for the tile.
+        result_tiler: The tiler providing access to the result dataset.
+        coords: A tuple containing the row- and column-index of the tile.
 
     Return:
-        A list containing the names of the retrieval variables that
-        were present in the output from the retrieval callback
-        function.
+        A list containing the names of the retrieval variables that were present
+        in the retrieval results.
     """
-    retrieved = retrieval_fn(input_data)
-    expected_dims = get_expected_dims(input_data)
-    _check_retrieval_results(input_data, retrieved, expected_dims)
-    retrieved = retrieved.transpose(*expected_dims, ...)
+    row_ind, col_ind = coords
+    row_start = result_tiler.row_starts[row_ind]
+    col_start = result_tiler.col_starts[col_ind]
+    n_rows = min(result_tiler.tile_size[0], result_tiler.n_rows)
+    n_cols = min(result_tiler.tile_size[1], result_tiler.n_cols)
+    tile = (
+        slice(row_start, row_start + n_rows),
+        slice(col_start, col_start + n_cols)
+    )
+    weights = result_tiler.get_weights(row_ind, col_ind)[:n_rows, :n_cols]
+    slcs = result_tiler.get_slices(row_ind, col_ind)
+    slcs = tuple(slcs[dim] for dim in result_tiler.spatial_dims)
+    results = result_tiler.dataset
+
+    vars_retrieved = []
+    for var in [
+        "surface_precip",
+        "probability_of_precip",
+        "probability_of_heavy_precip",
+    ]:
+        if var in retrieved:
+            results[var].data[tile] += weights * retrieved[var][:n_rows, :n_cols]
+            vars_retrieved.append(var)
+
+    for var in ["precip_flag", "heavy_precip_flag"]:
+        if var in retrieved:
+            results[var].data[tile][slcs] = retrieved[var][:n_rows, :n_cols][slcs]
+            vars_retrieved.append(var)
+
+    return vars_retrieved
+
+
+def _add_tile_results(
+    retrieved: xr.Dataset,
+    result_tiler: DatasetTiler,
+    coords: Tuple[int, int],
+) -> List[str]:
+    """
+    Add retrieval results from a single tile to the corresponding result tile.
+
+    Args:
+        retrieved: An xarray.Dataset containing the retrieval results for the tile.
+        result_tiler: The tiler providing access to the result dataset.
+        coords: A tuple containing the row- and column-index of the tile.
 
+    Return:
+        A list containing the names of the retrieval variables that were present
+        in the retrieval results.
+    """
     results_t = result_tiler.get_tile(*coords)
     weights = result_tiler.get_weights(*coords)
+    shape = tuple(results_t.sizes[dim] for dim in result_tiler.spatial_dims)
+    weights = weights[: shape[0], : shape[1]]
     slcs = result_tiler.get_slices(*coords)
 
     vars_retrieved = []
@@ -177,7 +353,7 @@ def process(
         "probability_of_heavy_precip",
     ]:
         if var in retrieved:
-            results_t[var].data += weights * retrieved[var]
+            results_t[var].data += weights * retrieved[var].data
             vars_retrieved.append(var)
 
     for var in ["precip_flag", "heavy_precip_flag"]:
@@ -188,17 +364,52 @@ def process(
     return vars_retrieved
 
 
+def process(
+    retrieval_fn: Callable[[xr.Dataset], xr.Dataset],
+    input_data: xr.Dataset,
+    coords: Tuple[int, int],
+    result_tiler: DatasetTiler,
+) -> List[str]:
+    """
+    Performs the retrieval on a single tile adds the retrieval
+    results to the corresponding result tile.
+
+    Args:
+        retrieval_fn: The retrieval callback function.
+        input_data: An xarray.Dataset containing the tiled retrieval
+            input data.
+        coords: A tuple containing the row- and column-index of
+            the tile that is being processed.
+        result_tiler: The tiler providing access to the result
+            dataset.
+
+    Return:
+        A list containing the names of the retrieval variables that
+        were present in the output from the retrieval callback
+        function.
+    """
+    retrieved = retrieval_fn(input_data)
+    expected_dims = get_expected_dims(input_data)
+    _check_retrieval_results(input_data, retrieved, expected_dims)
+    retrieved = retrieved.transpose(*expected_dims, ...)
+    return _add_tile_results(retrieved, result_tiler, coords)
+
+
 def process_batched(
     retrieval_fn: Callable[[xr.Dataset], xr.Dataset],
     input_data: List[xr.Dataset],
     spatial_dims: List[str],
     coords: List[Tuple[int, int]],
-    result_tiler: DatasetTiler,
+    result_tiler: DatasetTiler | List[DatasetTiler],
 ) -> List[str]:
     """
     Performs the retrieval on a batch of input data tiles and
     adds the retrieval results to the corresponding result tiles.
 
+    Tiles of different sizes are padded to a common size before they
+    are combined into a batch. The results for the padded pixels are
+    discarded.
+
     Args:
         retrieval_fn: The retrieval callback function.
         input_data: An xarray.Dataset containing the a batch of input
@@ -206,7 +417,8 @@ def process_batched(
         coords: A tuple containing the row- and column-index of
             the tile that is being processed.
         result_tiler: The tiler providing access to the result
-            dataset.
+            dataset or a list of tilers containing the result tiler
+            for every tile in the batch.
 
     Return:
         A list containing the names of the retrieval variables that
@@ -214,8 +426,21 @@ def process_batched(
         function.
     """
     batch_size = len(input_data)
+    if isinstance(result_tiler, DatasetTiler):
+        result_tiler = [result_tiler] * batch_size
+
     if any([dim in input_data[0].coords for dim in spatial_dims]):
         input_data = [inpt.reset_index(spatial_dims) for inpt in input_data]
+    shapes = [tuple(inpt.sizes[dim] for dim in spatial_dims) for inpt in input_data]
+    padded_shape = tuple(np.max(shapes, axis=0))
+    input_data = [
+        inpt.pad({
+            dim: (0, size - inpt.sizes[dim])
+            for dim, size in zip(spatial_dims, padded_shape)
+        })
+        if shape != padded_shape else inpt
+        for inpt, shape in zip(input_data, shapes)
+    ]
     input_data = xr.concat(input_data, dim="batch")
     retrieved_batched = retrieval_fn(input_data)
     expected_dims = get_expected_dims(input_data)
@@ -223,27 +448,15 @@ def process_batched(
     retrieved_batched = retrieved_batched.transpose(*expected_dims, ...)
 
     for batch_ind in range(batch_size):
-
-        vars_retrieved = []
-
         retrieved = retrieved_batched[{"batch": batch_ind}]
-        results_t = result_tiler.get_tile(*coords[batch_ind])
-        weights = result_tiler.get_weights(*coords[batch_ind])
-        slcs = result_tiler.get_slices(*coords[batch_ind])
-
-        for var in [
-            "surface_precip",
-            "probability_of_precip",
-            "probability_of_heavy_precip",
-        ]:
-            if var in retrieved:
-                results_t[var].data += weights * retrieved[var]
-                vars_retrieved.append(var)
+        if shapes[batch_ind] != padded_shape:
+            retrieved = retrieved[{
+                dim: slice(0, size) for dim, size in zip(spatial_dims, shapes[batch_ind])
+            }]
+        vars_retrieved = _add_tile_results(
+            retrieved, result_tiler[batch_ind], coords[batch_ind]
+        )
 
-        for var in ["precip_flag", "heavy_precip_flag"]:
-            if var in retrieved:
-                results_t[var][slcs].data[:] = retrieved[var][slcs].data
-                vars_retrieved.append(var)
     return vars_retrieved
 
 
@@ -276,7 +489,7 @@ def load_retrieval_input_data(
 
     # Load time from target file.
     target_file = input_files.get_path("target", geometry)
-    with xr.open_dataset(target_file, engine="h5netcdf") as target_data:
+    with open_dataset(target_file) as target_data:
         target_data = target_data.transpose(*spatial_dims, ...)
         input_data["time"] = (spatial_dims, target_data.time.data)
         if "latitude" not in target_data.dims:
@@ -294,17 +507,410 @@ def load_retrieval_input_data(
             for name, arr in data.items():
                 input_data[name] = dims, arr
             if inpt.name in ["gmi", "atms"]:
-                with xr.open_dataset(path) as data:
+                with open_dataset(path) as data:
                     input_data.attrs.update(data.attrs)
     return input_data
 
 
+def _initialize_results(input_data: xr.Dataset, spatial_dims: List[str]) -> xr.Dataset:
+    """
+    Initialize the container for the retrieval results from a scene.
+
+    Args:
+        input_data: An xarray.Dataset containing the retrieval input data for the scene.
+        spatial_dims: The names of the spatial dimensions of the input data.
+
+    Return:
+        An xarray.Dataset containing zero-initialized arrays for all retrieval results.
+    """
+    shape = tuple([input_data[dim].size for dim in spatial_dims])
+    return xr.Dataset(
+        {
+            spatial_dims[0]: (spatial_dims[0], input_data[spatial_dims[0]].data),
+            spatial_dims[1]: (spatial_dims[1], input_data[spatial_dims[1]].data),
+            "surface_precip": (spatial_dims, np.zeros(shape, dtype=np.float32)),
+            "probability_of_precip": (spatial_dims, np.zeros(shape, dtype=np.float32)),
+            "probability_of_heavy_precip": (
+                spatial_dims,
+                np.zeros(shape, dtype=np.float32),
+            ),
+            "precip_flag": (spatial_dims, np.zeros(shape, dtype=bool)),
+            "heavy_precip_flag": (spatial_dims, np.zeros(shape, dtype=bool)),
+        }
+    )
+
+
+class _ScheduledScene:
+    """
+    Book-keeping for a scene processed by the TileScheduler.
+    """
+
+    def __init__(
+        self,
+        key: Any,
+        input_data: xr.Dataset,
+        tile_size: Tuple[int, int] | None,
+        overlap: int,
+        required: Optional[np.ndarray] = None,
+    ):
+        self.key = key
+        spatial_dims = ["latitude", "longitude", "scan", "pixel"]
+        self.spatial_dims = [dim for dim in spatial_dims if dim in input_data.dims]
+        self.input_tiler = DatasetTiler(
+            input_data, tile_size=tile_size, overlap=overlap, spatial_dims=self.spatial_dims
+        )
+        self.results = _initialize_results(input_data, self.spatial_dims)
+        self.result_tiler = DatasetTiler(
+            self.results, tile_size=tile_size, overlap=overlap, spatial_dims=self.spatial_dims
+        )
+        self.tile_shape = (
+            min(self.input_tiler.tile_size[0], self.input_tiler.n_rows),
+            min(self.input_tiler.tile_size[1], self.input_tiler.n_cols),
+        )
+        self.coords = []
+        self.skipped = []
+        for row_ind in range(self.input_tiler.n_rows_tiled):
+            for col_ind in range(self.input_tiler.n_cols_tiled):
+                if required is None or self._is_required(required, row_ind, col_ind):
+                    self.coords.append((row_ind, col_ind))
+                else:
+                    self.skipped.append((row_ind, col_ind))
+        for coords in self.skipped:
+            self._fill_invalid(*coords)
+        self.n_done = 0
+        self.vars_retrieved = []
+        self._input_arrays = None
+
+    def _get_tile_slices(self, row_ind: int, col_ind: int) -> Tuple[slice, slice]:
+        """
+        Slices covering the tile with the given row and column index.
+        """
+        row_start = self.input_tiler.row_starts[row_ind]
+        col_start = self.input_tiler.col_starts[col_ind]
+        return (
+            slice(row_start, row_start + self.tile_shape[0]),
+            slice(col_start, col_start + self.tile_shape[1]),
+        )
+
+    def _is_required(self, required: np.ndarray, row_ind: int, col_ind: int) -> bool:
+        """
+        Whether a tile contains any pixels required for the evaluation.
+        """
+        return required[self._get_tile_slices(row_ind, col_ind)].any()
+
+    def _fill_invalid(self, row_ind: int, col_ind: int) -> None:
+        """
+        Set the continuous retrieval results of a skipped tile to NAN.
+        """
+        tile = self._get_tile_slices(row_ind, col_ind)
+        weights = self.result_tiler.get_weights(row_ind, col_ind)
+        weights = weights[: self.tile_shape[0], : self.tile_shape[1]]
+        for var in [
+            "surface_precip",
+            "probability_of_precip",
+            "probability_of_heavy_precip",
+        ]:
+            self.results[var].data[tile][weights > 0] = np.nan
+
+    def get_input_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        The retrieval input arrays of the scene with the feature dimension first.
+        """
+        if self._input_arrays is None:
+            input_data = self.input_tiler.dataset
+            arrays = {}
+            for name in get_feature_variables(input_data):
+                var = input_data[name]
+                feature_dim = [dim for dim in var.dims if dim.startswith("features_")][0]
+                arrays[name] = var.transpose(feature_dim, *self.spatial_dims).data
+            self._input_arrays = arrays
+        return self._input_arrays
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether results for all tiles of the scene have been retrieved.
+        """
+        return self.n_done == len(self.coords)
+
+    def get_results(self, default_vars: Optional[List[str]] = None) -> xr.Dataset:
+        """
+        The assembled retrieval results for the scene.
+
+        Args:
+            default_vars: The variables to return if all tiles of the scene
+                were skipped. If 'None', all result variables are returned.
+        """
+        if len(self.coords) == 0:
+            if default_vars is None:
+                return self.results
+            return self.results[default_vars]
+        return self.results[self.vars_retrieved]
+
+
+class TileScheduler:
+    """
+    The TileScheduler streams tiles from consecutive scenes into batches for the
+    retrieval callback function.
+
+    Tiles are grouped into buckets by their shape and a bucket is processed once it
+    contains 'batch_size' tiles, so that batches are filled with tiles from multiple
+    scenes. If tiles of different shapes are pending, for example when whole scenes of
+    different sizes are processed without tiling, the oldest pending tiles are padded
+    to a common shape and processed together once the number of pending tiles exceeds
+    twice the batch size. The results of each tile are added to the results of the
+    scene it was extracted from and scenes are returned in the order they were added
+    once the results for all of their tiles have been retrieved.
+    """
+
+    def __init__(
+        self,
+        retrieval_fn: Callable[[xr.Dataset], xr.Dataset],
+        tile_size: int | Tuple[int, int] | None,
+        overlap: int | None,
+        batch_size: int | None,
+    ):
+        """
+        Args:
+            retrieval_fn: The retrieval callback function.
+            tile_size: The tile size expected by the retrieval function. Set to
+                'None' provide full scenes as input data.
+            overlap: The overlap between neighboring tiles.
+            batch_size: The batch size expected by the retrieval function. If 'None',
+                tiles are passed to the retrieval function one at a time and without
+                a batch dimension.
+        """
+        if isinstance(tile_size, int):
+            tile_size = (tile_size,) * 2
+        if overlap is None:
+            if tile_size is None:
+                overlap = 0
+            else:
+                overlap = min(tile_size) // 4
+        self.retrieval_fn = retrieval_fn
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.scenes = deque()
+        self.buckets = {}
+        self.n_pending = 0
+        self.tile_index = 0
+        self.n_tiles = 0
+        self.n_tiles_skipped = 0
+        self.vars_retrieved = None
+
+    @property
+    def skipped_fraction(self) -> float:
+        """
+        The fraction of the tiles of all scenes that were skipped because they
+        didn't contain any required pixels.
+        """
+        if self.n_tiles == 0:
+            return 0.0
+        return self.n_tiles_skipped / self.n_tiles
+
+    def add_scene(
+        self,
+        key: Any,
+        input_data: xr.Dataset,
+        required: Optional[np.ndarray] = None,
+    ) -> List[Tuple[Any, xr.Dataset]]:
+        """
+        Add a scene to process.
+
+        Args:
+            key: An arbitrary object identifying the scene.
+            input_data: An xarray.Dataset containing the retrieval input data for
+                the scene.
+            required: An optional boolean mask identifying the pixels of the scene
+                for which retrieval results are required. If given, tiles that
+                don't contain any required pixels are skipped and their continuous
+                retrieval results set to NAN.
+
+        Return:
+            A list of tuples ``(key, results)`` containing the keys and retrieval
+            results of all scenes that have been completed.
+        """
+        scene = _ScheduledScene(
+            key, input_data, self.tile_size, self.overlap, required=required
+        )
+        self.scenes.append(scene)
+        self.n_tiles += len(scene.coords) + len(scene.skipped)
+        self.n_tiles_skipped += len(scene.skipped)
+
+        for coords in scene.coords:
+            if self.batch_size is None:
+                self._process([(self.tile_index, scene, coords)])
+                self.tile_index += 1
+                continue
+
+            bucket = self.buckets.setdefault(scene.tile_shape, [])
+            bucket.append((self.tile_index, scene, coords))
+            self.tile_index += 1
+            self.n_pending += 1
+            if len(bucket) >= self.batch_size:
+                del self.buckets[scene.tile_shape]
+                self._process(bucket)
+            elif self.n_pending >= 2 * self.batch_size:
+                self._process(self._pop_oldest(self.batch_size))
+
+        return self._pop_completed()
+
+    def finish(self) -> List[Tuple[Any, xr.Dataset]]:
+        """
+        Process all pending tiles.
+
+        Return:
+            A list of tuples ``(key, results)`` containing the keys and retrieval
+            results of all remaining scenes.
+        """
+        while self.n_pending > 0:
+            self._process(self._pop_oldest(self.batch_size))
+        return self._pop_completed()
+
+    def _pop_oldest(self, n_tiles: int) -> List[Tuple[int, _ScheduledScene, Tuple[int, int]]]:
+        """
+        Remove the 'n_tiles' oldest pending tiles from the buckets.
+        """
+        pending = sorted(
+            [tile for bucket in self.buckets.values() for tile in bucket],
+            key=lambda tile: tile[0]
+        )
+        batch = pending[:n_tiles]
+        self.buckets = {}
+        for tile in pending[n_tiles:]:
+            self.buckets.setdefault(tile[1].tile_shape, []).append(tile)
+        return batch
+
+    def _process(self, tiles: List[Tuple[int, _ScheduledScene, Tuple[int, int]]]) -> None:
+        """
+        Run the retrieval on a list of tiles.
+        """
+        if isinstance(self.retrieval_fn, ArrayRetrieval):
+            if self.batch_size is not None:
+                self.n_pending -= len(tiles)
+            vars_retrieved = self._process_arrays(tiles)
+        elif self.batch_size is None:
+            _, scene, coords = tiles[0]
+            vars_retrieved = process(
+                self.retrieval_fn,
+                scene.input_tiler.get_tile(*coords),
+                coords,
+                scene.result_tiler
+            )
+        else:
+            self.n_pending -= len(tiles)
+            vars_retrieved = process_batched(
+                self.retrieval_fn,
+                [scene.input_tiler.get_tile(*coords) for _, scene, coords in tiles],
+                tiles[0][1].spatial_dims,
+                [coords for _, _, coords in tiles],
+                [scene.result_tiler for _, scene, _ in tiles],
+            )
+        for _, scene, _ in tiles:
+            scene.n_done += 1
+            scene.vars_retrieved = vars_retrieved
+        self.vars_retrieved = vars_retrieved
+
+    def _process_arrays(
+        self,
+        tiles: List[Tuple[int, _ScheduledScene, Tuple[int, int]]]
+    ) -> List[str]:
+        """
+        Run an array retrieval on a list of tiles.
+        """
+        shapes = [scene.tile_shape for _, scene, _ in tiles]
+        n_rows, n_cols = np.max(shapes, axis=0)
+
+        inputs = {}
+        for batch_ind, (_, scene, coords) in enumerate(tiles):
+            row_start = scene.input_tiler.row_starts[coords[0]]
+            col_start = scene.input_tiler.col_starts[coords[1]]
+            tile_rows, tile_cols = scene.tile_shape
+            for name, arr in scene.get_input_arrays().items():
+                if name not in inputs:
+                    shape = (len(tiles), arr.shape[0], n_rows, n_cols)
+                    if np.issubdtype(arr.dtype, np.floating):
+                        inputs[name] = np.full(shape, np.nan, dtype=arr.dtype)
+                    else:
+                        inputs[name] = np.zeros(shape, dtype=arr.dtype)
+                inputs[name][batch_ind, :, :tile_rows, :tile_cols] = arr[
+                    :,
+                    row_start:row_start + tile_rows,
+                    col_start:col_start + tile_cols
+                ]
+
+        retrieved = self.retrieval_fn.retrieve_arrays(inputs)
+        for name, arr in retrieved.items():
+            if arr.shape != (len(tiles), n_rows, n_cols):
+                raise RuntimeError(
+                    f"The retrieval result '{name}' has shape {arr.shape} but expected "
+                    f"{(len(tiles), n_rows, n_cols)}."
+                )
+
+        for batch_ind, (_, scene, coords) in enumerate(tiles):
+            vars_retrieved = _add_tile_arrays(
+                {name: arr[batch_ind] for name, arr in retrieved.items()},
+                scene.result_tiler,
+                coords
+            )
+        return vars_retrieved
+
+    def _pop_completed(self) -> List[Tuple[Any, xr.Dataset]]:
+        """
+        Remove completed scenes from the start of the scene queue.
+        """
+        completed = []
+        while len(self.scenes) > 0 and self.scenes[0].done:
+            scene = self.scenes.popleft()
+            completed.append((scene.key, scene.get_results(self.vars_retrieved)))
+        return completed
+
+
+def process_scenes_spatial(
+    scenes: Iterable[Tuple[Any, xr.Dataset]],
+    tile_size: int | Tuple[int, int] | None,
+    overlap: int | None,
+    batch_size: int | None,
+    retrieval_fn: Callable[[xr.Dataset], xr.Dataset],
+) -> Iterator[Tuple[Any, xr.Dataset]]:
+    """
+    Process a sequence of scenes using a given retrieval callback function
+    for an image-based retrieval with batches spanning multiple scenes.
+
+    Args:
+        scenes: An iterable of tuples ``(key, input_data)`` containing an arbitrary
+            key identifying each scene and the corresponding retrieval input data.
+        tile_size: The tile size expected by the retrieval function. Set to
+            'None' provide full scenes as input data.
+        overlap: The overlap between neighboring tiles.
+        batch_size: The batch size expected by the retrieval function.
+        retrieval_fn: The retrieval callback function to use to evaluate
+            the retrieval on the input data.
+
+    Return:
+        An iterator over tuples ``(key, results)`` containing the key and the
+        assembled retrieval results for each scene in the order in which the
+        scenes were provided.
+    """
+    scheduler = TileScheduler(
+        retrieval_fn=retrieval_fn,
+        tile_size=tile_size,
+        overlap=overlap,
+        batch_size=batch_size
+    )
+    for key, input_data in scenes:
+        yield from scheduler.add_scene(key, input_data)
+    yield from scheduler.finish()
+
+
 def process_scene_spatial(
     input_data: xr.Dataset,
     tile_size: int | Tuple[int, int] | None,
     overlap: int | None,
     batch_size: int | None,
     retrieval_fn: Callable[[xr.Dataset], xr.Dataset],
+    required: Optional[np.ndarray] = None,
 ) -> xr.Dataset:
     """
     Process an overpass scene using a given retrieval callback function
@@ -322,93 +928,35 @@ def process_scene_spatial(
         batch_size: The batch size expected by the retrieval function.
         retrieval_fn: The retrieval callback function to use to evaluate
             the retrieval on the input data.
+        required: An optional boolean mask identifying the pixels for which
+            retrieval results are required. Tiles without any required pixels
+            are skipped.
 
     Return:
         An xarray.Dataset containing the assembled retrieval results
-        for the given input scene.
+        for the given input scene. The number of tiles and the number of
+        skipped tiles are stored in the 'n_tiles' and 'n_tiles_skipped'
+        attributes.
     """
-    spatial_dims = ["latitude", "longitude", "scan", "pixel"]
-    spatial_dims = [dim for dim in spatial_dims if dim in input_data.dims]
-    shape = tuple([input_data[dim].size for dim in spatial_dims])
-
-    if isinstance(tile_size, int):
-        tile_size = (tile_size,) * 2
-    if overlap is None:
-        if tile_size is None:
-            overlap = 0
-        else:
-            overlap = min(tile_size) // 4
-
-    input_data_tiler = DatasetTiler(
-        input_data, tile_size=tile_size, overlap=overlap, spatial_dims=spatial_dims
+    scheduler = TileScheduler(
+        retrieval_fn=retrieval_fn,
+        tile_size=tile_size,
+        overlap=overlap,
+        batch_size=batch_size
     )
-
-    if batch_size is None:
-        batched = False
-        batch_size = 1
-    else:
-        batched = True
-
-    # Intialize container for results.
-    results = xr.Dataset(
-        {
-            spatial_dims[0]: (spatial_dims[0], input_data[spatial_dims[0]].data),
-            spatial_dims[1]: (spatial_dims[1], input_data[spatial_dims[1]].data),
-            "surface_precip": (spatial_dims, np.zeros(shape, dtype=np.float32)),
-            "probability_of_precip": (spatial_dims, np.zeros(shape, dtype=np.float32)),
-            "probability_of_heavy_precip": (
-                spatial_dims,
-                np.zeros(shape, dtype=np.float32),
-            ),
-            "precip_flag": (spatial_dims, np.zeros(shape, dtype=bool)),
-            "heavy_precip_flag": (spatial_dims, np.zeros(shape, dtype=bool)),
-        }
-    )
-
-    result_tiler = DatasetTiler(
-        results, tile_size=tile_size, overlap=overlap, spatial_dims=spatial_dims
-    )
-
-    batch_stack = []
-    coord_stack = []
-
-    for row_ind in range(input_data_tiler.n_rows_tiled):
-        for col_ind in range(input_data_tiler.n_cols_tiled):
-            input_tile = input_data_tiler.get_tile(row_ind, col_ind)
-            batch_stack.append(input_tile)
-            coord_stack.append((row_ind, col_ind))
-
-            while len(batch_stack) >= batch_size:
-                batch = batch_stack[:batch_size]
-                batch_stack = batch_stack[batch_size:]
-                coords = coord_stack[:batch_size]
-                coord_stack = coord_stack[batch_size:]
-                if batched:
-                    assert len(batch) == batch_size
-                    assert len(coords) == batch_size
-                    vars_retrieved = process_batched(
-                        retrieval_fn, batch, spatial_dims, coords, result_tiler
-                    )
-                else:
-                    assert len(batch) == 1
-                    assert len(coords) == 1
-                    vars_retrieved = process(
-                        retrieval_fn, batch[0], coords[0], result_tiler
-                    )
-
-    # Process remaining tiles.
-    if len(batch_stack) > 0:
-        vars_retrieved = process_batched(
-            retrieval_fn, batch_stack, spatial_dims, coord_stack, result_tiler
-        )
-
-    return results[vars_retrieved]
+    completed = scheduler.add_scene(None, input_data, required=required)
+    completed += scheduler.finish()
+    results = completed[0][1]
+    results.attrs["n_tiles"] = scheduler.n_tiles
+    results.attrs["n_tiles_skipped"] = scheduler.n_tiles_skipped
+    return results
 
 
 def process_scene_tabular(
     input_data: xr.Dataset,
     batch_size: int | None,
     retrieval_fn: Callable[[xr.Dataset], xr.Dataset],
+    required: Optional[np.ndarray] = None,
 ) -> xr.Dataset:
     """
     Process a collocation scene with input data in tabular format.
@@ -417,6 +965,10 @@ def process_scene_tabular(
         input_data: An xarary.Dataset containing the retrieval input data.
         batch_size: The batch size to use for processing.
         retrieval_fn: The retrieval callback function.
+        required: An optional boolean mask identifying the pixels for which
+            retrieval results are required. If given, only the required pixels
+            are passed to the retrieval and the continuous retrieval results
+            for all other pixels are set to NAN.
 
     Return:
         An xarray.Dataset containing the retrieval results reshaped
@@ -426,7 +978,19 @@ def process_scene_tabular(
     spatial_dims = [dim for dim in spatial_dims if dim in input_data.dims]
     shape = tuple([input_data[dim].size for dim in spatial_dims])
 
-    input_data_flat = input_data.stack({"batch": spatial_dims}).copy(deep=True)
+    if isinstance(retrieval_fn, ArrayRetrieval):
+        return process_scene_tabular_arrays(
+            input_data, spatial_dims, batch_size, retrieval_fn, required=required
+        )
+
+    if required is not None:
+        pixel_inds = np.flatnonzero(required)
+        input_data_flat = input_data.isel({
+            dim: xr.DataArray(dim_inds, dims="batch")
+            for dim, dim_inds in zip(spatial_dims, np.unravel_index(pixel_inds, shape))
+        })
+    else:
+        input_data_flat = input_data.stack({"batch": spatial_dims}).copy(deep=True)
     n_samples = input_data_flat.batch.size
     if batch_size is None:
         batch_size = n_samples
@@ -450,11 +1014,123 @@ def process_scene_tabular(
     )
 
     batch_start = 0
-    vars_retrieved = []
+    vars_retrieved = []
+    while batch_start < n_samples:
+        inds = {"batch": slice(batch_start, batch_start + batch_size)}
+        batch = input_data_flat[inds]
+        retrieved = retrieval_fn(batch)
+        for var in [
+            "surface_precip",
+            "probability_of_precip",
+            "probability_of_heavy_precip",
+            "precip_flag",
+            "heavy_precip_flag",
+        ]:
+            if var in retrieved:
+                batch[var].data[:] = retrieved[var].data
+                vars_retrieved.append(var)
+
+        batch_start += batch_size
+
+    if required is not None:
+        return _scatter_tabular_results(
+            input_data,
+            spatial_dims,
+            pixel_inds,
+            {var: input_data_flat[var].data for var in vars_retrieved},
+        )
+    results = input_data_flat[vars_retrieved].unstack()
+    return results
+
+
+def _scatter_tabular_results(
+    input_data: xr.Dataset,
+    spatial_dims: List[str],
+    inds: np.ndarray,
+    retrieved: Dict[str, np.ndarray],
+) -> xr.Dataset:
+    """
+    Scatter retrieval results for a subset of the pixels of a scene back into the
+    spatial structure of the input data.
+
+    Args:
+        input_data: An xarray.Dataset containing the retrieval input data.
+        spatial_dims: The names of the spatial dimensions of the input data.
+        inds: The flat indices of the retrieved pixels.
+        retrieved: A dictionary mapping the names of the retrieved variables to
+            arrays containing the retrieval results for the retrieved pixels.
+
+    Return:
+        An xarray.Dataset containing the retrieval results. The continuous
+        results for all pixels that weren't retrieved are set to NAN.
+    """
+    shape = tuple([input_data[dim].size for dim in spatial_dims])
+    results = {}
+    for var, data in retrieved.items():
+        if var.endswith("flag"):
+            arr = np.zeros(shape, dtype=bool)
+        else:
+            arr = np.full(shape, np.nan, dtype=np.float32)
+        arr.reshape(-1)[inds] = data
+        results[var] = (spatial_dims, arr)
+    if "surface_precip" not in results:
+        results["surface_precip"] = (
+            spatial_dims, np.full(shape, np.nan, dtype=np.float32)
+        )
+    coords = {
+        dim: input_data[dim].data for dim in spatial_dims if dim in input_data.coords
+    }
+    return xr.Dataset(results, coords=coords)
+
+
+def process_scene_tabular_arrays(
+    input_data: xr.Dataset,
+    spatial_dims: List[str],
+    batch_size: int | None,
+    retrieval_fn: ArrayRetrieval,
+    required: Optional[np.ndarray] = None,
+) -> xr.Dataset:
+    """
+    Process a collocation scene with an array retrieval expecting tabular input.
+
+    Args:
+        input_data: An xarary.Dataset containing the retrieval input data.
+        spatial_dims: The names of the spatial dimensions of the input data.
+        batch_size: The batch size to use for processing.
+        retrieval_fn: The array retrieval.
+        required: An optional boolean mask identifying the pixels for which
+            retrieval results are required. If given, only the required pixels
+            are passed to the retrieval.
+
+    Return:
+        An xarray.Dataset containing the retrieval results reshaped
+        into their original 2D structure.
+    """
+    shape = tuple([input_data[dim].size for dim in spatial_dims])
+    n_pixels = int(np.prod(shape))
+    inds = None
+    n_samples = n_pixels
+    if required is not None:
+        inds = np.flatnonzero(required)
+        n_samples = inds.size
+    if batch_size is None:
+        batch_size = n_samples
+
+    inputs = {}
+    for name in get_feature_variables(input_data):
+        var = input_data[name]
+        feature_dim = [dim for dim in var.dims if dim.startswith("features_")][0]
+        arr = var.transpose(*spatial_dims, feature_dim).data.reshape(n_pixels, -1)
+        if inds is not None:
+            arr = np.take(arr, inds, axis=0)
+        inputs[name] = np.ascontiguousarray(arr)
+
+    results = {}
+    batch_start = 0
     while batch_start < n_samples:
-        inds = {"batch": slice(batch_start, batch_start + batch_size)}
-        batch = input_data_flat[inds]
-        retrieved = retrieval_fn(batch)
+        batch_end = batch_start + batch_size
+        batch = {name: arr[batch_start:batch_end] for name, arr in inputs.items()}
+        retrieved = retrieval_fn.retrieve_arrays(batch)
         for var in [
             "surface_precip",
             "probability_of_precip",
@@ -463,13 +1139,21 @@ def process_scene_tabular(
             "heavy_precip_flag",
         ]:
             if var in retrieved:
-                batch[var].data[:] = retrieved[var].data
-                vars_retrieved.append(var)
-
-        batch_start += batch_size
-
-    results = input_data_flat[vars_retrieved].unstack()
-    return results
+                if var not in results:
+                    dtype = bool if var.endswith("flag") else np.float32
+                    results[var] = np.zeros(n_samples, dtype=dtype)
+                results[var][batch_start:batch_end] = retrieved[var]
+        batch_start = batch_end
+
+    if inds is not None:
+        return _scatter_tabular_results(input_data, spatial_dims, inds, results)
+    coords = {
+        dim: input_data[dim].data for dim in spatial_dims if dim in input_data.coords
+    }
+    return xr.Dataset(
+        {var: (spatial_dims, arr.reshape(shape)) for var, arr in results.items()},
+        coords=coords
+    )
 
 
 @dataclass
@@ -536,6 +1220,7 @@ def evaluate_scene(
     heavy_precip_detection_metrics: List[Metric],
     prob_heavy_precip_detection_metrics: List[Metric],
     output_path: Optional[Path] = None,
+    skip_invalid: bool = False,
 ) -> xr.Dataset:
     """
     Evaluate retrieval on a single collocation file.
@@ -571,25 +1256,237 @@ def evaluate_scene(
             to use to evaluate the probabilistic heavy precipitation detection.
         output_path: If given the retrieval results from the scene will be written
             to this path.
+        skip_invalid: If 'True', the retrieval is not run on tiles or, for tabular
+            retrievals, pixels that don't contain any valid reference data.
+    """
+    input_data, target_data = load_scene_data(
+        input_files=input_files,
+        retrieval_input=retrieval_input,
+        geometry=geometry,
+        target_config=target_config,
+    )
+    target_bundle = target_config.load_bundle(target_data)
+    required = None
+    if skip_invalid:
+        required = get_required_mask(
+            target_data, target_bundle, geometry, get_spatial_shape(input_data)
+        )
+    results = process_scene(
+        input_data=input_data,
+        input_data_format=input_data_format,
+        tile_size=tile_size,
+        overlap=overlap,
+        batch_size=batch_size,
+        retrieval_fn=retrieval_fn,
+        required=required,
+    )
+    return assess_scene(
+        results=results,
+        target_data=target_data,
+        input_files=input_files,
+        target_config=target_config,
+        geometry=geometry,
+        precip_quantification_metrics=precip_quantification_metrics,
+        precip_detection_metrics=precip_detection_metrics,
+        prob_precip_detection_metrics=prob_precip_detection_metrics,
+        heavy_precip_detection_metrics=heavy_precip_detection_metrics,
+        prob_heavy_precip_detection_metrics=prob_heavy_precip_detection_metrics,
+        output_path=output_path,
+        target_bundle=target_bundle,
+    )
+
+
+def get_spatial_shape(input_data: xr.Dataset) -> Tuple[int, int]:
+    """
+    Get the spatial shape of retrieval input data.
+    """
+    spatial_dims = ["latitude", "longitude", "scan", "pixel"]
+    return tuple(input_data.sizes[dim] for dim in spatial_dims if dim in input_data.dims)
+
+
+def get_tile_counts(results: xr.Dataset) -> np.ndarray:
+    """
+    Get the numbers of processed and skipped tiles from retrieval results.
+
+    Args:
+        results: An xarray.Dataset containing retrieval results.
+
+    Return:
+        An array ``[n_tiles, n_tiles_skipped]`` containing the total number of
+        tiles in the scene and the number of tiles on which the retrieval was
+        not run. Both are zero for retrievals that don't use tiling.
+    """
+    return np.array(
+        [results.attrs.get("n_tiles", 0), results.attrs.get("n_tiles_skipped", 0)]
+    )
+
+
+def get_required_mask(
+    target_data: xr.Dataset,
+    target_bundle: TargetBundle,
+    geometry: str,
+    shape: Tuple[int, int],
+) -> np.ndarray:
+    """
+    Identify the pixels of a scene whose retrieval results can contribute to the
+    evaluation metrics.
+
+    Retrieval results contribute to the evaluation if the corresponding reference pixel
+    lies within the sensor swath and satisfies the quality requirements of the
+    target config.
+
+    Args:
+        target_data: An xarray.Dataset containing the gridded reference data.
+        target_bundle: The reference data loaded from 'target_data' using the
+            target config.
+        geometry: The geometry of the retrieval: 'on_swath' or 'gridded'.
+        shape: The spatial shape of the retrieval input data.
+
+    Return:
+        A boolean numpy.ndarray of the given shape identifying required pixels
+        in the geometry of the retrieval input data.
+    """
+    pixel_inds = target_data.pixel_index.data
+    valid = (pixel_inds >= 0) * ~target_bundle.invalid
+    if geometry == "gridded":
+        return valid
+    scan_inds = target_data.scan_index.data
+    required = np.zeros(shape, dtype=bool)
+    required[scan_inds[valid], pixel_inds[valid]] = True
+    return required
+
+
+def load_scene_data(
+    input_files: InputFiles,
+    retrieval_input: List[InputConfig],
+    geometry: str,
+    target_config: TargetConfig,
+) -> Tuple[xr.Dataset, xr.Dataset]:
+    """
+    Load the retrieval input and reference data for a collocation scene.
+
+    Only the reference data variables required by 'target_config' and by the
+    assessment of the retrieval results are loaded.
+
+    Args:
+        input_files: An input files record containing the paths to all retrieval
+            input files.
+        retrieval_input: A list defining the retrieval inputs to load.
+        geometry: A string defining the geometry of the retrieval: 'on_swath' or
+            'gridded'.
+        target_config: The TargetConfig defining the reference data variables
+            to load.
+
+    Return:
+        A tuple ``(input_data, target_data)`` containing the retrieval input data
+        and the gridded reference data loaded into memory.
     """
     input_data = load_retrieval_input_data(
         input_files=input_files, retrieval_input=retrieval_input, geometry=geometry
     )
+    variables = target_config.get_required_variables()
+    variables += [
+        var for var in ["scan_index", "pixel_index"] + AUXILIARY_TARGET_VARIABLES
+        if var not in variables
+    ]
+    target_data = load_subset(input_files.target_file_gridded, variables)
+    return input_data, target_data
+
+
+def process_scene(
+    input_data: xr.Dataset,
+    input_data_format: str,
+    tile_size: int | Tuple[int, int] | None,
+    overlap: int | None,
+    batch_size: int | None,
+    retrieval_fn: Callable[[xr.Dataset], xr.Dataset],
+    required: Optional[np.ndarray] = None,
+) -> xr.Dataset:
+    """
+    Run the retrieval on the input data from a collocation scene.
+
+    Args:
+        input_data: An xarray.Dataset containing the retrieval input data.
+        input_data_format: A string specifying whether the retrieval expects input data in
+            spatial or tabular format.
+        tile_size: The tile size to use for the retrieval or 'None' if no tiling
+            should be applied.
+        overlap: The overlap to apply for the tiling.
+        batch_size: The batch size to use for tiled spatial and tabular retrievals.
+        retrieval_fn: A callback function that runs the retrieval on the
+            input data.
+        required: An optional mask identifying the pixels for which retrieval
+            results are required.
 
+    Return:
+        An xarray.Dataset containing the retrieval results.
+    """
     if input_data_format == "spatial":
-        results = process_scene_spatial(
+        return process_scene_spatial(
             input_data=input_data,
             tile_size=tile_size,
             overlap=overlap,
             batch_size=batch_size,
             retrieval_fn=retrieval_fn,
+            required=required,
         )
-    else:
-        results = process_scene_tabular(
-            input_data=input_data, batch_size=batch_size, retrieval_fn=retrieval_fn
-        )
+    return process_scene_tabular(
+        input_data=input_data,
+        batch_size=batch_size,
+        retrieval_fn=retrieval_fn,
+        required=required,
+    )
+
+
+def assess_scene(
+    results: xr.Dataset,
+    target_data: xr.Dataset,
+    input_files: InputFiles,
+    target_config: TargetConfig,
+    geometry: str,
+    precip_quantification_metrics: List[Metric],
+    precip_detection_metrics: List[Metric],
+    prob_precip_detection_metrics: List[Metric],
+    heavy_precip_detection_metrics: List[Metric],
+    prob_heavy_precip_detection_metrics: List[Metric],
+    output_path: Optional[Path] = None,
+    target_bundle: Optional[TargetBundle] = None,
+) -> xr.Dataset:
+    """
+    Assess retrieval results from a collocation scene against the reference data.
+
+    Args:
+        results: An xarray.Dataset containing the retrieval results.
+        target_data: An xarray.Dataset containing the gridded reference data.
+        input_files: An input files record containing the paths to all retrieval
+            input files.
+        target_config: A TargetConfig specifying quality requirements for the retrieval
+            target data.
+        geometry: A string defining the geometry of the retrieval: 'on_swath' or
+            'gridded'.
+        precip_quantification_metrics: A list containing the metrics to use
+            to evaluate quantitative precipitation estimates.
+        precip_detection_metrics: A list containing the metrics to use to evaluate
+            the precipitation detection.
+        prob_precip_detection_metrics: A list containing the metrics to use
+            to evaluate the probabilistic precipitation detection.
+        heavy_precip_detection_metrics: A list containing the metrics to use
+            to evaluate the heavy precipitation detection.
+        prob_heavy_precip_detection_metrics: A list containing the metrics
+            to use to evaluate the probabilistic heavy precipitation detection.
+        output_path: If given the retrieval results from the scene will be written
+            to this path.
+        target_bundle: The reference data loaded from 'target_data' using
+            'target_config'. Loaded from 'target_data' if not given.
+
+    Return:
+        An xarray.Dataset containing the retrieval results on the gridded reference
+        grid together with the reference precipitation.
+    """
+    if target_bundle is None:
+        target_bundle = target_config.load_bundle(target_data)
 
-    with xr.open_dataset(input_files.target_file_gridded, engine="h5netcdf") as target_data:
+    with target_data:
 
         scan_inds = target_data.scan_index
         pixel_inds = target_data.pixel_index
@@ -607,77 +1504,148 @@ def evaluate_scene(
                 if var in results:
                     results[var].data[invalid] = np.nan
 
-        surface_precip_ref = target_config.load_reference_precip(target_data)
-        invalid_mask = target_config.get_mask(target_data)
         valid_mask = (
             (pixel_inds.data >= 0)
             * np.isfinite(results.surface_precip.data)
-            * ~invalid_mask
+            * ~target_bundle.invalid
         )
-        surface_precip_ref = target_data.surface_precip
-        surface_precip_ref.data[~valid_mask] = np.nan
+        surface_precip_ref = target_bundle.surface_precip.copy()
+        surface_precip_ref[~valid_mask] = np.nan
 
-        for metric in precip_quantification_metrics:
-            metric.update(results.surface_precip.data, surface_precip_ref.data)
+        MetricSuite(precip_quantification_metrics).update(
+            results.surface_precip.data, surface_precip_ref
+        )
 
-        precip_flag_ref = None
+        precip_flag_ref = target_bundle.precip_mask
         if "precip_flag" in results:
-            precip_flag_ref = target_config.load_precip_mask(target_data)
-            for metric in precip_detection_metrics:
-                metric.update(
-                    results.precip_flag.data[valid_mask], precip_flag_ref[valid_mask]
-                )
+            MetricSuite(precip_detection_metrics).update(
+                results.precip_flag.data[valid_mask], precip_flag_ref[valid_mask]
+            )
         if "probability_of_precip" in results:
-            if precip_flag_ref is None:
-                precip_flag_ref = target_config.load_precip_mask(target_data)
             for metric in prob_precip_detection_metrics:
                 metric.update(
                     results.probability_of_precip.data[valid_mask],
                     precip_flag_ref[valid_mask],
                 )
 
-        heavy_precip_flag_ref = None
+        heavy_precip_flag_ref = target_bundle.heavy_precip_mask
         if "heavy_precip_flag" in results:
-            heavy_precip_flag_ref = target_config.load_heavy_precip_mask(target_data)
-            for metric in heavy_precip_detection_metrics:
-                metric.update(
-                    results.heavy_precip_flag.data[valid_mask],
-                    heavy_precip_flag_ref[valid_mask],
-                )
+            MetricSuite(heavy_precip_detection_metrics).update(
+                results.heavy_precip_flag.data[valid_mask],
+                heavy_precip_flag_ref[valid_mask],
+            )
         if "probability_of_heavy_precip" in results:
-            if heavy_precip_flag_ref is None:
-                heavy_precip_flag_ref = target_config.load_heavy_precip_mask(
-                    target_data
-                )
             for metric in prob_heavy_precip_detection_metrics:
                 metric.update(
                     results.probability_of_heavy_precip.data[valid_mask],
                     heavy_precip_flag_ref[valid_mask],
                 )
 
-        aux_vars = [
-            "radar_quality_index",
-            "valid_fraction",
-            "precip_fraction",
-            "snow_fraction",
-            "convective_fraction",
-            "stratiform_fraction",
-            "hail_fraction",
-        ]
-
-        results["surface_precip_ref"] = (("latitude", "longitude"), surface_precip_ref.data)
-        for var in [var for var in aux_vars if var in target_data]:
+        results["surface_precip_ref"] = (("latitude", "longitude"), surface_precip_ref)
+        for var in [var for var in AUXILIARY_TARGET_VARIABLES if var in target_data]:
             results[var] = (("latitude", "longitude"), target_data[var].data)
 
         if output_path is not None:
             output_path = Path(output_path)
             output_path.mkdir(exist_ok=True, parents=True)
-            median_time = input_files.target_file_gridded.name.split("_")[1][:-3]
+            median_time = get_median_time(input_files.target_file_gridded).strftime("%Y%m%d%H%M%S")
             results.to_netcdf(output_path / f"results_{median_time}.nc")
 
         return results
 
 
+_WORKER_STATE = {}
+
+
+def set_num_threads(n_threads: int) -> None:
+    """
+    Limit the number of threads used by numerical libraries in the current process.
+
+    The thread pools of BLAS and OpenMP libraries that have already been loaded, such
+    as those used by numpy, are limited using 'threadpoolctl'. If 'threadpoolctl' is
+    not installed, these thread pools are left unchanged. The environment variables
+    read by OpenMP, MKL, and OpenBLAS are set so that libraries loaded afterwards, for
+    example by a retrieval factory, respect the limit. If PyTorch has been imported,
+    the number of PyTorch intra-op threads is set as well.
+
+    Args:
+        n_threads: The number of threads to use.
+    """
+    for var in ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]:
+        os.environ[var] = str(n_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=n_threads)
+    except ImportError:
+        LOGGER.debug(
+            "'threadpoolctl' is not installed. Thread pools of libraries that are "
+            "already loaded won't be limited."
+        )
+    torch = sys.modules.get("torch", None)
+    if torch is not None:
+        torch.set_num_threads(n_threads)
+
+
+def _initialize_worker(
+    evaluator: "Evaluator",
+    retrieval_fn: Optional[Callable[[xr.Dataset], xr.Dataset]],
+    retrieval_factory: Optional[Callable[[], Callable[[xr.Dataset], xr.Dataset]]],
+    n_threads: Optional[int],
+) -> None:
+    """
+    Initializer for the processes of the evaluation worker pool.
+
+    Stores the evaluator and the retrieval function in the worker process so that
+    evaluation tasks only need to transfer the index of the scene to evaluate.
+
+    Args:
+        evaluator: The evaluator performing the evaluation.
+        retrieval_fn: The retrieval callback function or 'None' if a retrieval
+            factory is used.
+        retrieval_factory: An optional callable that takes no arguments and returns
+            the retrieval callback function. It is called once in every worker.
+        n_threads: The number of threads to use in every worker.
+    """
+    if n_threads is not None:
+        set_num_threads(n_threads)
+    if retrieval_factory is not None:
+        retrieval_fn = retrieval_factory()
+        if n_threads is not None:
+            set_num_threads(n_threads)
+    _WORKER_STATE["evaluator"] = evaluator
+    _WORKER_STATE["retrieval_fn"] = retrieval_fn
+
+
+def _evaluate_scene_in_worker(
+    index: int,
+    shared_metrics: bool,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Evaluate a scene in a process of the evaluation worker pool.
+
+    Args:
+        index: The index of the scene to evaluate.
+        shared_metrics: Whether to update the evaluator's shared metrics directly
+            or to return the metric states for the scene.
+        **kwargs: The remaining keyword arguments passed to the evaluator's
+            scene evaluation method.
+
+    Return:
+        A dictionary containing the numbers of processed and skipped tiles under
+        the key 'tile_counts' and, if 'shared_metrics' is 'False', the metric
+        states for the scene.
+    """
+    evaluator = _WORKER_STATE["evaluator"]
+    retrieval_fn = _WORKER_STATE["retrieval_fn"]
+    if shared_metrics:
+        results = evaluator.evaluate_scene(
+            index, retrieval_fn=retrieval_fn, track=True, **kwargs
+        )
+        return {"tile_counts": get_tile_counts(results)}
+    return evaluator.evaluate_scene_states(index, retrieval_fn=retrieval_fn, **kwargs)
+
+
 class Evaluator:
     """
     The Evaluator class provides an interface to evaluate a generic retrieval implemented
@@ -751,6 +1719,7 @@ class Evaluator:
             ipwgml.metrics.HSS(),
         ]
         self._prob_heavy_precip_detection_metrics = [ipwgml.metrics.PRCurve()]
+        self.skipped_tile_fraction = None
 
         sources = set([inpt.name for inpt in self.retrieval_input] + ["ancillary"])
         for source in sources:
@@ -1010,6 +1979,7 @@ class Evaluator:
         input_data_format: str,
         track: bool = False,
         output_path: Optional[Path] = None,
+        skip_invalid: bool = False,
     ) -> xr.Dataset:
         """
         Run tests on a single scene.
@@ -1025,6 +1995,8 @@ class Evaluator:
             track: If 'True' will track the retrieval results using the
                 evaluator's metrics. If 'False', results will not be tracked.
             output_path: If not 'None', retrieval results will be written to that path.
+            skip_invalid: If 'True', the retrieval is not run on tiles or, for
+                tabular retrievals, pixels that don't contain any valid reference data.
 
         Return:
             An xarray.Dataset containing the retrieval results.
@@ -1060,6 +2032,7 @@ class Evaluator:
             heavy_precip_detection_metrics=heavy_precip_detection_metrics,
             prob_heavy_precip_detection_metrics=prob_heavy_precip_detection_metrics,
             output_path=output_path,
+            skip_invalid=skip_invalid,
         )
 
     def evaluate_scene_no_results(
@@ -1072,6 +2045,7 @@ class Evaluator:
         input_data_format: str,
         track: bool = False,
         output_path: Optional[Path] = None,
+        skip_invalid: bool = False,
     ) -> xr.Dataset:
         """
         Wrapper around evaluate_scene that discards the return value.
@@ -1084,90 +2058,382 @@ class Evaluator:
             retrieval_fn,
             input_data_format,
             track=track,
-            output_path=output_path
+            output_path=output_path,
+            skip_invalid=skip_invalid,
         )
 
-    def evaluate(
+    def get_metrics(self) -> Dict[str, List[Metric]]:
+        """
+        Get all metrics tracked by the evaluator.
+
+        Return:
+            A dictionary mapping the names of the evaluator's metric groups, such as
+            'precip_quantification_metrics', to the corresponding lists of metrics.
+        """
+        return {group: getattr(self, group) for group in METRIC_GROUPS}
+
+    def evaluate_scene_states(
+        self,
+        index: int,
+        tile_size: int | Tuple[int, int] | None,
+        overlap: int | None,
+        batch_size: int | None,
+        retrieval_fn: Callable[[xr.Dataset], xr.Dataset],
+        input_data_format: str,
+        output_path: Optional[Path] = None,
+        skip_invalid: bool = False,
+    ) -> Dict[str, List[Dict[str, np.ndarray]]]:
+        """
+        Evaluate a single scene using process-local copies of the evaluator's metrics.
+
+        Args:
+            index: An index identifying the scene.
+            tile_size: The tile size to use for the retrieval or 'None' to apply no tiling.
+            overlap: The overlap to apply for the tiling.
+            batch_size: Maximum batch size for tiled spatial and tabular retrievals.
+            retrieval_fn: The retrieval callback function.
+            input_data_format: Whether the retrieval expects input data in 'tabular' or 'spatial'
+                format.
+            output_path: If not 'None', retrieval results will be written to that path.
+            skip_invalid: If 'True', the retrieval is not run on tiles or, for
+                tabular retrievals, pixels that don't contain any valid reference data.
+
+        Return:
+            A dictionary mapping the names of the evaluator's metric groups to lists
+            containing the states of the metrics accumulated over the scene. The states
+            can be merged into the evaluator's metrics using the metrics' ``merge`` method.
+            The numbers of processed and skipped tiles are stored under the key
+            'tile_counts'.
+        """
+        metrics = {
+            group: [metric.from_state() for metric in group_metrics]
+            for group, group_metrics in self.get_metrics().items()
+        }
+        results = evaluate_scene(
+            input_files=self.get_input_files(index),
+            retrieval_input=self.retrieval_input,
+            target_config=self.target_config,
+            geometry=self.geometry,
+            tile_size=tile_size,
+            overlap=overlap,
+            batch_size=batch_size,
+            retrieval_fn=retrieval_fn,
+            input_data_format=input_data_format,
+            output_path=output_path,
+            skip_invalid=skip_invalid,
+            **metrics
+        )
+        states = {
+            group: [metric.state() for metric in group_metrics]
+            for group, group_metrics in metrics.items()
+        }
+        states["tile_counts"] = get_tile_counts(results)
+        return states
+
+    def merge_states(self, states: Dict[str, List[Dict[str, np.ndarray]]]) -> None:
+        """
+        Merge metric states into the evaluator's metrics.
+
+        Args:
+            states: A dictionary of metric states as returned by
+                :meth:`evaluate_scene_states`.
+        """
+        for group, group_metrics in self.get_metrics().items():
+            for metric, state in zip(group_metrics, states[group]):
+                metric.merge(state)
+
+    def _evaluate_pipelined(
         self,
         retrieval_fn: Callable[[xr.Dataset], xr.Dataset],
+        tile_size: int | Tuple[int, int] | None,
+        overlap: int | None,
+        batch_size: int | None,
+        input_data_format: str,
+        output_path: Optional[Path],
+        metrics: Dict[str, List[Metric]],
+        prefetch: int,
+        skip_invalid: bool = False,
+    ) -> np.ndarray:
+        """
+        Evaluate all scenes in the current process.
+
+        Input and reference data for the next 'prefetch' scenes are loaded in a
+        thread pool, the retrieval is run in the calling thread, and the metrics
+        are updated in a single background thread. The number of scenes waiting
+        to be assessed is bounded by 'prefetch' to limit memory usage. For spatial
+        retrievals, batches of tiles may span multiple consecutive scenes.
+
+        Args:
+            retrieval_fn: The retrieval callback function.
+            tile_size: The tile size to use for the retrieval or 'None' to apply no tiling.
+            overlap: The overlap to apply for the tiling.
+            batch_size: Maximum batch size for tiled spatial and tabular retrievals.
+            input_data_format: The retrieval kind: 'spatial' or 'tabular'.
+            output_path: If not 'None', retrieval results will be written to that path.
+            metrics: A dictionary mapping the names of the metric groups to the metrics
+                to update.
+            prefetch: The number of scenes to load ahead of the retrieval. If 0,
+                scenes are loaded, processed, and assessed sequentially.
+            skip_invalid: If 'True', the retrieval is not run on tiles or, for
+                tabular retrievals, pixels that don't contain any valid reference data.
+
+        Return:
+            An array ``[n_tiles, n_tiles_skipped]`` containing the total number of
+            tiles and the number of skipped tiles.
+        """
+        def load(
+            scene_ind: int
+        ) -> Tuple[Tuple[int, xr.Dataset, TargetBundle], xr.Dataset, Optional[np.ndarray]]:
+            input_data, target_data = load_scene_data(
+                input_files=self.get_input_files(scene_ind),
+                retrieval_input=self.retrieval_input,
+                geometry=self.geometry,
+                target_config=self.target_config,
+            )
+            target_bundle = self.target_config.load_bundle(target_data)
+            required = None
+            if skip_invalid:
+                required = get_required_mask(
+                    target_data,
+                    target_bundle,
+                    self.geometry,
+                    get_spatial_shape(input_data),
+                )
+            return (scene_ind, target_data, target_bundle), input_data, required
+
+        def assess(
+            scene_ind: int,
+            target_data: xr.Dataset,
+            target_bundle: TargetBundle,
+            results: xr.Dataset,
+        ) -> None:
+            assess_scene(
+                results=results,
+                target_data=target_data,
+                input_files=self.get_input_files(scene_ind),
+                target_config=self.target_config,
+                geometry=self.geometry,
+                output_path=output_path,
+                target_bundle=target_bundle,
+                **metrics
+            )
+
+        def load_scenes() -> Iterator[
+            Tuple[Tuple[int, xr.Dataset, TargetBundle], xr.Dataset, Optional[np.ndarray]]
+        ]:
+            if prefetch < 1:
+                for scene_ind in range(len(self)):
+                    yield load(scene_ind)
+                return
+            with ThreadPoolExecutor(max_workers=prefetch) as loader:
+                loading = deque(
+                    loader.submit(load, scene_ind)
+                    for scene_ind in range(min(prefetch, len(self)))
+                )
+                for scene_ind in range(len(self)):
+                    scene = loading.popleft().result()
+                    next_ind = scene_ind + prefetch
+                    if next_ind < len(self):
+                        loading.append(loader.submit(load, next_ind))
+                    yield scene
+
+        scheduler = TileScheduler(
+            retrieval_fn=retrieval_fn,
+            tile_size=tile_size,
+            overlap=overlap,
+            batch_size=batch_size
+        )
+
+        def process_scenes() -> Iterator[
+            Tuple[Tuple[int, xr.Dataset, TargetBundle], xr.Dataset]
+        ]:
+            for key, input_data, required in load_scenes():
+                if input_data_format == "spatial":
+                    yield from scheduler.add_scene(key, input_data, required=required)
+                else:
+                    yield key, process_scene_tabular(
+                        input_data, batch_size, retrieval_fn, required=required
+                    )
+            yield from scheduler.finish()
+
+        retrieved = process_scenes()
+        retrieved = track(
+            retrieved,
+            total=len(self),
+            description="Evaluating retrieval",
+            console=ipwgml.logging.get_console(),
+        )
+
+        if prefetch < 1:
+            for key, results in retrieved:
+                assess(*key, results)
+            return np.array([scheduler.n_tiles, scheduler.n_tiles_skipped])
+
+        with ThreadPoolExecutor(max_workers=1) as assessor:
+            assessing = deque()
+            for key, results in retrieved:
+                assessing.append(assessor.submit(assess, *key, results))
+                while len(assessing) > prefetch or (assessing and assessing[0].done()):
+                    assessing.popleft().result()
+            while assessing:
+                assessing.popleft().result()
+        return np.array([scheduler.n_tiles, scheduler.n_tiles_skipped])
+
+    def evaluate(
+        self,
+        retrieval_fn: Optional[Callable[[xr.Dataset], xr.Dataset]] = None,
         tile_size: int | Tuple[int, int] | None = None,
         overlap: int | None = None,
         batch_size: int | None = None,
         input_data_format: str = "spatial",
         n_processes: int | None = None,
         output_path: Optional[Path] = None,
+        shared_metrics: bool = False,
+        retrieval_factory: Optional[
+            Callable[[], Callable[[xr.Dataset], xr.Dataset]]
+        ] = None,
+        threads_per_worker: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        prefetch: int = 2,
+        skip_invalid: Optional[bool] = None,
     ):
         """
         Run evaluation on complete test dataset.
 
         Args:
-            retrieval_fn: The retrieval callback function.
+            retrieval_fn: The retrieval callback function. Can be 'None' if
+                'retrieval_factory' is given.
             tile_size: The tile size to use for the retrieval or 'None' to apply no tiling.
             overlap: The overlap to apply for the tiling.
             batch_size: Maximum batch size for tiled spatial and tabular retrievals.
             input_data_format: The retrieval kind: 'spatial' or 'tabular'.
+            n_processes: The number of processes to use for the evaluation.
             output_path: If not 'None', retrieval results will be written to that path.
+            shared_metrics: If 'True', all processes update the evaluator's metrics
+                directly through shared memory, which requires a lock for every update.
+                If 'False', the metrics are accumulated in process-local copies whose states
+                are merged into the evaluator's metrics.
+            retrieval_factory: An optional callable taking no arguments that returns
+                the retrieval callback function. When evaluating with multiple processes,
+                the factory is called once in every worker process so that the retrieval,
+                for example a neural network model, doesn't have to be transferred to
+                the workers.
+            threads_per_worker: The number of threads used by numerical libraries in
+                every worker process. Defaults to the number of CPU cores divided by
+                the number of processes.
+            max_in_flight: The maximum number of scenes submitted to the worker pool
+                at any time. Defaults to twice the number of processes.
+            prefetch: The number of scenes to load ahead of the retrieval when
+                evaluating in a single process. Input and reference data are loaded
+                in a thread pool while the retrieval runs in the main thread and the
+                retrieval results are assessed in a background thread. Set to 0 to
+                process all scenes sequentially.
+            skip_invalid: If 'True', only data with valid reference pixels are passed
+                to the retrieval: spatial retrievals skip tiles without any valid
+                reference pixels and tabular retrievals are only run on the valid
+                pixels. The retrieved precipitation of skipped pixels is set to NAN.
+                Defaults to 'True' if 'output_path' is 'None', i.e., when only the
+                metrics are computed. The fraction of skipped tiles is stored in the
+                evaluator's 'skipped_tile_fraction' attribute.
         """
-        precip_quantification_metrics = self.precip_quantification_metrics
-        precip_detection_metrics = self.precip_detection_metrics
-        prob_precip_detection_metrics = self.prob_precip_detection_metrics
-        heavy_precip_detection_metrics = self.heavy_precip_detection_metrics
-        prob_heavy_precip_detection_metrics = self.prob_heavy_precip_detection_metrics
+        if retrieval_fn is None and retrieval_factory is None:
+            raise ValueError(
+                "Either 'retrieval_fn' or 'retrieval_factory' must be provided."
+            )
+        if skip_invalid is None:
+            skip_invalid = output_path is None
 
         if n_processes is None or n_processes < 2:
-            for scene_ind in track(
-                range(len(self)),
-                description="Evaluating retrieval",
-                console=ipwgml.logging.get_console(),
-            ):
-                try:
-                    self.evaluate_scene(
-                        index=scene_ind,
-                        tile_size=tile_size,
-                        overlap=overlap,
-                        batch_size=batch_size,
-                        retrieval_fn=retrieval_fn,
-                        input_data_format=input_data_format,
-                        track=True,
-                        output_path=output_path,
-                    )
-                except Exception as exc:
-                    raise exc
-                    LOGGER.exception(
-                        f"Encountered an error when processing scene {scene_ind}."
-                    )
+            if retrieval_fn is None:
+                retrieval_fn = retrieval_factory()
+            if shared_metrics:
+                metrics = self.get_metrics()
+            else:
+                metrics = {
+                    group: [metric.from_state() for metric in group_metrics]
+                    for group, group_metrics in self.get_metrics().items()
+                }
+            tile_counts = self._evaluate_pipelined(
+                retrieval_fn=retrieval_fn,
+                tile_size=tile_size,
+                overlap=overlap,
+                batch_size=batch_size,
+                input_data_format=input_data_format,
+                output_path=output_path,
+                metrics=metrics,
+                prefetch=prefetch,
+                skip_invalid=skip_invalid,
+            )
+            if not shared_metrics:
+                self.merge_states({
+                    group: [metric.state() for metric in group_metrics]
+                    for group, group_metrics in metrics.items()
+                })
         else:
-            pool = ProcessPoolExecutor(max_workers=n_processes)
-            tasks = []
-            scenes = {}
-            for scene_ind in range(len(self)):
-                tasks.append(
-                    pool.submit(
-                        self.evaluate_scene_no_results,
-                        index=scene_ind,
-                        tile_size=tile_size,
-                        overlap=overlap,
-                        batch_size=batch_size,
-                        retrieval_fn=retrieval_fn,
-                        input_data_format=input_data_format,
-                        track=True,
-                        output_path=output_path,
-                    )
+            if threads_per_worker is None:
+                threads_per_worker = max(1, (os.cpu_count() or 1) // n_processes)
+            if max_in_flight is None:
+                max_in_flight = 2 * n_processes
+            if retrieval_factory is not None:
+                retrieval_fn = None
+
+            pool = ProcessPoolExecutor(
+                max_workers=n_processes,
+                initializer=_initialize_worker,
+                initargs=(self, retrieval_fn, retrieval_factory, threads_per_worker),
+            )
+            scene_inds = iter(range(len(self)))
+            pending = {}
+            tile_counts = np.zeros(2, dtype=np.int64)
+
+            def submit_next() -> None:
+                scene_ind = next(scene_inds, None)
+                if scene_ind is None:
+                    return
+                task = pool.submit(
+                    _evaluate_scene_in_worker,
+                    scene_ind,
+                    shared_metrics,
+                    tile_size=tile_size,
+                    overlap=overlap,
+                    batch_size=batch_size,
+                    input_data_format=input_data_format,
+                    output_path=output_path,
+                    skip_invalid=skip_invalid,
                 )
-                scenes[tasks[-1]] = scene_ind
+                pending[task] = scene_ind
 
-            with Progress() as progress:
+            for _ in range(max_in_flight):
+                submit_next()
+
+            with pool, Progress() as progress:
                 evaluation = progress.add_task(
-                    "Evaluating retrieval:", total=(len(tasks))
+                    "Evaluating retrieval:", total=len(self)
                 )
-                for task in as_completed(tasks):
-                    try:
-                        task.result()
-                    except Exception:
-                        LOGGER.exception(
-                            f"Encountered an error when processing scene {scenes[task]}."
-                        )
-                    progress.update(evaluation, advance=1)
+                while len(pending) > 0:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for task in done:
+                        scene_ind = pending.pop(task)
+                        try:
+                            states = task.result()
+                            tile_counts += states["tile_counts"]
+                            if not shared_metrics:
+                                self.merge_states(states)
+                        except Exception:
+                            LOGGER.exception(
+                                f"Encountered an error when processing scene {scene_ind}."
+                            )
+                        progress.update(evaluation, advance=1)
+                        submit_next()
+
+        n_tiles, n_tiles_skipped = tile_counts
+        if n_tiles > 0:
+            self.skipped_tile_fraction = n_tiles_skipped / n_tiles
+            LOGGER.info(
+                f"Skipped {n_tiles_skipped} of {n_tiles} tiles "
+                f"({100.0 * self.skipped_tile_fraction:.1f}%) without valid "
+                "reference pixels."
+            )
 
     def plot_retrieval_results(
         self,
@@ -1229,13 +2495,11 @@ class Evaluator:
             ) for name, ret_fn in retrieval_fn.items()
         }
 
-        fname = self.target_gridded[scene_index].name
-        median_time = fname.split("_")[-1][:-3]
-        date = datetime.strptime(median_time, "%Y%m%d%H%M%S")
+        date = get_median_time(self.target_gridded[scene_index])
 
         res_1 = next(iter(results.values()))
 
-        with xr.open_dataset(self.target_gridded[scene_index], engine="h5netcdf") as target_data:
+        with open_dataset(self.target_gridded[scene_index]) as target_data:
             lons = target_data.longitude.data
             lats = target_data.latitude.data
             surface_precip_full = target_data.surface_precip.data
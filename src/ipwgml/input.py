@@ -60,7 +60,7 @@ import numpy as np
 import xarray as xr
 
 from ipwgml.definitions import ANCILLARY_VARIABLES
-from ipwgml.utils import open_if_required
+from ipwgml.utils import load_subset
 
 
 def normalize(
@@ -249,41 +249,44 @@ class PMW(InputConfig):
                 self._ang_stats = self._ang_stats[{"features": self.channels}]
         return self._ang_stats
 
-    def load_data(self, pmw_data_file: Path, target_time: xr.DataArray) -> Dict[str, np.ndarray]:
+    def load_data(
+            self,
+            pmw_data_file: Path,
+            target_time: xr.DataArray,
+            window: Optional[Dict[str, slice]] = None
+    ) -> Dict[str, np.ndarray]:
         """
         Load PMW observations from NetCDF file.
 
         Args:
             pmw_data_file: A Path object pointing to the file from which to load the input data.
             target_time: Not used.
+            window: An optional dictionary mapping the names of spatial dimensions to
+                slices defining a spatial window to load.
 
         Return:
             A dictionary mapping the keys 'obs_<sensor_name>' the loaded PMW observations. If 'include_angles'
             is 'True' the dictionary will also containg the earth-incidence angles with the
             key 'eia_<sensor_name>'.
         """
-        with open_if_required(pmw_data_file) as pmw_data:
-            pmw_data = pmw_data[["observations", "earth_incidence_angle"]].compute().transpose("channel", ...)
-            obs = pmw_data["observations"].compute().transpose("channel", ...)
-            if self.channels is not None:
-                obs = obs[{"channel": self.channels}]
-            else:
-                obs = obs[{"channel": slice(0, None)}]
+        variables = ["observations"]
+        if self.include_angles:
+            variables.append("earth_incidence_angle")
+        indexers = dict(window or {})
+        if self.channels is not None:
+            indexers["channel"] = self.channels
+        pmw_data = load_subset(pmw_data_file, variables, indexers)
 
-            obs = obs.data
-            obs = normalize(obs, self.stats, how=self.normalize, nan=self.nan)
+        obs = pmw_data["observations"].transpose("channel", ...).data
+        obs = normalize(obs, self.stats, how=self.normalize, nan=self.nan)
 
-            inpt_data = {
-                f"obs_{self.name}": obs
-            }
-            if self.include_angles:
-                angs = pmw_data["earth_incidence_angle"].compute().transpose("channel", ...)
-                if self.channels is not None:
-                    angs = angs[{"channel": self.channels}]
-                else:
-                    angs = angs[{"channel": slice(0, None)}]
-                angs = normalize(angs.data, self.ang_stats, how=self.normalize, nan=self.nan)
-                inpt_data[f"eia_{self.name}"] = angs
+        inpt_data = {
+            f"obs_{self.name}": obs
+        }
+        if self.include_angles:
+            angs = pmw_data["earth_incidence_angle"].transpose("channel", ...).data
+            angs = normalize(angs, self.ang_stats, how=self.normalize, nan=self.nan)
+            inpt_data[f"eia_{self.name}"] = angs
 
         return inpt_data
 
@@ -455,24 +458,30 @@ class Ancillary(InputConfig):
         stats = xr.load_dataset(stats_file, engine="h5netcdf")[{"features": inds}]
         return stats
 
-    def load_data(self, ancillary_data_file: Path, target_time: xr.DataArray) -> xr.Dataset:
+    def load_data(
+            self,
+            ancillary_data_file: Path,
+            target_time: xr.DataArray,
+            window: Optional[Dict[str, slice]] = None
+    ) -> xr.Dataset:
         """
         Load ancillary data from NetCDF file.
 
         Args:
             ancillary_data_file: A Path object pointing to the file from which to load the input data.
             targete_time: Not used.
+            window: An optional dictionary mapping the names of spatial dimensions to
+                slices defining a spatial window to load.
 
         Return:
             A dicitonary mapping the single key 'ancillary' to an array containing the data from
             all ancillary variables stacked along the first axis.
         """
-        with open_if_required(ancillary_data_file) as ancillary_data:
-            data = []
-            for var in self.variables:
-                data.append(ancillary_data[var].data)
+        ancillary_data = load_subset(ancillary_data_file, self.variables, window)
+        data = []
+        for var in self.variables:
+            data.append(ancillary_data[var].data)
 
-        data = np.stack(data)
         data = normalize(np.stack(data), self.stats, how=self.normalize, nan=self.nan)
         return {"ancillary": data}
 
@@ -518,7 +527,12 @@ class GeoIR(InputConfig):
         stats = xr.load_dataset(stats_file, engine="h5netcdf")[{"features": 8}]
         return stats
 
-    def load_data(self, geo_data_file: Path, target_time: xr.DataArray) -> xr.Dataset:
+    def load_data(
+            self,
+            geo_data_file: Path,
+            target_time: xr.DataArray,
+            window: Optional[Dict[str, slice]] = None
+    ) -> xr.Dataset:
         """
         Load GEO IR data from NetCDF file.
 
@@ -527,13 +541,15 @@ class GeoIR(InputConfig):
             target_time: An xarray.DataArray containing the target times, which will be used to
                 to interpolate the input observations to the nearest time step if 'self.nearest'
                 is 'True'.
+            window: An optional dictionary mapping the names of spatial dimensions to
+                slices defining a spatial window to load.
 
         Return:
             A dicitonary mapping the single key 'obs_geo' to an array containing the GEO IR
             observation from the desired time steps.
         """
-        with open_if_required(geo_data_file) as geo_data:
-            obs = geo_data.observations.data[None]
+        geo_data = load_subset(geo_data_file, ["observations"], window)
+        obs = geo_data.observations.data[None]
 
         obs = normalize(obs, self.stats, how=self.normalize, nan=self.nan)
         return {"obs_geo_ir": obs}
@@ -599,7 +615,12 @@ class GeoIRT(InputConfig):
         stats = xr.load_dataset(stats_file, engine="h5netcdf")[{"features": self.time_steps}]
         return stats
 
-    def load_data(self, geo_data_file: Path, target_time: xr.DataArray) -> xr.Dataset:
+    def load_data(
+            self,
+            geo_data_file: Path,
+            target_time: xr.DataArray,
+            window: Optional[Dict[str, slice]] = None
+    ) -> xr.Dataset:
         """
         Load GEO IR data from NetCDF file.
 
@@ -608,14 +629,17 @@ class GeoIRT(InputConfig):
             target_time: An xarray.DataArray containing the target times, which will be used to
                 to interpolate the input observations to the nearest time step if 'self.nearest'
                 is 'True'.
+            window: An optional dictionary mapping the names of spatial dimensions to
+                slices defining a spatial window to load.
 
         Return:
             A dicitonary mapping the single key 'obs_geo' to an array containing the GEO IR
             observation from the desired time steps.
         """
-        with open_if_required(geo_data_file) as geo_data:
-            geo_data = geo_data.transpose("time", ...)
-            obs = geo_data.observations[{"time": self.time_steps}].data
+        indexers = dict(window or {})
+        indexers["time"] = self.time_steps
+        geo_data = load_subset(geo_data_file, ["observations"], indexers)
+        obs = geo_data.observations.transpose("time", ...).data
 
         obs = normalize(obs, self.stats, how=self.normalize, nan=self.nan)
         return {"obs_geo_ir": obs}
@@ -688,7 +712,12 @@ class GeoT(InputConfig):
         stats = stats[{"features": mask}]
         return stats
 
-    def load_data(self, geo_data_file: Path, target_time: xr.DataArray) -> xr.Dataset:
+    def load_data(
+            self,
+            geo_data_file: Path,
+            target_time: xr.DataArray,
+            window: Optional[Dict[str, slice]] = None
+    ) -> xr.Dataset:
         """
         Load GEO data from NetCDF file.
 
@@ -697,22 +726,23 @@ class GeoT(InputConfig):
             target_time: An xarray.DataArray containing the target times, which will be used to
                 to interpolate the input observations to the nearest time step if 'self.nearest'
                 is 'True'.
+            window: An optional dictionary mapping the names of spatial dimensions to
+                slices defining a spatial window to load.
 
         Return:
             A dicitonary mapping the single key 'obs_geo' to an array containing the GEO
             observation from the desired time steps. The returned array will have the
             time and channel dimensions along the leading axes of the array.
         """
-        with open_if_required(geo_data_file) as geo_data:
-            geo_data = geo_data.compute()
-            geo_data = geo_data.transpose("time", "channel", ...)[{"channel": self.channels}]
-            obs = geo_data.observations[{"time": self.time_steps}].data
-            obs = np.reshape(obs, (-1,) + obs.shape[2:])
+        indexers = dict(window or {})
+        indexers["time"] = self.time_steps
+        indexers["channel"] = self.channels
+        geo_data = load_subset(geo_data_file, ["observations"], indexers)
+        obs = geo_data.observations.transpose("time", "channel", ...).data
+        obs = np.reshape(obs, (-1,) + obs.shape[2:])
 
-            if self.normalize is not None:
-                obs = normalize(obs, self.stats, how=self.normalize, nan=self.nan)
-
-        del geo_data
+        if self.normalize is not None:
+            obs = normalize(obs, self.stats, how=self.normalize, nan=self.nan)
 
         return {"obs_geo": obs}
 
@@ -775,7 +805,12 @@ class Geo(InputConfig):
         stats = stats[{"features": mask}]
         return stats
 
-    def load_data(self, geo_data_file: Path, target_time: xr.DataArray) -> xr.Dataset:
+    def load_data(
+            self,
+            geo_data_file: Path,
+            target_time: xr.DataArray,
+            window: Optional[Dict[str, slice]] = None
+    ) -> xr.Dataset:
         """
         Load GEO data from NetCDF file.
 
@@ -784,16 +819,18 @@ class Geo(InputConfig):
             target_time: An xarray.DataArray containing the target times, which will be used to
                 to interpolate the input observations to the nearest time step if 'self.nearest'
                 is 'True'.
+            window: An optional dictionary mapping the names of spatial dimensions to
+                slices defining a spatial window to load.
 
         Return:
             A dicitonary mapping the single key 'obs_geo' to an array containing the GEO
             observation from the desired time steps. The returned array will have the
             time and channel dimensions along the leading axes of the array.
         """
-        with open_if_required(geo_data_file) as geo_data:
-            obs = geo_data.observations[{"channel": self.channels}].load()
-            obs = obs.transpose("channel", ...).data.copy()
-        del geo_data
+        indexers = dict(window or {})
+        indexers["channel"] = self.channels
+        geo_data = load_subset(geo_data_file, ["observations"], indexers)
+        obs = geo_data.observations.transpose("channel", ...).data.copy()
         obs = normalize(obs, self.stats, how=self.normalize, nan=self.nan)
         return {"obs_geo": obs.copy()}
 
@@ -858,7 +895,12 @@ class Seviri(InputConfig):
         stats = stats[{"features": mask}]
         return stats
 
-    def load_data(self, geo_data_file: Path, target_time: xr.DataArray) -> xr.Dataset:
+    def load_data(
+            self,
+            geo_data_file: Path,
+            target_time: xr.DataArray,
+            window: Optional[Dict[str, slice]] = None
+    ) -> xr.Dataset:
         """
         Load GEO data from NetCDF file.
 
@@ -867,16 +909,18 @@ class Seviri(InputConfig):
             target_time: An xarray.DataArray containing the target times, which will be used to
                 to interpolate the input observations to the nearest time step if 'self.nearest'
                 is 'True'.
+            window: An optional dictionary mapping the names of spatial dimensions to
+                slices defining a spatial window to load.
 
         Return:
             A dicitonary mapping the single key 'obs_geo' to an array containing the GEO
             observation from the desired time steps. The returned array will have the
             time and channel dimensions along the leading axes of the array.
         """
-        with open_if_required(geo_data_file) as geo_data:
-            obs = geo_data.observations[{"channel": self.channels}].load()
-            obs = obs.transpose("channel", ...).data.copy()
-        del geo_data
+        indexers = dict(window or {})
+        indexers["channel"] = self.channels
+        geo_data = load_subset(geo_data_file, ["observations"], indexers)
+        obs = geo_data.observations.transpose("channel", ...).data.copy()
         obs = normalize(obs, self.stats, how=self.normalize, nan=self.nan)
         return {"obs_geo": obs.copy()}
 
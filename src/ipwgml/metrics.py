@@ -12,6 +12,13 @@ metric's ``compute`` function. The metrics use shared memory to track required
 quantities so that evaluation can be performed in parallel using multiple
 processes.
 
+Alternatively, metrics can be used without shared memory and locks. The
+``from_state`` method of every metric creates a process-local copy of the metric
+that accumulates its statistics in private arrays. The accumulated statistics
+can be extracted using the ``state`` method and combined into another metric
+using the ``merge`` method. This allows workers to accumulate their results
+independently and reduce them once at the end of the evaluation.
+
 Usage
 -----
 
@@ -32,14 +39,24 @@ holds the metrics to track in its ``precip_quantification_metrics``,
 
 
 The metrics are used by the :class:`ipgml.evaluation.Evaluator` to
+
+The quantification metrics are updated by the evaluator through a
+:class:`MetricSuite`, which calculates the intermediate quantities required by
+the metrics, such as the valid mask and the differences between predicted and
+reference values, only once per scene. Similarly, all detection metrics are
+derived from a 2x2 confusion matrix, which is calculated only once per scene
+and shared by all detection metrics of a suite.
 """
+from contextlib import nullcontext
+from functools import cached_property
 from multiprocessing import shared_memory, Lock, Manager
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 import warnings
+import zlib
 
 import numpy as np
-from scipy.ndimage import binary_erosion
-from scipy.fftpack import dctn
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import dctn
 import xarray as xr
 
 
@@ -63,8 +80,27 @@ class Metric:
 
     """
 
-    def __init__(self, buffers: Dict[str, Tuple[Tuple[int], str]]):
+    def __init__(self, buffers: Dict[str, Tuple[Tuple[int], str]], shared: bool = True):
+        """
+        Args:
+            buffers: A dictionary mapping buffer names to tuples ``(shape, dtype)`` defining
+                the shape and dtype of the arrays used to accumulate the metric's statistics.
+            shared: If 'True', the buffers are allocated in shared memory and access to them
+                is synchronized using a multi-processing lock. If 'False', the buffers are
+                private to the current process and no locking is performed.
+        """
         super().__init__()
+        self._buffer_specs = {
+            name: (tuple(shape), dtype) for name, (shape, dtype) in buffers.items()
+        }
+        self.shared = shared
+        if not shared:
+            self.lock = nullcontext()
+            for name, (shape, dtype) in self._buffer_specs.items():
+                setattr(self, name, np.zeros(shape, dtype=dtype))
+            self.owner = True
+            return
+
         self.lock = get_manager().Lock()
         self._buffers = {}
         for name, (shape, dtype) in buffers.items():
@@ -88,6 +124,68 @@ class Metric:
             f"'{type(self).__name__}' object has no attribute '{name}'"
         )
 
+    def state(self) -> Dict[str, np.ndarray]:
+        """
+        Get the accumulated state of the metric.
+
+        Return:
+            A dictionary mapping the names of the metric's buffers to copies of
+            their current values.
+        """
+        with self.lock:
+            return {name: np.array(getattr(self, name)) for name in self._buffer_specs}
+
+    def merge(self, other: Union["Metric", Dict[str, np.ndarray]]) -> None:
+        """
+        Merge the accumulated state of another metric into this metric.
+
+        Args:
+            other: Another metric of the same type and configuration or a state
+                dictionary obtained from such a metric's ``state`` method.
+        """
+        if isinstance(other, Metric):
+            other = other.state()
+        missing = set(self._buffer_specs) - set(other)
+        if len(missing) > 0:
+            raise ValueError(
+                f"The state to merge into metric '{type(self).__name__}' lacks the "
+                f"buffers {sorted(missing)}."
+            )
+        with self.lock:
+            for name in self._buffer_specs:
+                array = getattr(self, name)
+                array += other[name]
+
+    def from_state(self, state: Optional[Dict[str, np.ndarray]] = None) -> "Metric":
+        """
+        Create a process-local copy of this metric.
+
+        The returned metric has the same type and configuration as this metric but
+        accumulates its statistics in private arrays without any locking.
+
+        Args:
+            state: An optional state dictionary, as returned by the ``state`` method,
+                that is used to initialize the buffers of the new metric. If 'None',
+                the buffers of the new metric are initialized to zero.
+
+        Return:
+            A new, non-shared metric object.
+        """
+        metric = object.__new__(type(self))
+        skip = {"_buffers", "lock", "shared", "owner"}
+        for name, value in self.__dict__.items():
+            if name not in skip and name not in self._buffer_specs:
+                metric.__dict__[name] = value
+        metric.lock = nullcontext()
+        metric.shared = False
+        metric.owner = True
+        for name, (shape, dtype) in self._buffer_specs.items():
+            array = np.zeros(shape, dtype=dtype)
+            if state is not None:
+                array[:] = state[name]
+            metric.__dict__[name] = array
+        return metric
+
     def reset(self) -> None:
         """
         Reset metric state.
@@ -96,7 +194,7 @@ class Metric:
         a valid initial state. If this is not the case, the child class should overwrite
         the function.
         """
-        for name in self._buffers:
+        for name in self._buffer_specs:
             array = getattr(self, name)
             array[:] = 0.0
 
@@ -130,6 +228,8 @@ class QuantificationMetric(Metric):
     """
     Helper class to identify metrics to assess precipitation quantification.
     """
+    statistics_class = None
+
 
 class ProbabilisticQuantificationMetric(Metric):
     """
@@ -137,23 +237,255 @@ class ProbabilisticQuantificationMetric(Metric):
     """
 
 
-class DetectionMetric(Metric):
+class ProbabilisticDetectionMetric(Metric):
     """
-    Helper class to identify metrics to assess precipitation detection.
+    Helper class to identify metrics to assess probabilistic precipitation detection.
     """
 
 
-class ProbabilisticDetectionMetric(Metric):
+class QuantificationStatistics:
     """
-    Helper class to identify metrics to assess probabilistic precipitation detection.
+    Per-scene intermediates shared by the quantification metrics.
+
+    The statistics are computed lazily and cached so that each quantity is calculated
+    at most once per scene irrespective of how many metrics require it. Invalid samples,
+    i.e., samples for which the target is not finite, are handled by zero-filling the
+    prediction and target values rather than by extracting the valid samples.
     """
 
+    def __init__(self, pred: np.ndarray, target: np.ndarray):
+        """
+        Args:
+            pred: A np.ndarray containing the predicted values.
+            target: A np.ndarray containing the reference values.
+        """
+        self.pred = pred
+        self.target = target
+
+    @cached_property
+    def valid(self) -> np.ndarray:
+        """
+        Mask identifying samples with finite target values.
+        """
+        return np.isfinite(self.target)
+
+    @cached_property
+    def n_valid(self) -> int:
+        """
+        The number of samples with finite target values.
+        """
+        return np.count_nonzero(self.valid)
+
+    @cached_property
+    def n_invalid_pred(self) -> int:
+        """
+        The number of samples with finite target values but non-finite predictions.
+        """
+        return np.count_nonzero(~np.isfinite(self.pred) * self.valid)
+
+    @cached_property
+    def pred_masked(self) -> np.ndarray:
+        """
+        Flattened predictions in double precision with invalid samples set to zero.
+        """
+        pred = np.zeros(self.pred.size, dtype=np.float64)
+        np.copyto(pred, self.pred.ravel(), where=self.valid.ravel())
+        return pred
+
+    @cached_property
+    def target_masked(self) -> np.ndarray:
+        """
+        Flattened targets in double precision with invalid samples set to zero.
+        """
+        target = np.zeros(self.target.size, dtype=np.float64)
+        np.copyto(target, self.target.ravel(), where=self.valid.ravel())
+        return target
+
+    @cached_property
+    def error_sums(self) -> Tuple[float, float]:
+        """
+        The sums of the absolute and squared differences between predictions and targets.
+
+        The differences are calculated in a temporary array, which is converted to
+        absolute differences in place and not retained.
+        """
+        diff = np.subtract(self.pred_masked, self.target_masked)
+        np.abs(diff, out=diff)
+        return diff.sum(), np.dot(diff, diff)
+
+    @cached_property
+    def pred_sum(self) -> float:
+        return self.pred_masked.sum()
+
+    @cached_property
+    def pred_sq_sum(self) -> float:
+        return np.dot(self.pred_masked, self.pred_masked)
+
+    @cached_property
+    def target_sum(self) -> float:
+        return self.target_masked.sum()
+
+    @cached_property
+    def target_sq_sum(self) -> float:
+        return np.dot(self.target_masked, self.target_masked)
+
+    @cached_property
+    def cross_sum(self) -> float:
+        return np.dot(self.pred_masked, self.target_masked)
+
+    @property
+    def abs_error_sum(self) -> float:
+        return self.error_sums[0]
+
+    @property
+    def sq_error_sum(self) -> float:
+        return self.error_sums[1]
+
+
+class MetricSuite:
+    """
+    Evaluates multiple metrics in a single pass over the data.
+
+    The suite computes the intermediate quantities required by its metrics, such
+    as the valid mask, the differences between prediction and target and the sums
+    of their squares and cross-products, or the confusion matrix of a detection
+    result, only once per scene and feeds them to all registered metrics. The
+    statistics required by a metric are defined by its ``statistics_class``
+    attribute. Metrics without this attribute are updated using their ``update``
+    method.
+    """
+
+    def __init__(self, metrics: List[Metric]):
+        """
+        Args:
+            metrics: The metrics to update.
+        """
+        self.metrics = list(metrics)
+
+    def update(self, pred: np.ndarray, target: np.ndarray) -> None:
+        """
+        Update all metrics in the suite.
+
+        Args:
+            pred: A np.ndarray containing the predicted values.
+            target: A np.ndarray containing the reference values.
+        """
+        stats = {}
+        for metric in self.metrics:
+            stats_class = getattr(metric, "statistics_class", None)
+            if stats_class is None:
+                metric.update(pred, target)
+                continue
+            if stats_class not in stats:
+                stats[stats_class] = stats_class(pred, target)
+            metric.update_from_statistics(stats[stats_class])
+
+
+class DetectionStatistics:
+    """
+    Per-scene confusion matrix shared by the detection metrics.
+
+    The confusion matrix is calculated using a single ``np.bincount`` over the codes
+    ``2 * pred + target``, so that its elements are the counts of true negatives, false
+    negatives, false positives, and true positives, in that order.
+    """
+
+    def __init__(self, pred: np.ndarray, target: np.ndarray):
+        """
+        Args:
+            pred: A np.ndarray containing the predictions.
+            target: A np.ndarray containing the reference data.
+        """
+        self.pred = pred
+        self.target = target
+
+    @cached_property
+    def confusion_matrix(self) -> np.ndarray:
+        """
+        Array containing the number of true negatives, false negatives, false positives,
+        and true positives.
+        """
+        target = self.target
+        if target.dtype != bool:
+            target = 0 < target
+        pred = self.pred
+        if pred.dtype != bool:
+            pred = pred.astype(bool)
+        codes = pred.astype(np.uint8).ravel()
+        codes <<= 1
+        codes |= target.ravel()
+        return np.bincount(codes, minlength=4).astype(np.int64)
+
+
+class DetectionMetric(Metric):
+    """
+    Base class for metrics to assess precipitation detection.
+
+    All detection metrics track the confusion matrix of the detection results, from
+    which the respective score is derived in the ``compute`` method.
+    """
+    statistics_class = DetectionStatistics
+
+    def __init__(self):
+        super().__init__(
+            buffers={
+                "confusion_matrix": ((4,), np.int64),
+            }
+        )
+
+    def update(self, pred: np.ndarray, target: np.ndarray):
+        """
+        Args:
+            pred: A np.ndarray containing the predictions.
+            target: A np.ndarray containing the reference data.
+        """
+        self.update_from_statistics(DetectionStatistics(pred, target))
+
+    def update_from_statistics(self, stats: DetectionStatistics) -> None:
+        """
+        Update metric values from a precomputed confusion matrix.
+
+        Args:
+            stats: The DetectionStatistics of the current scene.
+        """
+        with self.lock:
+            self.confusion_matrix += stats.confusion_matrix
+
+    @property
+    def n_tn(self) -> np.ndarray:
+        """
+        The number of true negatives.
+        """
+        return self.confusion_matrix[:1]
+
+    @property
+    def n_fn(self) -> np.ndarray:
+        """
+        The number of false negatives.
+        """
+        return self.confusion_matrix[1:2]
+
+    @property
+    def n_fp(self) -> np.ndarray:
+        """
+        The number of false positives.
+        """
+        return self.confusion_matrix[2:3]
+
+    @property
+    def n_tp(self) -> np.ndarray:
+        """
+        The number of true positives.
+        """
+        return self.confusion_matrix[3:]
+
 
 class ValidFraction(QuantificationMetric):
     """
     This metric tracks the number of predictions that are left out because the retrieved
     value is NAN.
     """
+    statistics_class = QuantificationStatistics
 
     def __init__(self):
         super().__init__(
@@ -171,12 +503,18 @@ class ValidFraction(QuantificationMetric):
              pred: An np.ndarray containing the predicted values.
              target: An np.ndarray containing the reference values.
         """
-        valid_pred = np.isfinite(pred)
-        valid_target = np.isfinite(target)
+        self.update_from_statistics(QuantificationStatistics(pred, target))
 
+    def update_from_statistics(self, stats: QuantificationStatistics) -> None:
+        """
+        Update metric values from precomputed scene statistics.
+
+        Args:
+            stats: The QuantificationStatistics of the current scene.
+        """
         with self.lock:
-            self.invalid += (~valid_pred * valid_target).astype(np.int64).sum()
-            self.counts += valid_target.astype(np.int64).sum()
+            self.invalid += stats.n_invalid_pred
+            self.counts += stats.n_valid
 
     def compute(self, name: Optional[str] = None) -> xr.Dataset:
         """
@@ -206,6 +544,7 @@ class Bias(QuantificationMetric):
     where the mean is calculated over all results passed to the 'compute' method for
     which the target values are finite.
     """
+    statistics_class = QuantificationStatistics
 
     def __init__(self, relative: bool = True):
         """
@@ -230,15 +569,19 @@ class Bias(QuantificationMetric):
              prediction: An np.ndarray containing the predicted values.
              target: An np.ndarray containing the reference values.
         """
-        pred = prediction
-        valid = np.isfinite(target)
-        pred = pred[valid]
-        target = target[valid]
+        self.update_from_statistics(QuantificationStatistics(prediction, target))
 
+    def update_from_statistics(self, stats: QuantificationStatistics) -> None:
+        """
+        Update metric values from precomputed scene statistics.
+
+        Args:
+            stats: The QuantificationStatistics of the current scene.
+        """
         with self.lock:
-            self.x_sum += pred.sum()
-            self.y_sum += target.sum()
-            self.counts += valid.sum()
+            self.x_sum += stats.pred_sum
+            self.y_sum += stats.target_sum
+            self.counts += stats.n_valid
 
     def compute(self, name: Optional[str] = None) -> xr.Dataset:
         """
@@ -271,6 +614,7 @@ class MAE(QuantificationMetric):
     where the mean is calculated over all results passed to the 'compute' method for
     which the target values are finite.
     """
+    statistics_class = QuantificationStatistics
 
     def __init__(self):
         super().__init__(
@@ -288,14 +632,18 @@ class MAE(QuantificationMetric):
              prediction: A np.ndarray containing the prediction.
              target: An np.ndarray containing the reference values.
         """
-        pred = prediction
-        valid = np.isfinite(target)
-        pred = pred[valid]
-        target = target[valid]
+        self.update_from_statistics(QuantificationStatistics(prediction, target))
 
+    def update_from_statistics(self, stats: QuantificationStatistics) -> None:
+        """
+        Update metric values from precomputed scene statistics.
+
+        Args:
+            stats: The QuantificationStatistics of the current scene.
+        """
         with self.lock:
-            self.tot_abs_error += np.abs(pred - target).sum()
-            self.counts += valid.sum()
+            self.tot_abs_error += stats.abs_error_sum
+            self.counts += stats.n_valid
 
     def compute(self) -> xr.Dataset:
         """
@@ -324,6 +672,7 @@ class SMAPE(QuantificationMetric):
     which the target values are finite and for which the absolute value of the
     exceeds the given threshold value.
     """
+    statistics_class = QuantificationStatistics
 
     def __init__(self, threshold: float = 0.1):
         """
@@ -348,17 +697,29 @@ class SMAPE(QuantificationMetric):
              prediction: A np.ndarray containing the prediction.
              target: A np.ndarray containing the reference values.
         """
-        pred = prediction
-        valid = np.isfinite(target) * np.abs(target) > self.threshold
-        pred = pred[valid]
-        target = target[valid]
+        self.update_from_statistics(QuantificationStatistics(prediction, target))
+
+    def update_from_statistics(self, stats: QuantificationStatistics) -> None:
+        """
+        Update metric values from precomputed scene statistics.
+
+        Args:
+            stats: The QuantificationStatistics of the current scene.
+        """
+        target = stats.target_masked
+        pred = stats.pred_masked
+        # Invalid samples have a target value of zero and are thus excluded here.
+        valid = np.abs(target) > self.threshold
+        denom = 0.5 * (np.abs(pred) + np.abs(target))
+        abs_diff = np.subtract(pred, target)
+        np.abs(abs_diff, out=abs_diff)
+        with np.errstate(invalid='ignore'):
+            np.divide(abs_diff, denom, out=abs_diff, where=valid)
+            rel_error = abs_diff.sum(where=valid)
 
         with self.lock:
-            with np.errstate(invalid='ignore'):
-                self.tot_rel_error += (
-                    np.abs(pred - target) / (0.5 * (np.abs(pred) + np.abs(target)))
-                ).sum()
-                self.counts += valid.sum()
+            self.tot_rel_error += rel_error
+            self.counts += np.count_nonzero(valid)
 
     def compute(self) -> xr.Dataset:
         """
@@ -388,6 +749,7 @@ class MSE(QuantificationMetric):
     where mean is calculated over all results passed to the 'compute' method for
     which the target values are finite.
     """
+    statistics_class = QuantificationStatistics
 
     def __init__(self):
         super().__init__(
@@ -405,14 +767,18 @@ class MSE(QuantificationMetric):
              prediction: An np.ndarray containing the predicted values.
              target: An np.ndarray containing the reference values.
         """
-        pred = prediction
-        valid = np.isfinite(target)
-        pred = pred[valid]
-        target = target[valid]
+        self.update_from_statistics(QuantificationStatistics(prediction, target))
 
+    def update_from_statistics(self, stats: QuantificationStatistics) -> None:
+        """
+        Update metric values from precomputed scene statistics.
+
+        Args:
+            stats: The QuantificationStatistics of the current scene.
+        """
         with self.lock:
-            self.tot_sq_error += ((pred - target) ** 2).sum()
-            self.counts += valid.sum()
+            self.tot_sq_error += stats.sq_error_sum
+            self.counts += stats.n_valid
 
     def compute(self) -> xr.Dataset:
         """
@@ -447,6 +813,7 @@ class CorrelationCoef(QuantificationMetric):
     the mean and standard deviations of the distributions of :math:`y_\text{pred}` and
     :math:`y_\\text{target}`.
     """
+    statistics_class = QuantificationStatistics
 
     def __init__(self):
         super().__init__(
@@ -468,19 +835,22 @@ class CorrelationCoef(QuantificationMetric):
              prediction: An np.ndarray containing the predicted values.
              target: An np.ndarray containing the reference values.
         """
-        pred = prediction
-        valid = np.isfinite(target)
+        self.update_from_statistics(QuantificationStatistics(prediction, target))
 
-        pred = pred[valid]
-        target = target[valid]
+    def update_from_statistics(self, stats: QuantificationStatistics) -> None:
+        """
+        Update metric values from precomputed scene statistics.
 
+        Args:
+            stats: The QuantificationStatistics of the current scene.
+        """
         with self.lock:
-            self.x_sum += pred.sum()
-            self.x2_sum += (pred**2).sum()
-            self.y_sum += target.sum()
-            self.y2_sum += (target**2).sum()
-            self.xy_sum += (pred * target).sum()
-            self.counts += valid.sum()
+            self.x_sum += stats.pred_sum
+            self.x2_sum += stats.pred_sq_sum
+            self.y_sum += stats.target_sum
+            self.y2_sum += stats.target_sq_sum
+            self.xy_sum += stats.cross_sum
+            self.counts += stats.n_valid
 
     def compute(self) -> xr.Dataset:
         """
@@ -506,50 +876,59 @@ class CorrelationCoef(QuantificationMetric):
         return corr
 
 
-def iterate_windows(valid, window_size):
+def get_windows(
+    valid: np.ndarray,
+    window_size: int,
+    rng: Optional[np.random.Generator] = None
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Iterate over non-overlapping windows in which all pixels are valid.
+    Find non-overlapping windows in which all pixels are valid.
+
+    Windows that are fully valid are identified using a summed-area table of the
+    valid mask. The windows are placed on a regular grid with a spacing equal to
+    the window size and the offset of the grid is chosen so that the number of
+    fully valid windows is maximized. Ties between offsets are broken using the
+    given random number generator or by choosing the first offset if no generator
+    is given.
 
     Args:
         valid: A 2D numpy array identifying valid pixels.
         window_size: The size of the windows.
+        rng: An optional random number generator to use to break ties between
+            grid offsets.
 
     Return:
-        An iterator providing coordinates of randomly chosen windows that
-        that cover the valid pixels in the given field.
+        A tuple ``(row_starts, col_starts)`` containing the row and column indices
+        of the upper-left corners of the windows.
     """
-    conn = np.ones((window_size, window_size))
-    valid = binary_erosion(valid, conn)
-
-    row_inds, col_inds = np.where(valid)
-
-    while len(row_inds) > 0:
-
-        ind = np.random.choice(len(row_inds))
-        row_c = row_inds[ind]
-        col_c = col_inds[ind]
-
-        row_start = row_c - window_size // 2
-        row_end = row_start + window_size
-
-        col_start = col_c - window_size // 2
-        col_end = col_start + window_size
-
-        yield row_start, col_start, row_end, col_end
-
-        row_lim_lower = row_start - window_size // 2
-        row_lim_upper = row_end + window_size // 2
-        col_lim_lower = col_start - window_size // 2
-        col_lim_upper = col_end + window_size // 2
-
-        invalid = (
-            (row_inds > row_lim_lower)
-            * (row_inds <= row_lim_upper)
-            * (col_inds > col_lim_lower)
-            * (col_inds <= col_lim_upper)
-        )
-        row_inds = row_inds[~invalid]
-        col_inds = col_inds[~invalid]
+    n_rows, n_cols = valid.shape
+    if n_rows < window_size or n_cols < window_size:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    sat = np.zeros((n_rows + 1, n_cols + 1), dtype=np.int64)
+    np.cumsum(valid, axis=0, dtype=np.int64, out=sat[1:, 1:])
+    np.cumsum(sat[1:, 1:], axis=1, out=sat[1:, 1:])
+    w = window_size
+    n_valid = sat[w:, w:] - sat[:-w, w:] - sat[w:, :-w] + sat[:-w, :-w]
+    candidates = n_valid == w * w
+
+    # Number of fully valid windows for all grid offsets.
+    c_rows, c_cols = candidates.shape
+    padded = np.pad(candidates, ((0, -c_rows % w), (0, -c_cols % w)))
+    blocks = padded.reshape(padded.shape[0] // w, w, padded.shape[1] // w, w)
+    n_windows = blocks.sum(axis=(0, 2))
+
+    if n_windows.max() == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    offsets = np.flatnonzero(n_windows == n_windows.max())
+    if rng is None:
+        offset = offsets[0]
+    else:
+        offset = rng.choice(offsets)
+    row_offset, col_offset = divmod(offset, w)
+
+    row_inds, col_inds = np.nonzero(candidates[row_offset::w, col_offset::w])
+    return row_inds * w + row_offset, col_inds * w + col_offset
 
 
 class SpectralCoherence(QuantificationMetric):
@@ -565,8 +944,15 @@ class SpectralCoherence(QuantificationMetric):
     17, 515–538, https://doi.org/10.5194/amt-17-515-2024, 2024.
 
     """
+    statistics_class = QuantificationStatistics
 
-    def __init__(self, window_size=32, scale=0.036):
+    def __init__(
+        self,
+        window_size: int = 32,
+        scale: float = 0.036,
+        seed: int = 42,
+        workers: Optional[int] = None
+    ):
         """
         Args:
             window_size: The size of the window over which the spectral
@@ -574,9 +960,16 @@ class SpectralCoherence(QuantificationMetric):
             scale: Spatial extent of a single pixel. Defaults to 0.036 degree
                 which is the resolution used for the gridded data of the
                 SatRain dataset.
+            seed: Seed used to place the windows. The placement of the windows
+                in a scene only depends on the seed and the valid pixels of
+                the scene so that results are reproducible independent of the
+                order in which scenes are processed.
+            workers: The number of workers to use to calculate the DCT.
         """
         self.window_size = window_size
         self.scale = scale
+        self.seed = seed
+        self.workers = workers
         super().__init__(
             buffers={
                 "coeffs_target_sum": ((window_size,) * 2, np.float64),
@@ -600,24 +993,51 @@ class SpectralCoherence(QuantificationMetric):
             pred: A np.ndarray containing the predicted precipitation field.
             target: A np.ndarray containing the reference data.
         """
-        pred = pred
+        self.update_from_statistics(QuantificationStatistics(pred, target))
 
-        valid = np.isfinite(target)
-        for rect in iterate_windows(valid, self.window_size):
-            row_start, col_start, row_end, col_end = rect
-            pred_w = pred[row_start:row_end, col_start:col_end]
-            target_w = target[row_start:row_end, col_start:col_end]
-            w_pred = dctn(pred_w, norm="ortho")
-            w_target = dctn(target_w, norm="ortho")
-            with self.lock:
-                self.coeffs_target_sum += w_target
-                self.coeffs_target_sum2 += w_target * w_target
-                self.coeffs_pred_sum += w_pred
-                self.coeffs_pred_sum2 += w_pred * w_pred
-                self.coeffs_targetpred_sum += w_target * w_pred
-                self.coeffs_diff_sum += w_pred - w_target
-                self.coeffs_diff_sum2 += (w_pred - w_target) * (w_pred - w_target)
-                self.counts += np.isfinite(w_pred)
+    def update_from_statistics(self, stats: QuantificationStatistics) -> None:
+        """
+        Update metric values from precomputed scene statistics.
+
+        Args:
+            stats: The QuantificationStatistics of the current scene.
+        """
+        valid = stats.valid
+        scene_key = zlib.crc32(np.packbits(valid).tobytes())
+        rng = np.random.default_rng([self.seed, scene_key])
+        row_starts, col_starts = get_windows(valid, self.window_size, rng=rng)
+        if len(row_starts) == 0:
+            return
+
+        window_shape = (self.window_size,) * 2
+        pred_w = sliding_window_view(stats.pred, window_shape)[row_starts, col_starts]
+        target_w = sliding_window_view(stats.target, window_shape)[row_starts, col_starts]
+        w_pred = dctn(
+            pred_w.astype(np.float64), axes=(-2, -1), norm="ortho", workers=self.workers
+        )
+        w_target = dctn(
+            target_w.astype(np.float64), axes=(-2, -1), norm="ortho", workers=self.workers
+        )
+        w_diff = w_pred - w_target
+
+        coeffs_target_sum = w_target.sum(0)
+        coeffs_target_sum2 = (w_target * w_target).sum(0)
+        coeffs_pred_sum = w_pred.sum(0)
+        coeffs_pred_sum2 = (w_pred * w_pred).sum(0)
+        coeffs_targetpred_sum = (w_target * w_pred).sum(0)
+        coeffs_diff_sum = w_diff.sum(0)
+        coeffs_diff_sum2 = (w_diff * w_diff).sum(0)
+        counts = np.isfinite(w_pred).sum(0)
+
+        with self.lock:
+            self.coeffs_target_sum += coeffs_target_sum
+            self.coeffs_target_sum2 += coeffs_target_sum2
+            self.coeffs_pred_sum += coeffs_pred_sum
+            self.coeffs_pred_sum2 += coeffs_pred_sum2
+            self.coeffs_targetpred_sum += coeffs_targetpred_sum
+            self.coeffs_diff_sum += coeffs_diff_sum
+            self.coeffs_diff_sum2 += coeffs_diff_sum2
+            self.counts += counts
 
     def compute(self):
         """
@@ -718,6 +1138,7 @@ class Histogram(QuantificationMetric):
     """
     Calculates a 2D histogram or retrieved and reference precipitation.
     """
+    statistics_class = QuantificationStatistics
 
     def __init__(
             self,
@@ -739,13 +1160,24 @@ class Histogram(QuantificationMetric):
              prediction: An np.ndarray containing the predicted values.
              target: An np.ndarray containing the reference values.
         """
-        pred = prediction
-        valid = np.isfinite(target)
-        pred = pred[valid]
-        target = target[valid]
+        self.update_from_statistics(QuantificationStatistics(prediction, target))
+
+    def update_from_statistics(self, stats: QuantificationStatistics) -> None:
+        """
+        Update metric values from precomputed scene statistics.
 
+        Args:
+            stats: The QuantificationStatistics of the current scene.
+        """
+        # Invalid samples are zero-filled and excluded through their weights.
+        counts = np.histogram2d(
+            stats.target_masked,
+            stats.pred_masked,
+            bins=(self.bins, self.bins),
+            weights=stats.valid.ravel()
+        )[0]
         with self.lock:
-            self.counts += np.histogram2d(target, pred, bins=(self.bins, self.bins))[0]
+            self.counts += counts
 
     def compute(self) -> xr.Dataset:
         """
@@ -775,30 +1207,6 @@ class FAR(DetectionMetric):
 
     """
 
-    def __init__(self):
-        super().__init__(
-            buffers={
-                "n_positive": ((1,), np.int64),
-                "n_false_positive": ((1,), np.int64),
-            }
-        )
-
-    def update(self, pred: np.ndarray, target: np.ndarray):
-        """
-        Args:
-            pred: A np.ndarray containing the predictions.
-            target: A np.ndarray containing the reference data.
-        """
-        if target.dtype != bool:
-            target = 0 < target
-
-        true = target
-        positive = pred
-
-        with self.lock:
-            self.n_false_positive += (positive * ~true).astype(np.int64).sum()
-            self.n_positive += positive.astype(np.int64).sum()
-
     def compute(self, name: Optional[str] = None):
         """
         Return:
@@ -806,7 +1214,7 @@ class FAR(DetectionMetric):
             evaluated retrieval.
         """
         with np.errstate(invalid="ignore"):
-            far = self.n_false_positive / self.n_positive
+            far = self.n_fp / (self.n_tp + self.n_fp)
         results = xr.Dataset(
             {
                 "far": far[0],
@@ -828,29 +1236,6 @@ class POD(DetectionMetric):
         \\text{POD} = \\frac{\\#\\text{true positive}}{\\#\\text{True positive} + \\#\\text{False negative}}
     """
 
-    def __init__(self):
-        super().__init__(
-            buffers={
-                "n_true": ((1,), np.int64),
-                "n_true_positive": ((1,), np.int64),
-            }
-        )
-
-    def update(self, pred: np.ndarray, target: np.ndarray):
-        """
-        Args:
-            pred: A np.ndarray containing the predictions.
-            target: A np.ndarray containing the reference data.
-        """
-        if target.dtype != bool:
-            target = 0 < target
-
-        true = target
-        positive = pred
-        with self.lock:
-            self.n_true_positive += (positive * true).astype(np.int64).sum()
-            self.n_true += true.astype(np.int64).sum()
-
     def compute(self, name: Optional[str] = None):
         """
         Return:
@@ -858,7 +1243,7 @@ class POD(DetectionMetric):
             the evaluated retrieval.
         """
         with np.errstate(invalid="ignore"):
-            pod = self.n_true_positive / self.n_true
+            pod = self.n_tp / (self.n_tp + self.n_fn)
         results = xr.Dataset(
             {
                 "pod": pod[0],
@@ -875,37 +1260,10 @@ class HSS(DetectionMetric):
     is using the formula given `here <https://resources.eumetrain.org/data/4/451/english/msg/ver_categ_forec/uos2/uos2_ko3.htm>`_.
     """
 
-    def __init__(self):
-        super().__init__(
-            buffers={
-                "n_tp": ((1,), np.int64),
-                "n_fp": ((1,), np.int64),
-                "n_tn": ((1,), np.int64),
-                "n_fn": ((1,), np.int64),
-            }
-        )
-
-    def update(self, pred: np.ndarray, target: np.ndarray):
-        """
-        Args:
-            pred: A np.ndarray containing the predictions.
-            target: A np.ndarray containing the reference data.
-        """
-        if target.dtype != bool:
-            target = 0 < target
-
-        true = target
-        positive = pred
-        with self.lock:
-            self.n_tp += (positive * true).astype(np.int64).sum()
-            self.n_fp += (positive * ~true).astype(np.int64).sum()
-            self.n_tn += (~positive * ~true).astype(np.int64).sum()
-            self.n_fn += (positive * ~true).astype(np.int64).sum()
-
     def compute(self, name: Optional[str] = None):
         """
         Return:
-            An 'xarray.Dataset' containing the probability of detection for
+            An 'xarray.Dataset' containing the Heidke-Skill Score for
             the evaluated retrieval.
         """
         n_pos = self.n_tp + self.n_fp
@@ -928,6 +1286,125 @@ class HSS(DetectionMetric):
         return results
 
 
+class ETS(DetectionMetric):
+    """
+    Metric to calculate the equitable threat score (ETS), also known as Gilbert Skill
+    Score, for precipitation detection. The ETS corrects the critical success index
+    for the number of hits expected from a random prediction.
+
+    .. math::
+
+        \\text{ETS} = \\frac{\\#\\text{True positive} - H_r}{\\#\\text{True positive} + \\#\\text{False negative} + \\#\\text{False positive} - H_r}
+
+    with :math:`H_r = (\\#\\text{True positive} + \\#\\text{False negative})(\\#\\text{True positive} + \\#\\text{False positive}) / N`.
+    """
+
+    def compute(self, name: Optional[str] = None):
+        """
+        Return:
+            An 'xarray.Dataset' containing the equitable threat score for
+            the evaluated retrieval.
+        """
+        n_tot = self.confusion_matrix.sum()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            hits_random = (self.n_tp + self.n_fn) * (self.n_tp + self.n_fp) / n_tot
+            ets = (self.n_tp - hits_random) / (
+                self.n_tp + self.n_fn + self.n_fp - hits_random
+            )
+        results = xr.Dataset(
+            {
+                "ets": ets[0],
+            }
+        )
+        results.ets.attrs["full_name"] = "ETS"
+        results.ets.attrs["unit"] = ""
+        return results
+
+
+class CSI(DetectionMetric):
+    """
+    Metric to calculate the critical success index (CSI), also known as threat score,
+    for precipitation detection.
+
+    .. math::
+
+        \\text{CSI} = \\frac{\\#\\text{True positive}}{\\#\\text{True positive} + \\#\\text{False negative} + \\#\\text{False positive}}
+    """
+
+    def compute(self, name: Optional[str] = None):
+        """
+        Return:
+            An 'xarray.Dataset' containing the critical success index for
+            the evaluated retrieval.
+        """
+        with np.errstate(invalid="ignore"):
+            csi = self.n_tp / (self.n_tp + self.n_fn + self.n_fp)
+        results = xr.Dataset(
+            {
+                "csi": csi[0],
+            }
+        )
+        results.csi.attrs["full_name"] = "CSI"
+        results.csi.attrs["unit"] = ""
+        return results
+
+
+class FrequencyBias(DetectionMetric):
+    """
+    Metric to calculate the frequency bias, or bias score, of precipitation detection,
+    i.e., the ratio of the number of predicted events and the number of observed events.
+
+    .. math::
+
+        \\text{Frequency bias} = \\frac{\\#\\text{True positive} + \\#\\text{False positive}}{\\#\\text{True positive} + \\#\\text{False negative}}
+    """
+
+    def compute(self, name: Optional[str] = None):
+        """
+        Return:
+            An 'xarray.Dataset' containing the frequency bias for
+            the evaluated retrieval.
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frequency_bias = (self.n_tp + self.n_fp) / (self.n_tp + self.n_fn)
+        results = xr.Dataset(
+            {
+                "frequency_bias": frequency_bias[0],
+            }
+        )
+        results.frequency_bias.attrs["full_name"] = "Frequency bias"
+        results.frequency_bias.attrs["unit"] = ""
+        return results
+
+
+class Accuracy(DetectionMetric):
+    """
+    Metric to calculate the accuracy of precipitation detection, i.e., the fraction
+    of correctly classified samples.
+
+    .. math::
+
+        \\text{Accuracy} = \\frac{\\#\\text{True positive} + \\#\\text{True negative}}{N}
+    """
+
+    def compute(self, name: Optional[str] = None):
+        """
+        Return:
+            An 'xarray.Dataset' containing the accuracy for
+            the evaluated retrieval.
+        """
+        with np.errstate(invalid="ignore"):
+            accuracy = (self.n_tp + self.n_tn) / self.confusion_matrix.sum()
+        results = xr.Dataset(
+            {
+                "accuracy": accuracy[0],
+            }
+        )
+        results.accuracy.attrs["full_name"] = "Accuracy"
+        results.accuracy.attrs["unit"] = ""
+        return results
+
+
 class PRCurve(ProbabilisticDetectionMetric):
     """
     Calculates the precision recall curve for probabilistic detection results. The precision recall
@@ -949,6 +1426,11 @@ class PRCurve(ProbabilisticDetectionMetric):
     threshold probability above which an even is classified as positive. The values yield a curve
     representing the trade off between recall and precision as the detection threshold is increased.
 
+    Internally, the metric tracks histograms of the predicted probabilities for positive and negative
+    samples with bins defined by the detection thresholds. The true and false positives for each
+    threshold are recovered from the reversed cumulative sums of these histograms when the metric is
+    computed. Memory and computational requirements are therefore independent of the number of
+    thresholds per sample so that fine threshold grids with 10,000 or more bins can be used.
     """
 
     def __init__(
@@ -963,9 +1445,7 @@ class PRCurve(ProbabilisticDetectionMetric):
             self.thresholds = np.linspace(*range, n_bins)
         super().__init__(
             buffers={
-                "n_tp": ((n_bins,), np.int64),
-                "n_fp": ((n_bins,), np.int64),
-                "n_t": ((1,), np.int64),
+                "counts": ((n_bins + 1, 2), np.int64),
             }
         )
 
@@ -978,17 +1458,41 @@ class PRCurve(ProbabilisticDetectionMetric):
         if target.dtype != bool:
             target = 0 < target
 
-        pred = pred.reshape(-1, 1)
-        target = target.reshape(-1, 1)
-        pred = pred >= self.thresholds[None]
+        pred = pred.ravel()
+        target = target.ravel()
 
-        true_positive = pred * target
-        false_positive = pred * ~target
+        # Number of thresholds that each prediction exceeds or equals.
+        bins = np.searchsorted(self.thresholds, pred, side="right")
+        nans = np.isnan(pred)
+        if nans.any():
+            bins[nans] = 0
+        bins *= 2
+        bins += target
+        counts = np.bincount(bins, minlength=self.counts.size).reshape(-1, 2)
 
         with self.lock:
-            self.n_tp += true_positive.astype(np.int64).sum(axis=0)
-            self.n_fp += false_positive.astype(np.int64).sum(axis=0)
-            self.n_t += target.astype(np.int64).sum()
+            self.counts += counts
+
+    @property
+    def n_tp(self) -> np.ndarray:
+        """
+        The number of true positives for each threshold.
+        """
+        return np.cumsum(self.counts[::-1, 1])[::-1][1:]
+
+    @property
+    def n_fp(self) -> np.ndarray:
+        """
+        The number of false positives for each threshold.
+        """
+        return np.cumsum(self.counts[::-1, 0])[::-1][1:]
+
+    @property
+    def n_t(self) -> np.ndarray:
+        """
+        The total number of positive samples.
+        """
+        return self.counts[:, 1].sum(keepdims=True)
 
     def compute(self, name: Optional[str] = None):
         """
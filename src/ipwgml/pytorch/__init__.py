@@ -6,14 +6,15 @@ Provides functionality for using the SPR dataset with PyTorch.
 """
 from typing import Any, Dict, List
 
+import numpy as np
 import torch
 from torch import nn
-import xarray as xr
 
+from ipwgml.evaluation import ArrayRetrieval
 from ipwgml.input import InputConfig, calculate_input_features
 
 
-class PytorchRetrieval:
+class PytorchRetrieval(ArrayRetrieval):
     """
     This class provides a generic retrieval callback function for PyTorch-based
     retrievals.
@@ -26,6 +27,10 @@ class PytorchRetrieval:
     The PytorchRetrieval class expects the module to return a dict containing
     the keys 'surface_precip', 'probability_of_precip', and
     'probability_of_heavy_precip'.
+
+    The PytorchRetrieval is an :class:`ipwgml.evaluation.ArrayRetrieval` so that
+    the evaluator passes the input data to it as numpy arrays and bypasses the
+    conversion to and from xarray.Datasets.
     """
     def __init__(
             self,
@@ -54,6 +59,7 @@ class PytorchRetrieval:
                 inference.
             dtype: The dtype to which to convert the retrieval input.
         """
+        super().__init__()
         self.model = model.to(device=device).eval()
         self.features = calculate_input_features(retrieval_input, stack=False)
         self.precip_threshold = precip_threshold
@@ -63,32 +69,22 @@ class PytorchRetrieval:
         self.device = device
         self.dtype = dtype
 
-    def __call__(self, input_data: xr.Dataset) -> xr.Dataset:
-        """
-        Run retrieval on input data.
+    def retrieve_arrays(self, inputs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
         """
-        feature_dim = 0
-        if "scan" in input_data.dims:
-            spatial_dims = ("scan", "pixel")
-        elif "latitude" in input_data.dims:
-            spatial_dims = ("latitude", "longitude")
-        else:
-            spatial_dims = ()
-
-        if "batch" in input_data.dims:
-            dims = ("batch",) + spatial_dims
-            feature_dim += 1
-        else:
-            dims = spatial_dims
+        Run retrieval on a batch of input arrays.
 
+        Args:
+            inputs: A dictionary mapping the names of the retrieval inputs to arrays
+                of shape ``(B, C, H, W)`` or ``(B, C)``.
 
-        features = self.features
+        Return:
+            A dictionary mapping the names of the retrieved variables to arrays of
+            shape ``(B, H, W)`` or ``(B,)``.
+        """
+        feature_dim = 1
         inpt = {}
-        for name in features:
-            inpt_data = torch.tensor(input_data[name].data).to(self.device, self.dtype)
-            if len(dims) == 1:
-                inpt_data = inpt_data.transpose(0, 1)
-            inpt[name] = inpt_data
+        for name in self.features:
+            inpt[name] = torch.as_tensor(inputs[name]).to(self.device, self.dtype)
 
         if self.stack:
             inpt = torch.cat(list(inpt.values()), dim=feature_dim)
@@ -98,25 +94,24 @@ class PytorchRetrieval:
             if isinstance(pred, torch.Tensor):
                 pred = {"surface_precip": pred.expected_value()}
 
-            results = xr.Dataset()
+            results = {}
             if "surface_precip" in pred:
                 results["surface_precip"] = (
-                    dims,
                     pred["surface_precip"].select(feature_dim, 0).float().cpu().numpy()
                 )
             if "probability_of_precip" in pred:
                 pop = pred["probability_of_precip"].select(feature_dim, 0)
                 if self.logits:
-                    pop = torch.sigmoid(pop).cpu().numpy()
-                results["probability_of_precip"] = (dims, pop)
-                precip_flag = self.precip_threshold <= pop
-                results["precip_flag"] = (dims, precip_flag)
+                    pop = torch.sigmoid(pop)
+                pop = pop.float().cpu().numpy()
+                results["probability_of_precip"] = pop
+                results["precip_flag"] = self.precip_threshold <= pop
             if "probability_of_heavy_precip" in pred:
                 pohp = pred["probability_of_heavy_precip"].select(feature_dim, 0)
                 if self.logits:
-                    pohp = torch.sigmoid(pohp).cpu().numpy()
-                results["probability_of_heavy_precip"] = (dims, pohp)
-                heavy_precip_flag = self.heavy_precip_threshold <= pohp
-                results["heavy_precip_flag"] = (dims, heavy_precip_flag)
+                    pohp = torch.sigmoid(pohp)
+                pohp = pohp.float().cpu().numpy()
+                results["probability_of_heavy_precip"] = pohp
+                results["heavy_precip_flag"] = self.heavy_precip_threshold <= pohp
 
         return results
@@ -4,12 +4,16 @@ ipwg.pytorch.data
 
 This module provides PyTorch dataset classes for loading the SatRain data.
 The :class:`SatRainTabular` will load data in tabular format while the
-:class:`SatRainSpatial` will load data in spatial format.
+:class:`SatRainSpatial` will load data in spatial format. The
+:class:`SatRainTabularStream` streams tabular data that doesn't fit into memory.
 
 """
+from contextlib import nullcontext
 from datetime import datetime
 from functools import cache, cached_property, partial
 import gc
+import hashlib
+import json
 import logging
 from math import ceil
 import multiprocessing
@@ -21,21 +25,108 @@ import sys
 
 import numpy as np
 import torch
-from torch.utils.data import Dataset
+from torch.utils.data import Dataset, IterableDataset, get_worker_info
+import h5py
 import hdf5plugin
 import xarray as xr
 
-from ipwgml.data import download_missing, get_local_files
+from ipwgml.data import (
+    download_missing,
+    get_local_files,
+    get_sample_masks,
+    load_tabular_samples
+)
 from ipwgml.definitions import ALL_INPUTS
 from ipwgml import config
 from ipwgml.input import InputConfig, parse_retrieval_inputs
-from ipwgml.target import TargetConfig
-from ipwgml.utils import get_median_time, extract_samples
+from ipwgml.sampling import CropIndex
+from ipwgml.target import TargetBundle, TargetConfig
+from ipwgml.tiling import DatasetTiler
+from ipwgml.utils import (
+    FileHandleCache,
+    SceneCache,
+    get_median_time,
+    extract_samples,
+    load_dataset,
+    load_subset,
+    open_dataset,
+    write_atomically,
+)
 
 
 LOGGER = logging.getLogger(__name__)
 
 
+def _get_worker_shard() -> Tuple[int, int]:
+    """
+    Determine the shard of the data to load in the current data loader worker.
+
+    Return:
+        A tuple ``(shard, n_shards)`` containing the index of the shard to load
+        and the total number of shards across all data loader workers and
+        distributed ranks.
+    """
+    worker_info = get_worker_info()
+    if worker_info is None:
+        worker_id, n_workers = 0, 1
+    else:
+        worker_id, n_workers = worker_info.id, worker_info.num_workers
+
+    rank, world_size = 0, 1
+    if torch.distributed.is_available() and torch.distributed.is_initialized():
+        rank = torch.distributed.get_rank()
+        world_size = torch.distributed.get_world_size()
+
+    return rank * n_workers + worker_id, world_size * n_workers
+
+
+def _get_tabular_features(
+        target_config: TargetConfig,
+        retrieval_input: List[InputConfig],
+        target_data: xr.Dataset,
+        input_data: Dict[str, xr.Dataset],
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, slice]]:
+    """
+    Normalize and stack tabular retrieval input and target data.
+
+    Args:
+        target_config: The TargetConfig defining the reference data to load.
+        retrieval_input: The retrieval inputs to load.
+        target_data: An xarray.Dataset containing the target data of the samples.
+        input_data: A dictionary mapping retrieval input names to xarray.Datasets
+            containing the corresponding input data of the samples.
+
+    Return:
+        A tuple ``(features, targets, feature_slices)`` containing the
+        (n_samples, n_features) float32 feature matrix, a (3, n_samples) float32 array
+        containing the surface precip, precip mask, and heavy precip mask targets,
+        and a dictionary mapping the names of the input features to the
+        corresponding columns of the feature matrix.
+    """
+    target_bundle = target_config.load_bundle(target_data)
+    targets = np.stack([
+        target_bundle.surface_precip.astype(np.float32),
+        target_bundle.precip_mask,
+        target_bundle.heavy_precip_mask
+    ])
+
+    features = []
+    feature_slices = {}
+    n_features = 0
+    for inpt in retrieval_input:
+        data = input_data.get(inpt.name)
+        if data is None:
+            continue
+        data = inpt.load_data(data, target_time=target_data.time)
+        for key, arr in data.items():
+            arr = arr.reshape(-1, arr.shape[-1]).transpose()
+            features.append(arr.astype(np.float32))
+            feature_slices[key] = slice(n_features, n_features + arr.shape[-1])
+            n_features += arr.shape[-1]
+    features = np.ascontiguousarray(np.concatenate(features, axis=-1))
+    return features, targets, feature_slices
+
+
 class SatRainTabular(Dataset):
     """
     Dataset class for SatRain data in tabular format.
@@ -43,6 +134,15 @@ class SatRainTabular(Dataset):
     For efficiency, the SatRainTabular data loads all of the training data into memory
     upon creation and provides the option to perform batching within the dataset
     instead of in the data loader.
+
+    Extracting the valid samples from the training scenes is expensive. If 'cache' is
+    set to 'True', the extracted samples are written to a cache directory as one
+    '.npy' file per variable and subsequently created datasets memory-map these
+    files instead of extracting the samples again.
+
+    If 'precompute' is set to 'True', the retrieval input of all samples is normalized
+    and stacked into a single feature matrix upon creation so that loading a batch
+    reduces to gathering the corresponding rows from this matrix.
     """
 
     def __init__(
@@ -59,6 +159,13 @@ class SatRainTabular(Dataset):
         subsample: Optional[float] = None,
         ipwgml_path: Optional[Path] = None,
         download: bool = True,
+        cache: bool = False,
+        cache_path: Optional[Path] = None,
+        precompute: bool = False,
+        n_workers: int = 1,
+        load_subsample: Optional[float | int] = None,
+        stratify: bool = False,
+        seed: int = 42,
     ):
         """
         Args:
@@ -81,6 +188,24 @@ class SatRainTabular(Dataset):
             ipwgml_path: Path containing or to which to download the IPWGML data.
             download: If 'True', missing data will be downloaded upon dataset creation. Otherwise, only
                 locally available files will be used.
+            cache: If 'True', the extracted training samples are cached on disk and
+                memory-mapped by subsequently created datasets with the same
+                configuration.
+            cache_path: The directory in which to store cached training samples.
+                Defaults to the 'cache' folder in the ipwgml data path.
+            precompute: If 'True', the retrieval input and target data of all samples are
+                normalized and stacked into contiguous float32 arrays upon creation.
+            n_workers: The number of processes to use to load the training scenes.
+            load_subsample: An optional fraction (if float) or number (if int) of the
+                valid samples to load. In contrast to 'subsample', the samples are selected
+                when the training scenes are read so that only the selected samples
+                are held in memory.
+            stratify: If 'True', the samples selected by 'load_subsample' are distributed
+                evenly across samples without precipitation, with precipitation, and
+                with heavy precipitation, so that rare heavy-precipitation samples are
+                retained.
+            seed: Seed for the selection of the subsampled samples and the shuffling of
+                the samples.
         """
         super().__init__()
 
@@ -89,6 +214,11 @@ class SatRainTabular(Dataset):
         else:
             ipwgml_path = Path(ipwgml_path)
 
+        if cache_path is None:
+            cache_path = ipwgml_path / "cache"
+        self.cache = cache
+        self.cache_path = Path(cache_path)
+
         if not base_sensor.lower() in ["gmi", "atms"]:
             raise ValueError("Base_Sensor must be one of ['gmi', 'atms'].")
         self.base_sensor = base_sensor.lower()
@@ -118,6 +248,13 @@ class SatRainTabular(Dataset):
 
         self.stack = stack
         self.subsample = subsample
+        self.features = None
+        self.feature_slices = None
+        self.targets = None
+        self.n_workers = n_workers
+        self.load_subsample = load_subsample
+        self.stratify = stratify
+        self.seed = seed
 
         self.geo_data = None
         self.geo_ir_data = None
@@ -153,54 +290,188 @@ class SatRainTabular(Dataset):
                 "set 'download' to True to download the file."
             )
         self._load_training_data(files)
+        if precompute:
+            self._precompute()
 
-        self.rng = np.random.default_rng(seed=42)
+        self.rng = np.random.default_rng(seed=self.seed)
         if self.shuffle:
             self.indices = self.rng.permutation(self.target_data.samples.size)
         else:
             self.indices = np.arange(self.target_data.samples.size)
 
 
-    def _load_training_data(self, files: Dict[str, Path]):
+    def _get_cache_dir(self, files: Dict[str, List[Path]]) -> Path:
+        """
+        The directory holding the cached training samples for the dataset's configuration.
+
+        The cache is keyed by the dataset, the target config, the names of the retrieval
+        inputs, and the training scenes. Since the cache holds all variables of the
+        retrieval input files, the remaining input settings are applied when the samples
+        are loaded and don't need to be part of the key.
+        """
+        key = {
+            "base_sensor": self.base_sensor,
+            "geometry": self.geometry,
+            "split": self.split,
+            "subset": self.subset,
+            "target_config": self.target_config.to_dict(),
+            "retrieval_input": sorted([inpt.name for inpt in self.retrieval_input]),
+            "scenes": [Path(path).name for path in files["target"]],
+        }
+        if self.load_subsample is not None:
+            key["load_subsample"] = self.load_subsample
+            key["stratify"] = self.stratify
+            key["seed"] = self.seed
+        key = hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+        name = f"{self.base_sensor}_{self.geometry}_{self.split}_{self.subset}_{key}"
+        return self.cache_path / "tabular" / name
+
+    def _write_cache(self, files: Dict[str, List[Path]], cache_dir: Path) -> None:
+        """
+        Extract the valid samples from all training scenes and write them to the cache.
+
+        The valid samples of each scene are determined first so that the extracted
+        samples can be written directly into pre-allocated files one scene at a time.
+
+        Args:
+            files: A dictionary mapping the names of the target and retrieval inputs to
+                the corresponding training files.
+            cache_dir: The directory to which to write the cache.
+        """
         target_files = files["target"]
-        self.target_data = []
-        for inpt in self.retrieval_input:
-            setattr(self, inpt.name + "_data", [])
+        LOGGER.info(
+            "Caching %s data from %s training scenes in %s.",
+            self.split, len(target_files), cache_dir
+        )
 
-        LOGGER.info("Loading %s data from %s training scenes.", self.split, len(target_files))
+        masks = get_sample_masks(
+            target_files,
+            self.target_config,
+            subsample=self.load_subsample,
+            stratify=self.stratify,
+            seed=self.seed,
+            n_workers=self.n_workers,
+        )
+        n_samples = sum([int(mask.sum()) for mask in masks])
 
-        for ind, target_file in enumerate(target_files):
-            target_data = xr.load_dataset(target_file)
-            valid = ~self.target_config.get_mask(target_data)
-            valid = xr.DataArray(
-                data=valid,
-                dims=target_data.surface_precip.dims
-            )
-            target_data = extract_samples(target_data, valid)
-            if "time" in target_data.coords:
-                target_data = target_data.reset_index("time")
-            self.target_data.append(target_data)
+        sources = ["target"] + [inpt.name for inpt in self.retrieval_input]
+        dims = {}
+        with write_atomically(cache_dir, directory=True) as tmp_dir:
+            for source in sources:
+                dims[source] = {}
+                arrays = {}
+                offset = 0
+                for ind, (path, mask) in enumerate(zip(files[source], masks)):
+                    if get_median_time(path) != get_median_time(target_files[ind]):
+                        raise ValueError(
+                            f"Encountered an input file {path} that is inconsistent with the "
+                            f"corresponding reference file {target_files[ind]}. This indicates "
+                            "that the dataset has not been downloaded properly."
+                        )
+                    data = extract_samples(load_dataset(path), mask)
+                    n_scene = int(mask.sum())
+                    for name, var in data.variables.items():
+                        if len(var.dims) == 0 or var.dims[0] != "samples":
+                            continue
+                        if name not in arrays:
+                            arrays[name] = np.lib.format.open_memmap(
+                                tmp_dir / f"{source}_{name}.npy",
+                                mode="w+",
+                                dtype=var.dtype,
+                                shape=(n_samples,) + var.shape[1:],
+                            )
+                            dims[source][name] = var.dims
+                        arrays[name][offset:offset + n_scene] = var.data
+                    offset += n_scene
+                for arr in arrays.values():
+                    arr.flush()
+                del arrays
+            with open(tmp_dir / "dims.json", "w") as output:
+                json.dump(dims, output)
+
+    def _load_cache(self, cache_dir: Path) -> None:
+        """
+        Memory-map the cached training samples.
 
-            ref_time = get_median_time(target_file)
+        Args:
+            cache_dir: The directory containing the cached training samples.
+        """
+        with open(cache_dir / "dims.json") as dims_file:
+            dims = json.load(dims_file)
+        for source, variables in dims.items():
+            data = xr.Dataset({
+                name: (var_dims, np.load(cache_dir / f"{source}_{name}.npy", mmap_mode="r"))
+                for name, var_dims in variables.items()
+            })
+            setattr(self, source + "_data", data)
 
-            for inpt in self.retrieval_input:
-                input_time = get_median_time(files[inpt.name][ind])
-                if ref_time != input_time:
-                    raise ValueError(
-                        "Encountered an input files %s that is inconsistent with the corresponding "
-                        "reference file %s. This indicates that the dataset has not been downloaded "
-                        "properly."
-                    )
-                input_data = extract_samples(xr.load_dataset(files[inpt.name][ind]), valid)
-                if "time" in input_data.coords:
-                    input_data = input_data.reset_index("time")
-                getattr(self, inpt.name + "_data").append(input_data)
+    def _load_training_data(self, files: Dict[str, Path]):
+        if self.cache:
+            cache_dir = self._get_cache_dir(files)
+            if not (cache_dir / "dims.json").exists():
+                self._write_cache(files, cache_dir)
+            self._load_cache(cache_dir)
+            return
+
+        LOGGER.info("Loading %s data from %s training scenes.", self.split, len(files["target"]))
+        samples = load_tabular_samples(
+            files,
+            [inpt.name for inpt in self.retrieval_input],
+            self.target_config,
+            n_workers=self.n_workers,
+            subsample=self.load_subsample,
+            stratify=self.stratify,
+            seed=self.seed,
+        )
+        for source, data in samples.items():
+            setattr(self, source + "_data", data)
 
-        self.target_data = xr.concat(self.target_data, dim="samples")
-        for inpt in self.retrieval_input:
-            input_data = xr.concat(getattr(self, inpt.name + "_data"), dim="samples")
-            setattr(self, inpt.name + "_data", input_data)
 
+    def _precompute(self) -> None:
+        """
+        Normalize and stack the retrieval input and target data of all samples.
+
+        Replaces the loaded input datasets with a (n_samples, n_features) float32
+        feature matrix and a (3, n_samples) float32 array holding the surface precip,
+        precip mask, and heavy precip mask targets.
+        """
+        LOGGER.info("Precomputing features for %s samples.", self.target_data.samples.size)
+        input_data = {
+            inpt.name: getattr(self, inpt.name + "_data", None) for inpt in self.retrieval_input
+        }
+        self.features, self.targets, self.feature_slices = _get_tabular_features(
+            self.target_config, self.retrieval_input, self.target_data, input_data
+        )
+        for name in input_data:
+            setattr(self, name + "_data", None)
+
+    def _get_precomputed(
+        self, samples: int | np.ndarray
+    ) -> Tuple[Union[torch.Tensor, Dict[str, torch.Tensor]], Dict[str, torch.Tensor]]:
+        """
+        Gather precomputed input and target data.
+
+        Args:
+            samples: The index or indices of the samples to load.
+
+        Return:
+            A tuple ``input, target`` with the same structure as the output of
+            ``__getitem__``.
+        """
+        features = np.take(self.features, samples, axis=0)
+        targets = np.take(self.targets, samples, axis=-1)
+        target = {
+            "surface_precip": torch.from_numpy(targets[0, ...]),
+            "precip_mask": torch.from_numpy(targets[1, ...]),
+            "heavy_precip_mask": torch.from_numpy(targets[2, ...]),
+        }
+        if self.stack:
+            return torch.from_numpy(features), target
+        input_data = {
+            key: torch.from_numpy(np.ascontiguousarray(features[..., slc]))
+            for key, slc in self.feature_slices.items()
+        }
+        return input_data, target
 
     def __len__(self) -> int:
         """
@@ -247,16 +518,15 @@ class SatRainTabular(Dataset):
             batch_end = batch_start + self.batch_size
             samples = self.indices[batch_start:batch_end]
 
+        if self.features is not None:
+            return self._get_precomputed(samples)
+
         target_data = self.target_data[{"samples": samples}]
-        surface_precip = self.target_config.load_reference_precip(target_data).astype(
-            np.float32
-        )
-        precip_mask = self.target_config.load_precip_mask(target_data).astype(np.float32)
-        heavy_precip_mask = self.target_config.load_heavy_precip_mask(target_data).astype(np.float32)
+        target_bundle = self.target_config.load_bundle(target_data)
         target = {
-            "surface_precip": torch.tensor(surface_precip),
-            "precip_mask": torch.tensor(precip_mask),
-            "heavy_precip_mask": torch.tensor(heavy_precip_mask),
+            "surface_precip": torch.tensor(target_bundle.surface_precip.astype(np.float32)),
+            "precip_mask": torch.tensor(target_bundle.precip_mask),
+            "heavy_precip_mask": torch.tensor(target_bundle.heavy_precip_mask),
 
         }
 
@@ -282,6 +552,264 @@ class SatRainTabular(Dataset):
         return input_data, target
 
 
+class SatRainTabularStream(IterableDataset):
+    """
+    Iterable dataset streaming SatRain data in tabular format.
+
+    In contrast to the SatRainTabular dataset, the SatRainTabularStream doesn't load
+    all training data into memory. Instead, it reads the training scenes one at a
+    time, extracts the valid samples, and passes them through a bounded shuffle
+    buffer from which batches are emitted. Peak memory usage is therefore determined
+    by the buffer size rather than the size of the dataset.
+
+    The training scenes are split between DataLoader workers and distributed ranks so
+    that each scene is read by exactly one worker per epoch. Since each worker emits
+    batches itself, the dataset should be used with a DataLoader with 'batch_size'
+    set to 'None'. To obtain a different ordering of the scenes in every epoch,
+    'set_epoch' must be called before each epoch.
+    """
+
+    def __init__(
+        self,
+        base_sensor: str,
+        geometry: str,
+        split: str,
+        subset: str = "xl",
+        batch_size: int = 1024,
+        shuffle: bool = True,
+        buffer_size: int = 100_000,
+        retrieval_input: List[str | Dict[str, Any] | InputConfig] = None,
+        target_config: Optional[TargetConfig] = None,
+        stack: bool = False,
+        seed: int = 42,
+        ipwgml_path: Optional[Path] = None,
+        download: bool = True,
+    ):
+        """
+        Args:
+            base_sensor: The base_sensor for which to load the benchmark dataset.
+            geometry: Whether to load on_swath or regridded observations.
+            split: Whether to load training ('training'), validation ('validation'), or
+                 test ('testing') splits.
+            subset: The subset of the dataset to load.
+            batch_size: The number of samples in each batch.
+            shuffle: Whether or not to shuffle the scenes and samples in the dataset.
+            buffer_size: The number of samples to collect in the shuffle buffer before
+                batches are emitted.
+            retrieval_input: List of the retrieval inputs to load. The list should contain
+                names of retrieval input sources ("pmw", "geo", "geo_ir", "ancillary"), dictionaries
+                defining the input name and additional input options, or InputConfig. If not explicitly
+                specified all available input data is loaded.
+            target_config: An optional TargetConfig specifying quality requirements for the retrieval
+                target data to load.
+            stack: If 'False', the input will be loaded as a dictionary containing the input tensors
+                from all input dataset. If 'True', the tensors will be concatenated along the
+                feature axis and only a single tensor is loaded instead of dictionary.
+            seed: Seed for the random number generators used to shuffle the scenes and
+                samples. Must be the same on all distributed ranks.
+            ipwgml_path: Path containing or to which to download the IPWGML data.
+            download: If 'True', missing data will be downloaded upon dataset creation. Otherwise, only
+                locally available files will be used.
+        """
+        super().__init__()
+
+        if ipwgml_path is None:
+            ipwgml_path = config.get_data_path()
+        else:
+            ipwgml_path = Path(ipwgml_path)
+
+        if not base_sensor.lower() in ["gmi", "atms"]:
+            raise ValueError("Base_Sensor must be one of ['gmi', 'atms'].")
+        self.base_sensor = base_sensor.lower()
+
+        if not geometry.lower() in ["gridded", "on_swath"]:
+            raise ValueError("Geomtry must be one of ['gridded', 'on_swath'].")
+        self.geometry = geometry.lower()
+
+        if not split.lower() in ["training", "validation", "testing"]:
+            raise ValueError(
+                "Split must be one of ['training', 'validation', 'testing']"
+            )
+        self.split = split
+        self.subset = subset
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.buffer_size = buffer_size
+
+        if retrieval_input is None:
+            retrieval_input = ALL_INPUTS
+        self.retrieval_input = parse_retrieval_inputs(retrieval_input)
+
+        if target_config is None:
+            target_config = TargetConfig()
+        elif isinstance(target_config, dict):
+            target_config = TargetConfig(**target_config)
+        self.target_config = target_config
+
+        self.stack = stack
+        self.seed = seed
+        self.epoch = 0
+
+        if download:
+            sources = set([inpt.name for inpt in self.retrieval_input] + ["target"])
+            for source in sources:
+                download_missing(
+                    dataset_name="satrain",
+                    base_sensor=self.base_sensor,
+                    geometry=self.geometry,
+                    source=source,
+                    split=self.split,
+                    subset=self.subset,
+                    progress_bar=True,
+                    destination=ipwgml_path
+                )
+        files = get_local_files(
+            dataset_name="satrain",
+            base_sensor=self.base_sensor,
+            geometry=self.geometry,
+            split=self.split,
+            subset=self.subset,
+            data_path=ipwgml_path,
+        )
+        if len(files["target"]) == 0:
+            raise ValueError(
+                f"Couldn't find any target data files. "
+                " Please make sure that the ipwgml data path is correct or "
+                "set 'download' to True to download the file."
+            )
+        self.files = {
+            source: [Path(path) for path in files[source]]
+            for source in ["target"] + [inpt.name for inpt in self.retrieval_input]
+        }
+        for inpt in self.retrieval_input:
+            for target_file, input_file in zip(self.files["target"], self.files[inpt.name]):
+                if get_median_time(target_file) != get_median_time(input_file):
+                    raise ValueError(
+                        f"Encountered an input file {input_file} that is inconsistent with the "
+                        f"corresponding reference file {target_file}. This indicates "
+                        "that the dataset has not been downloaded properly."
+                    )
+
+    def set_epoch(self, epoch: int) -> None:
+        """
+        Set the epoch used to seed the shuffling of scenes and samples.
+        """
+        self.epoch = epoch
+
+    def get_shard(self) -> Tuple[int, int]:
+        """
+        Determine the shard of the training scenes to load in the current process.
+
+        Return:
+            A tuple ``(shard, n_shards)`` containing the index of the shard to load
+            and the total number of shards across all data loader workers and
+            distributed ranks.
+        """
+        return _get_worker_shard()
+
+    def load_scene(self, ind: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Load the valid samples from a training scene.
+
+        Args:
+            ind: The index of the training scene.
+
+        Return:
+            A tuple ``(features, targets)`` containing the (n_samples, n_features) feature
+            matrix and the (3, n_samples) target array of the scene.
+        """
+        target_data = load_dataset(self.files["target"][ind])
+        valid = ~self.target_config.get_mask(target_data)
+        valid = xr.DataArray(
+            data=valid,
+            dims=target_data[self.target_config.target].dims
+        )
+        target_data = extract_samples(target_data, valid)
+        input_data = {
+            inpt.name: extract_samples(load_dataset(self.files[inpt.name][ind]), valid)
+            for inpt in self.retrieval_input
+        }
+        features, targets, self.feature_slices = _get_tabular_features(
+            self.target_config, self.retrieval_input, target_data, input_data
+        )
+        return features, targets
+
+    def get_batch(
+        self, features: np.ndarray, targets: np.ndarray
+    ) -> Tuple[Union[torch.Tensor, Dict[str, torch.Tensor]], Dict[str, torch.Tensor]]:
+        """
+        Convert feature and target arrays to a batch of input and target tensors.
+        """
+        target = {
+            "surface_precip": torch.from_numpy(targets[0].copy()),
+            "precip_mask": torch.from_numpy(targets[1].copy()),
+            "heavy_precip_mask": torch.from_numpy(targets[2].copy()),
+        }
+        if self.stack:
+            return torch.from_numpy(features.copy()), target
+        input_data = {
+            key: torch.from_numpy(np.ascontiguousarray(features[:, slc]))
+            for key, slc in self.feature_slices.items()
+        }
+        return input_data, target
+
+    def __iter__(self):
+        shard, n_shards = self.get_shard()
+        scenes = np.arange(len(self.files["target"]))
+        if self.shuffle:
+            scenes = np.random.default_rng([self.seed, self.epoch]).permutation(scenes)
+        scenes = scenes[shard::n_shards]
+        rng = np.random.default_rng([self.seed, self.epoch, shard])
+
+        if self.shuffle:
+            buffer_size = max(self.buffer_size, self.batch_size)
+        else:
+            buffer_size = self.batch_size
+
+        features = []
+        targets = []
+        n_buffered = 0
+        for ind in scenes:
+            scene_features, scene_targets = self.load_scene(ind)
+            features.append(scene_features)
+            targets.append(scene_targets)
+            n_buffered += scene_features.shape[0]
+            if n_buffered < buffer_size:
+                continue
+
+            features = np.concatenate(features, axis=0)
+            targets = np.concatenate(targets, axis=-1)
+            if self.shuffle:
+                perm = rng.permutation(n_buffered)
+                features = features[perm]
+                targets = targets[:, perm]
+                # Keep half of the buffer to mix with samples from the following scenes.
+                n_batches = (n_buffered - buffer_size // 2) // self.batch_size
+            else:
+                n_batches = n_buffered // self.batch_size
+
+            for batch_ind in range(n_batches):
+                batch = slice(batch_ind * self.batch_size, (batch_ind + 1) * self.batch_size)
+                yield self.get_batch(features[batch], targets[:, batch])
+
+            n_emitted = n_batches * self.batch_size
+            features = [features[n_emitted:]]
+            targets = [targets[:, n_emitted:]]
+            n_buffered -= n_emitted
+
+        if n_buffered == 0:
+            return
+        features = np.concatenate(features, axis=0)
+        targets = np.concatenate(targets, axis=-1)
+        if self.shuffle:
+            perm = rng.permutation(n_buffered)
+            features = features[perm]
+            targets = targets[:, perm]
+        for batch_start in range(0, n_buffered, self.batch_size):
+            batch = slice(batch_start, batch_start + self.batch_size)
+            yield self.get_batch(features[batch], targets[:, batch])
+
+
 def apply(tensors: Any, transform: torch.Tensor) -> torch.Tensor:
     """
     Apply transformation to any container containing torch.Tensors.
@@ -310,6 +838,20 @@ class SatRainSpatial:
     """
     Dataset class providing access to the spatial variant of the satellite precipitation retrieval
     benchmark dataset.
+
+    By default, the dataset loads full scenes. If 'crop_size' is set, a random window is
+    chosen for each sample and only the data within this window is read from the target
+    and input files.
+
+    If 'scene_cache_size' is set, the normalized input and target data of each scene is
+    cached after it has been loaded so that subsequent epochs don't need to decode the
+    scene again. The cache is shared between all data loader workers. When the scene
+    cache is used, full scenes are loaded and crops are extracted from the cached scenes.
+
+    If 'min_valid_fraction' or 'precip_weight' are set, crops are drawn using a
+    :class:`ipwgml.sampling.CropIndex`, which is built once for the training scenes and
+    allows rejecting crops with too few valid reference pixels and biasing the crops
+    towards precipitation without loading the reference data.
     """
 
     def __init__(
@@ -324,6 +866,13 @@ class SatRainSpatial:
         augment: bool = True,
         ipwgml_path: Optional[Path] = None,
         download: bool = True,
+        crop_size: Optional[int | Tuple[int, int]] = None,
+        max_open_files: int = 0,
+        scene_cache_size: Optional[int] = None,
+        scene_cache_path: Optional[Path] = None,
+        min_valid_fraction: float = 0.0,
+        precip_weight: float = 0.0,
+        crop_index_path: Optional[Path] = None,
     ):
         """
         Args:
@@ -344,6 +893,24 @@ class SatRainSpatial:
             ipwgml_path: Path containing or to which to download the IPWGML data.
             download: If 'True', missing data will be downloaded upon dataset creation. Otherwise, only
                 locally available files will be used.
+            crop_size: An optional int or tuple of ints defining the size of random crops to
+                load from the training scenes. Along dimensions where the scenes are smaller
+                than the crop size, the full scene is loaded.
+            max_open_files: The maximum number of files to keep open in each data loader
+                worker. If larger than 0, file handles are reused across samples, which
+                avoids re-opening the files for every sample.
+            scene_cache_size: If given, the maximum size in bytes of the cache of decoded
+                scenes.
+            scene_cache_path: The directory in which to create the scene cache. Defaults to
+                '/dev/shm' if available and the system's temporary directory otherwise.
+            min_valid_fraction: The minimum fraction of valid reference pixels in the
+                crops drawn from the training scenes.
+            precip_weight: A value between 0 and 1 controlling the bias of the crops
+                towards precipitating pixels. A value of 0 corresponds to no bias,
+                a value of 1 to crops being drawn with a probability proportional
+                to their fraction of precipitating pixels.
+            crop_index_path: The directory in which to store the crop index. Defaults
+                to the 'cache' folder in the ipwgml data path.
         """
         super().__init__()
 
@@ -380,6 +947,14 @@ class SatRainSpatial:
 
         self.stack = stack
         self.augment = augment
+        if isinstance(crop_size, int):
+            crop_size = (crop_size, crop_size)
+        self.crop_size = crop_size
+        self.max_open_files = max_open_files
+        self.file_handles = None
+        self.scene_cache = None
+        if scene_cache_size is not None:
+            self.scene_cache = SceneCache(scene_cache_size, path=scene_cache_path)
 
         self.pmw = None
         self.geo = None
@@ -422,14 +997,70 @@ class SatRainSpatial:
             setattr(self, source, np.array([str(path) for path in source_files]))
 
         self.check_consistency()
+
+        self.min_valid_fraction = min_valid_fraction
+        self.precip_weight = precip_weight
+        self.crop_index = None
+        if crop_size is not None and (0.0 < min_valid_fraction or 0.0 < precip_weight):
+            if crop_index_path is None:
+                crop_index_path = ipwgml_path / "cache"
+            crop_index_dir = self._get_index_dir(Path(crop_index_path), "crop_index")
+            if crop_index_dir.exists():
+                self.crop_index = CropIndex(crop_index_dir)
+            else:
+                self.crop_index = CropIndex.build(
+                    self.get_target_files(), self.target_config, crop_index_dir
+                )
+
         self.worker_init_fn(0)
 
+    def _get_index_dir(self, index_path: Path, name: str, **kwargs) -> Path:
+        """
+        Get the directory holding an index of the dataset's training scenes.
+
+        Args:
+            index_path: The directory containing the indices.
+            name: The name of the type of index.
+            **kwargs: Additional settings that the index depends on.
+
+        Return:
+            A path pointing to a sub-directory of 'index_path / name' whose name uniquely
+            identifies the training scenes, target config, and additional settings.
+        """
+        key = kwargs | {
+            "base_sensor": self.base_sensor,
+            "geometry": self.geometry,
+            "split": self.split,
+            "subset": self.subset,
+            "target_config": self.target_config.to_dict(),
+            "files": [Path(path).name for path in self.get_target_files()],
+        }
+        key = hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()
+        return index_path / name / key
+
     def worker_init_fn(self, w_id: int) -> None:
         """
         Seeds the dataset loader's random number generator.
         """
         seed = int.from_bytes(os.urandom(4), "big") + w_id
         self.rng = np.random.default_rng(seed)
+        if self.max_open_files > 0:
+            self.file_handles = FileHandleCache(self.max_open_files)
+
+    def open_file(self, path: Path | str) -> xr.Dataset:
+        """
+        Open a training file.
+
+        Args:
+            path: The path of the file to open.
+
+        Return:
+            A context manager providing the opened file as an xarray.Dataset. If file
+            handles are cached, the cached handle is returned and not closed upon exit.
+        """
+        if self.file_handles is None:
+            return open_dataset(path)
+        return nullcontext(self.file_handles.get(path))
 
     def check_consistency(self):
         """
@@ -490,37 +1121,206 @@ class SatRainSpatial:
         """
         return len(self.get_target_files())
 
-    def __getitem__(self, ind: int) -> Tuple[Dict[str, torch.Tensor], torch.Tensor]:
+    def get_crop(
+            self,
+            target_data: Path | str | xr.Dataset,
+            max_attempts: int = 10,
+            ind: Optional[int] = None,
+    ) -> Tuple[Dict[str, slice], TargetBundle]:
         """
-        Load sample from dataset.
+        Choose a random crop window and load the reference data within it.
+
+        Windows without valid reference pixels are rejected unless no window with
+        valid pixels is found within 'max_attempts' draws. If the dataset uses a crop
+        index and 'ind' is given, the window is drawn from the crop index and the
+        reference data is loaded only once.
+
+        Args:
+            target_data: The target file from which to load the crop or the opened
+                target file.
+            max_attempts: The maximum number of windows to draw.
+            ind: The index of the scene.
+
+        Return:
+            A tuple ``(window, target_bundle)`` containing the crop window as a dictionary
+            mapping spatial dimensions to slices and the reference data loaded from it.
         """
-        with xr.open_dataset(self.get_target_files()[ind], chunks=None, cache=False) as data:
-            target_time = data.time.data.copy()
-            surface_precip = self.target_config.load_reference_precip(data)
-            precip_mask = self.target_config.load_precip_mask(data)
-            heavy_precip_mask = self.target_config.load_heavy_precip_mask(data)
-            target = {
-                "surface_precip": torch.tensor(surface_precip),
-                "precip_mask": torch.tensor(precip_mask.astype(np.float32)),
-                "heavy_precip_mask": torch.tensor(heavy_precip_mask.astype(np.float32)),
-            }
-        data.close()
-        del data
+        if isinstance(target_data, xr.Dataset):
+            dims = target_data[self.target_config.target].dims
+            shape = target_data[self.target_config.target].shape
+        else:
+            with open_dataset(target_data) as data:
+                dims = data[self.target_config.target].dims
+                shape = data[self.target_config.target].shape
+
+        if self.crop_index is not None and ind is not None:
+            max_attempts = 1
+
+        for _ in range(max_attempts):
+            slices = self.draw_crop(shape, ind=ind)
+            window = dict(zip(dims, slices))
+            target_bundle = self.target_config.load_bundle(target_data, window=window)
+            if not target_bundle.invalid.all():
+                break
+        return window, target_bundle
+
+    def draw_crop(
+            self,
+            shape: Tuple[int, int],
+            ind: Optional[int] = None
+    ) -> Tuple[slice, slice]:
+        """
+        Draw a random crop window for a scene.
+
+        Args:
+            shape: The spatial shape of the scene.
+            ind: The index of the scene. If given and the dataset uses a crop index, the
+                window is drawn from the crop index.
+
+        Return:
+            A tuple of slices defining the crop window.
+        """
+        if self.crop_index is not None and ind is not None:
+            return self.crop_index.draw(
+                ind,
+                self.crop_size,
+                self.rng,
+                min_valid_fraction=self.min_valid_fraction,
+                precip_weight=self.precip_weight,
+            )
+        slices = []
+        for size, crop in zip(shape, self.crop_size):
+            start = self.rng.integers(0, max(size - crop, 0) + 1)
+            slices.append(slice(start, start + crop))
+        return tuple(slices)
+
+    def crop_scene(
+            self,
+            input_data: Dict[str, np.ndarray],
+            target: Dict[str, np.ndarray],
+            max_attempts: int = 10,
+            ind: Optional[int] = None,
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Extract a random crop from a loaded scene.
+
+        Windows without valid reference pixels are rejected unless no window with
+        valid pixels is found within 'max_attempts' draws.
+
+        Args:
+            input_data: A dictionary containing the input arrays of the scene.
+            target: A dictionary containing the target arrays of the scene.
+            max_attempts: The maximum number of windows to draw.
+            ind: The index of the scene used to draw the crop from the crop index.
+
+        Return:
+            A tuple ``(input_data, target)`` containing the cropped input and target
+            arrays.
+        """
+        valid = np.isfinite(target["precip_mask"])
+        for _ in range(max_attempts):
+            slices = self.draw_crop(valid.shape, ind=ind)
+            if valid[slices].any():
+                break
+        input_data = {name: arr[(..., *slices)] for name, arr in input_data.items()}
+        target = {name: arr[slices] for name, arr in target.items()}
+        return input_data, target
+
+    def load_scene(
+            self,
+            ind: int,
+            crop: bool = False,
+            slices: Optional[Tuple[slice, slice]] = None,
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Load the normalized input and target data of a scene.
+
+        Args:
+            ind: The index of the scene.
+            crop: If 'True', only a random crop of the scene is loaded.
+            slices: An optional tuple of slices defining a fixed window of the scene
+                to load.
+
+        Return:
+            A tuple ``(input_data, target)`` containing dictionaries mapping the names of the
+            input and target variables to the corresponding arrays.
+        """
+        with self.open_file(self.get_target_files()[ind]) as target_data:
+            if slices is not None:
+                dims = target_data[self.target_config.target].dims
+                window = dict(zip(dims, slices))
+                target_bundle = self.target_config.load_bundle(target_data, window=window)
+            elif crop:
+                window, target_bundle = self.get_crop(target_data, ind=ind)
+            else:
+                window = None
+                target_bundle = self.target_config.load_bundle(target_data)
+            target_time = load_subset(target_data, ["time"], window).time.data
+
+        target = {
+            "surface_precip": target_bundle.surface_precip,
+            "precip_mask": target_bundle.precip_mask,
+            "heavy_precip_mask": target_bundle.heavy_precip_mask,
+        }
 
         input_data = {}
         for inpt in self.retrieval_input:
             files = self.get_source_files(inpt.name)
             if files is None:
                 continue
-            data = inpt.load_data(
-                files[ind],
-                target_time=target_time,
-            )
+            with self.open_file(files[ind]) as input_data_file:
+                data = inpt.load_data(
+                    input_data_file,
+                    target_time=target_time,
+                    window=window,
+                )
             for name, arr in data.items():
-                input_data[name] = torch.tensor(arr.astype(np.float32))
+                input_data[name] = arr.astype(np.float32)
 
-            del files
-            del data
+        return input_data, target
+
+    def __getitem__(self, ind: int) -> Tuple[Dict[str, torch.Tensor], torch.Tensor]:
+        """
+        Load sample from dataset.
+        """
+        if self.scene_cache is None:
+            input_data, target = self.load_scene(ind, crop=self.crop_size is not None)
+        else:
+            scene = self.scene_cache.get(ind)
+            if scene is None:
+                input_data, target = self.load_scene(ind)
+                self.scene_cache.put(
+                    ind,
+                    {"input/" + name: arr for name, arr in input_data.items()}
+                    | {"target/" + name: arr for name, arr in target.items()}
+                )
+            else:
+                input_data, target = {}, {}
+                for name, arr in scene.items():
+                    source, name = name.split("/", 1)
+                    (input_data if source == "input" else target)[name] = arr
+            if self.crop_size is not None:
+                input_data, target = self.crop_scene(input_data, target, ind=ind)
+        return self.to_sample(input_data, target)
+
+    def to_sample(
+            self,
+            input_data: Dict[str, np.ndarray],
+            target: Dict[str, np.ndarray]
+    ) -> Tuple[Dict[str, torch.Tensor] | torch.Tensor, Dict[str, torch.Tensor]]:
+        """
+        Convert loaded input and target arrays to a training sample.
+
+        Args:
+            input_data: A dictionary containing the input arrays.
+            target: A dictionary containing the target arrays.
+
+        Return:
+            A tuple ``(x, y)`` containing the input and target tensors with augmentation
+            and stacking applied.
+        """
+        target = {name: torch.tensor(arr) for name, arr in target.items()}
+        input_data = {name: torch.tensor(arr) for name, arr in input_data.items()}
 
         if self.augment:
 
@@ -539,6 +1339,339 @@ class SatRainSpatial:
         if self.stack:
             input_data = torch.cat(list(input_data.values()), axis=0)
 
-        del target_time
+        return input_data, target
+
 
+class SatRainTiles(SatRainSpatial):
+    """
+    Dataset class providing access to fixed-size tiles of the training scenes of the
+    spatial variant of the satellite precipitation retrieval benchmark dataset.
+
+    Upon construction, each training scene is tiled using :class:`ipwgml.tiling.DatasetTiler`
+    and a global index of the tiles containing valid reference pixels is built. The index
+    is stored on disk so that it only has to be built once. Each sample corresponds to a
+    tile and only the data within the tile is read from the target and input files.
+    Tiles of scenes smaller than the tile size are padded with NAN so that all samples
+    have the same shape.
+    """
+
+    def __init__(
+        self,
+        base_sensor: str,
+        geometry: str,
+        split: str,
+        subset: str = "xl",
+        retrieval_input: List[str | dict[str | Any] | InputConfig] = None,
+        target_config: TargetConfig = None,
+        stack: bool = False,
+        augment: bool = True,
+        ipwgml_path: Optional[Path] = None,
+        download: bool = True,
+        tile_size: int | Tuple[int, int] = 256,
+        overlap: int = 0,
+        max_open_files: int = 0,
+        tile_index_path: Optional[Path] = None,
+    ):
+        """
+        Args:
+            base_sensor: The base_sensor for which to load the benchmark dataset.
+            geometry: Whether to load on_swath or regridded observations.
+            split: Whether to load 'training', 'validation', or
+                 'testing' splits.
+            retrieval_input: List of the retrieval inputs to load. The list should contain
+                names of retrieval input sources ("pmw", "geo", "geo_ir", "ancillary"), dictionaries
+                defining the input name and additional input options, or InputConfig. If not explicitly
+                specified all available input data is loaded.
+            target_config: An optional TargetConfig specifying quality requirements for the retrieval
+                target data to load.
+            stack: If 'False', the input will be loaded as a dictionary containing the input tensors
+                from all input dataset. If 'True', the tensors will be concatenated along the feature axis
+                and only a single tensor is loaded instead of dictionary.
+            augment: If 'True' will apply random horizontal and vertical flips to the input data.
+            ipwgml_path: Path containing or to which to download the IPWGML data.
+            download: If 'True', missing data will be downloaded upon dataset creation. Otherwise, only
+                locally available files will be used.
+            tile_size: An int or tuple of ints defining the size of the tiles.
+            overlap: The overlap between neighboring tiles.
+            max_open_files: The maximum number of files to keep open in each data loader
+                worker.
+            tile_index_path: The directory in which to store the tile index. Defaults
+                to the 'cache' folder in the ipwgml data path.
+        """
+        super().__init__(
+            base_sensor=base_sensor,
+            geometry=geometry,
+            split=split,
+            subset=subset,
+            retrieval_input=retrieval_input,
+            target_config=target_config,
+            stack=stack,
+            augment=augment,
+            ipwgml_path=ipwgml_path,
+            download=download,
+            max_open_files=max_open_files,
+        )
+        if isinstance(tile_size, int):
+            tile_size = (tile_size, tile_size)
+        self.tile_size = tuple(tile_size)
+        self.overlap = overlap
+
+        if tile_index_path is None:
+            tile_index_path = self.ipwgml_path / "cache"
+        tile_index_file = self._get_index_dir(
+            Path(tile_index_path), "tile_index", tile_size=self.tile_size, overlap=overlap
+        ).with_suffix(".npy")
+        if not tile_index_file.exists():
+            self._write_tile_index(tile_index_file)
+        self.tile_index = np.load(tile_index_file)
+
+    def _write_tile_index(self, tile_index_file: Path) -> None:
+        """
+        Build the tile index and write it to disk.
+
+        Args:
+            tile_index_file: The path to which to write the tile index.
+        """
+        LOGGER.info("Building tile index in %s.", tile_index_file)
+        tiles = []
+        for scene, target_file in enumerate(self.get_target_files()):
+            with open_dataset(target_file) as data:
+                target_bundle = self.target_config.load_bundle(data)
+                dims = data[self.target_config.target].dims
+                tiler = DatasetTiler(
+                    data, tile_size=self.tile_size, overlap=self.overlap, spatial_dims=dims
+                )
+            valid = ~target_bundle.invalid * np.isfinite(target_bundle.surface_precip)
+            for row in tiler.row_starts:
+                for col in tiler.col_starts:
+                    tile = valid[row:row + self.tile_size[0], col:col + self.tile_size[1]]
+                    if tile.any():
+                        tiles.append((scene, row, col))
+
+        with write_atomically(tile_index_file) as tmp:
+            np.save(tmp, np.array(tiles, dtype=np.int64).reshape(-1, 3))
+
+    def __len__(self) -> int:
+        """
+        The number of tiles in the dataset.
+        """
+        return len(self.tile_index)
+
+    def pad(self, arr: np.ndarray) -> np.ndarray:
+        """
+        Pad the spatial dimensions of an array to the tile size using NANs.
+        """
+        pad_rows = self.tile_size[0] - arr.shape[-2]
+        pad_cols = self.tile_size[1] - arr.shape[-1]
+        if pad_rows == 0 and pad_cols == 0:
+            return arr
+        padding = ((0, 0),) * (arr.ndim - 2) + ((0, pad_rows), (0, pad_cols))
+        return np.pad(arr, padding, constant_values=np.nan)
+
+    def __getitem__(self, ind: int) -> Tuple[Dict[str, torch.Tensor], torch.Tensor]:
+        """
+        Load tile from dataset.
+        """
+        if ind >= len(self):
+            raise IndexError("Dataset index out of range.")
+        scene, row, col = self.tile_index[ind]
+        slices = (
+            slice(row, row + self.tile_size[0]),
+            slice(col, col + self.tile_size[1])
+        )
+        input_data, target = self.load_scene(scene, slices=slices)
+        input_data = {name: self.pad(arr) for name, arr in input_data.items()}
+        target = {name: self.pad(arr) for name, arr in target.items()}
+        return self.to_sample(input_data, target)
+
+
+def write_shards(
+        dataset: SatRainSpatial,
+        output_path: Path,
+        samples_per_shard: int = 256,
+        compression: Optional[str] = None,
+        n_workers: int = 0,
+) -> Path:
+    """
+    Pack the samples of a spatial dataset into shards for sequential reading.
+
+    Each shard is an HDF5 file holding the normalized input and target arrays of
+    'samples_per_shard' consecutive samples of the dataset. The input arrays are stored
+    stacked if the dataset stacks its inputs. An 'index.json' file listing the shards
+    and the dataset configuration is written once all shards have been written.
+
+    Args:
+        dataset: The SatRainSpatial or SatRainTiles dataset whose samples to pack. Should
+            be created with 'augment' set to 'False'.
+        output_path: The directory to which to write the shards.
+        samples_per_shard: The number of samples in each shard.
+        compression: Optional name of the compression to apply to the arrays. Supported
+            values are 'gzip' and 'zstd'.
+        n_workers: The number of data loader workers to use to load the samples.
+
+    Return:
+        The path of the shard index.
+    """
+    if compression is None:
+        compression_kwargs = {}
+    elif compression == "gzip":
+        compression_kwargs = {"compression": "gzip"}
+    elif compression == "zstd":
+        compression_kwargs = dict(hdf5plugin.Zstd())
+    else:
+        raise ValueError("Compression must be one of [None, 'gzip', 'zstd'].")
+
+    output_path = Path(output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+    data_loader = torch.utils.data.DataLoader(
+        dataset,
+        batch_size=None,
+        shuffle=False,
+        num_workers=n_workers,
+        worker_init_fn=dataset.worker_init_fn,
+    )
+
+    def write_arrays(group: h5py.Group, name: str, data: Dict[str, torch.Tensor] | torch.Tensor):
+        if isinstance(data, dict):
+            group = group.create_group(name, track_order=True)
+            for key, tensor in data.items():
+                group.create_dataset(key, data=tensor.numpy(), **compression_kwargs)
+        else:
+            group.create_dataset(name, data=data.numpy(), **compression_kwargs)
+
+    shards = []
+    n_samples = []
+    shard_file = None
+    for ind, (x, y) in enumerate(data_loader):
+        if ind % samples_per_shard == 0:
+            if shard_file is not None:
+                shard_file.close()
+            shards.append(f"shard_{len(shards):05}.h5")
+            n_samples.append(0)
+            shard_file = h5py.File(output_path / shards[-1], "w")
+        sample = shard_file.create_group(str(n_samples[-1]))
+        write_arrays(sample, "input", x)
+        write_arrays(sample, "target", y)
+        n_samples[-1] += 1
+    if shard_file is not None:
+        shard_file.close()
+
+    index = {
+        "shards": shards,
+        "n_samples": n_samples,
+        "stack": dataset.stack,
+        "base_sensor": dataset.base_sensor,
+        "geometry": dataset.geometry,
+        "split": dataset.split,
+        "subset": dataset.subset,
+        "retrieval_input": [inpt.to_dict() for inpt in dataset.retrieval_input],
+        "target_config": dataset.target_config.to_dict(),
+    }
+    index_file = output_path / "index.json"
+    with write_atomically(index_file) as tmp, open(tmp, "w") as output:
+        json.dump(index, output, indent=2)
+    return index_file
+
+
+class SatRainShards(IterableDataset):
+    """
+    Iterable dataset reading spatial training samples from shards written by
+    :func:`write_shards`.
+
+    The shards are read in shuffled order and the samples within each shard are
+    shuffled so that each opened file provides all of its samples sequentially. The
+    shards are split between DataLoader workers and distributed ranks so that each
+    shard is read by exactly one worker per epoch. To obtain a different ordering of
+    the samples in every epoch, 'set_epoch' must be called before each epoch.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        shuffle: bool = True,
+        augment: bool = True,
+        seed: int = 42,
+    ):
+        """
+        Args:
+            path: The directory containing the shards.
+            shuffle: Whether or not to shuffle the shards and samples.
+            augment: If 'True' will apply random horizontal and vertical flips to the
+                input data.
+            seed: Seed for the random number generators used to shuffle the shards and
+                samples. Must be the same on all distributed ranks.
+        """
+        super().__init__()
+        self.path = Path(path)
+        with open(self.path / "index.json") as index_file:
+            index = json.load(index_file)
+        self.shards = [self.path / name for name in index["shards"]]
+        self.n_samples = index["n_samples"]
+        self.stack = index["stack"]
+        self.retrieval_input = parse_retrieval_inputs(index["retrieval_input"])
+        self.target_config = TargetConfig(**index["target_config"])
+        self.shuffle = shuffle
+        self.augment = augment
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        """
+        Set the epoch used to seed the shuffling of shards and samples.
+        """
+        self.epoch = epoch
+
+    def __len__(self) -> int:
+        """
+        The number of samples in the dataset.
+        """
+        return sum(self.n_samples)
+
+    def load_sample(
+            self,
+            group: h5py.Group
+    ) -> Tuple[Dict[str, torch.Tensor] | torch.Tensor, Dict[str, torch.Tensor]]:
+        """
+        Load a sample from a shard.
+
+        Args:
+            group: The HDF5 group holding the sample.
+
+        Return:
+            A tuple ``(x, y)`` containing the input and target tensors.
+        """
+        if isinstance(group["input"], h5py.Dataset):
+            input_data = torch.from_numpy(group["input"][()])
+        else:
+            input_data = {
+                name: torch.from_numpy(arr[()]) for name, arr in group["input"].items()
+            }
+        target = {
+            name: torch.from_numpy(arr[()]) for name, arr in group["target"].items()
+        }
         return input_data, target
+
+    def __iter__(self):
+        shard, n_shards = _get_worker_shard()
+        shards = np.arange(len(self.shards))
+        if self.shuffle:
+            shards = np.random.default_rng([self.seed, self.epoch]).permutation(shards)
+        shards = shards[shard::n_shards]
+        rng = np.random.default_rng([self.seed, self.epoch, shard])
+
+        for shard_ind in shards:
+            samples = np.arange(self.n_samples[shard_ind])
+            if self.shuffle:
+                samples = rng.permutation(samples)
+            with h5py.File(self.shards[shard_ind], "r") as shard_file:
+                for sample_ind in samples:
+                    input_data, target = self.load_sample(shard_file[str(sample_ind)])
+                    if self.augment:
+                        dims = tuple()
+                        if rng.random() > 0.5:
+                            dims = dims + (-2,)
+                        if rng.random() > 0.5:
+                            dims = dims + (-1,)
+                        input_data = apply(input_data, partial(torch.flip, dims=dims))
+                        target = apply(target, partial(torch.flip, dims=dims))
+                    yield input_data, target
@@ -0,0 +1,227 @@
+"""
+ipwgml.sampling
+===============
+
+Provides the :class:`CropIndex` class for sampling crops from training scenes based
+on the availability of valid reference pixels and precipitation.
+
+The crop index stores summed-area tables of the valid and precipitating reference
+pixels of each training scene. This allows calculating the number of valid and
+precipitating pixels within any crop window in constant time and thus to draw crops
+satisfying a minimum fraction of valid pixels or biased towards precipitation
+without loading the reference data.
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from ipwgml.target import TargetConfig
+from ipwgml.utils import write_atomically
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def get_summed_area_table(mask: np.ndarray) -> np.ndarray:
+    """
+    Calculate the summed-area table of a 2D mask.
+
+    Args:
+        mask: A 2D array of bool values.
+
+    Return:
+        An array of shape ``(n_rows + 1, n_cols + 1)`` whose element ``(i, j)`` contains
+        the number of true values in ``mask[:i, :j]``.
+    """
+    table = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int32)
+    table[1:, 1:] = mask.astype(np.int32).cumsum(0).cumsum(1)
+    return table
+
+
+class CropIndex:
+    """
+    Index of the valid and precipitating reference pixels in a sequence of training
+    scenes.
+
+    The index is stored in a directory containing the summed-area tables of all scenes
+    in a single flat array, which is memory-mapped when the index is loaded, and an
+    array holding the offset and shape of the tables of each scene.
+    """
+    def __init__(self, path: Path):
+        """
+        Load crop index.
+
+        Args:
+            path: The directory containing the crop index.
+        """
+        self.path = Path(path)
+        self.tables = np.load(self.path / "tables.npy", mmap_mode="r")
+        self.scenes = np.load(self.path / "scenes.npy")
+        self._max_precip_fractions = {}
+
+    @classmethod
+    def build(
+            cls,
+            target_files: List[Path],
+            target_config: TargetConfig,
+            path: Path
+    ) -> "CropIndex":
+        """
+        Build crop index for a sequence of training scenes.
+
+        Args:
+            target_files: The target files of the training scenes.
+            target_config: The TargetConfig defining the valid reference pixels.
+            path: The directory to which to write the index.
+
+        Return:
+            The CropIndex object for the created index.
+        """
+        path = Path(path)
+        LOGGER.info("Building crop index for %s scenes in %s.", len(target_files), path)
+        scenes = []
+        tables = []
+        offset = 0
+        for target_file in target_files:
+            target_bundle = target_config.load_bundle(target_file)
+            valid = ~target_bundle.invalid * np.isfinite(target_bundle.surface_precip)
+            precip = target_bundle.precip_mask == 1.0
+            n_rows, n_cols = valid.shape
+            scenes.append((offset, n_rows, n_cols))
+            tables.append(get_summed_area_table(valid).ravel())
+            tables.append(get_summed_area_table(precip).ravel())
+            offset += 2 * (n_rows + 1) * (n_cols + 1)
+
+        with write_atomically(path, directory=True) as tmp:
+            np.save(tmp / "tables.npy", np.concatenate(tables))
+            np.save(tmp / "scenes.npy", np.array(scenes, dtype=np.int64))
+        return cls(path)
+
+    def get_tables(self, scene: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the summed-area tables of the valid and precipitating pixels of a scene.
+        """
+        offset, n_rows, n_cols = self.scenes[scene]
+        size = (n_rows + 1) * (n_cols + 1)
+        tables = self.tables[offset:offset + 2 * size].reshape(2, n_rows + 1, n_cols + 1)
+        return tables[0], tables[1]
+
+    def get_scene_shape(self, scene: int) -> Tuple[int, int]:
+        """
+        The shape of a scene.
+        """
+        _, n_rows, n_cols = self.scenes[scene]
+        return int(n_rows), int(n_cols)
+
+    def get_counts(
+            self,
+            scene: int,
+            row: int,
+            col: int,
+            crop_size: Tuple[int, int]
+    ) -> Tuple[int, int]:
+        """
+        Calculate the numbers of valid and precipitating pixels in a crop.
+
+        Args:
+            scene: The index of the scene.
+            row: The row index of the upper left corner of the crop.
+            col: The column index of the upper left corner of the crop.
+            crop_size: The size of the crop.
+
+        Return:
+            A tuple ``(n_valid, n_precip)`` containing the number of valid and
+            precipitating pixels within the crop.
+        """
+        valid, precip = self.get_tables(scene)
+        row_end = min(row + crop_size[0], valid.shape[0] - 1)
+        col_end = min(col + crop_size[1], valid.shape[1] - 1)
+        counts = []
+        for table in (valid, precip):
+            counts.append(int(
+                table[row_end, col_end] - table[row, col_end]
+                - table[row_end, col] + table[row, col]
+            ))
+        return tuple(counts)
+
+    def get_max_precip_fraction(self, scene: int, crop_size: Tuple[int, int]) -> float:
+        """
+        The maximum fraction of precipitating pixels of all crops of a scene.
+        """
+        key = (scene,) + tuple(crop_size)
+        if key not in self._max_precip_fractions:
+            _, precip = self.get_tables(scene)
+            n_rows = min(crop_size[0], precip.shape[0] - 1)
+            n_cols = min(crop_size[1], precip.shape[1] - 1)
+            counts = (
+                precip[n_rows:, n_cols:] - precip[:-n_rows, n_cols:]
+                - precip[n_rows:, :-n_cols] + precip[:-n_rows, :-n_cols]
+            )
+            self._max_precip_fractions[key] = counts.max() / (n_rows * n_cols)
+        return self._max_precip_fractions[key]
+
+    def draw(
+            self,
+            scene: int,
+            crop_size: Tuple[int, int],
+            rng: np.random.Generator,
+            min_valid_fraction: float = 0.0,
+            precip_weight: float = 0.0,
+            max_attempts: int = 100,
+    ) -> Tuple[slice, slice]:
+        """
+        Draw a random crop from a scene.
+
+        Crop origins are drawn uniformly and rejected if the fraction of valid pixels
+        in the crop is below 'min_valid_fraction'. If 'precip_weight' is larger than 0,
+        crops are additionally accepted with probability
+        ``1 - precip_weight + precip_weight * f_p / f_p_max``, where ``f_p`` is the fraction
+        of precipitating pixels in the crop and ``f_p_max`` the maximum of ``f_p`` over all
+        crops of the scene. Each attempt requires only a constant number of operations.
+
+        Args:
+            scene: The index of the scene from which to draw the crop.
+            crop_size: The size of the crop.
+            rng: The random number generator to use.
+            min_valid_fraction: The minimum fraction of valid pixels in the crop.
+            precip_weight: A weight between 0 and 1 controlling the bias towards crops
+                containing precipitation.
+            max_attempts: The maximum number of crop origins to draw. If no crop is
+                accepted, the crop with the largest number of valid pixels is returned.
+
+        Return:
+            A tuple of slices defining the crop window.
+        """
+        n_rows, n_cols = self.get_scene_shape(scene)
+        crop_rows = min(crop_size[0], n_rows)
+        crop_cols = min(crop_size[1], n_cols)
+        n_pixels = crop_rows * crop_cols
+
+        max_precip_fraction = 0.0
+        if precip_weight > 0.0:
+            max_precip_fraction = self.get_max_precip_fraction(scene, crop_size)
+
+        best = None
+        for _ in range(max_attempts):
+            row = rng.integers(0, n_rows - crop_rows + 1)
+            col = rng.integers(0, n_cols - crop_cols + 1)
+            n_valid, n_precip = self.get_counts(scene, row, col, crop_size)
+            if best is None or best[0] < n_valid:
+                best = (n_valid, row, col)
+            if n_valid == 0 or n_valid < min_valid_fraction * n_pixels:
+                continue
+            if max_precip_fraction > 0.0:
+                prob = (
+                    1.0 - precip_weight
+                    + precip_weight * n_precip / n_pixels / max_precip_fraction
+                )
+                if rng.random() > prob:
+                    continue
+            best = (n_valid, row, col)
+            break
+
+        _, row, col = best
+        return slice(row, row + crop_size[0]), slice(col, col + crop_size[1])
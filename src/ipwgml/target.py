@@ -19,12 +19,34 @@ Members
 
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import numpy as np
 import xarray as xr
 
-from ipwgml.utils import open_if_required
+from ipwgml.utils import load_subset
+
+
+@dataclass
+class TargetBundle:
+    """
+    The reference data loaded from a target file by :meth:`TargetConfig.load_bundle`.
+
+    Attributes:
+        surface_precip: The reference precipitation with pixels not satisfying the
+            quality requirements set to NAN.
+        invalid: A boolean mask identifying the pixels that don't satisfy the
+            quality requirements.
+        precip_mask: A float mask identifying precipitating pixels with invalid
+            pixels set to NAN.
+        heavy_precip_mask: A float mask identifying pixels with heavy precipitation
+            with invalid pixels set to NAN.
+    """
+
+    surface_precip: np.ndarray
+    invalid: np.ndarray
+    precip_mask: np.ndarray
+    heavy_precip_mask: np.ndarray
 
 
 @dataclass
@@ -88,7 +110,11 @@ class TargetConfig:
         self.precip_threshold = precip_threshold
         self.heavy_precip_threshold = heavy_precip_threshold
 
-    def get_mask(self, target_data: Path | str | xr.Dataset) -> np.ndarray:
+    def get_mask(
+            self,
+            target_data: Path | str | xr.Dataset,
+            window: Optional[Dict[str, slice]] = None
+    ) -> np.ndarray:
         """
         Get mask identifying invalid reference samples according to the
         target config's settings.
@@ -96,44 +122,99 @@ class TargetConfig:
         Args:
             target_data: A Path or str pointing to a target data file or an xarray.Dataset containing
                 the data from a loaded retrieval target file.
+            window: An optional dictionary mapping the names of spatial dimensions to
+                slices defining a spatial window to load.
 
         Return:
             A field of bool values identifying the target samples that
             should be ignored.
         """
-        with open_if_required(target_data) as data:
+        data = load_subset(target_data, self.get_required_variables(), window)
 
-            target = data[self.target].data
+        target = data[self.target].data
 
-            valid = np.ones_like(target, dtype=bool)
+        valid = np.ones_like(target, dtype=bool)
 
-            # Allow for numerical inaccuracies to avoid noisy masks for min_rqi = 1.0.
-            if "radar_quality_index" in data:
-                rqi = data["radar_quality_index"].data
-                valid *= (rqi - self.min_rqi) > -1e-3
+        # Allow for numerical inaccuracies to avoid noisy masks for min_rqi = 1.0.
+        if "radar_quality_index" in data:
+            rqi = data["radar_quality_index"].data
+            valid *= (rqi - self.min_rqi) > -1e-3
 
-            # Allow for numerical inaccuracies to avoid noisy masks for min_valid_fraction = 1.0.
-            if "valid_fraction" in data:
-                valid_frac = data["valid_fraction"].data
-                valid *= valid_frac - self.min_valid_fraction > -1e-3
+        # Allow for numerical inaccuracies to avoid noisy masks for min_valid_fraction = 1.0.
+        if "valid_fraction" in data:
+            valid_frac = data["valid_fraction"].data
+            valid *= valid_frac - self.min_valid_fraction > -1e-3
 
-            if self.no_snow:
-                snow_frac = data["snow_fraction"].data
-                valid *= snow_frac == 0.0
+        if self.no_snow:
+            snow_frac = data["snow_fraction"].data
+            valid *= snow_frac == 0.0
 
-            if self.no_hail:
-                hail_frac = data["hail_fraction"].data
-                valid *= hail_frac == 0.0
+        if self.no_hail:
+            hail_frac = data["hail_fraction"].data
+            valid *= hail_frac == 0.0
 
-            if self.min_gcf is not None:
-                gcf = data["gauge_correction_factor"].data
-                valid *= self.min_gcf <= gcf
+        if self.min_gcf is not None:
+            gcf = data["gauge_correction_factor"].data
+            valid *= self.min_gcf <= gcf
 
-            if self.max_gcf is not None:
-                gcf = data["gauge_correction_factor"].data
-                valid *= gcf <= self.min_gcf
+        if self.max_gcf is not None:
+            gcf = data["gauge_correction_factor"].data
+            valid *= gcf <= self.min_gcf
         return ~valid
 
+    def get_required_variables(self) -> List[str]:
+        """
+        The names of the variables that must be read from a target file to load the
+        reference data according to the target config's settings.
+        """
+        variables = [self.target, "radar_quality_index", "valid_fraction"]
+        if self.no_snow:
+            variables.append("snow_fraction")
+        if self.no_hail:
+            variables.append("hail_fraction")
+        if self.min_gcf is not None or self.max_gcf is not None:
+            variables.append("gauge_correction_factor")
+        return variables
+
+    def load_bundle(
+            self,
+            target_data: Path | str | xr.Dataset,
+            window: Optional[Dict[str, slice]] = None
+    ) -> TargetBundle:
+        """
+        Load reference precipitation, quality mask, and precipitation masks in a
+        single pass.
+
+        In contrast to calling :meth:`load_reference_precip`, :meth:`load_precip_mask`,
+        and :meth:`load_heavy_precip_mask` separately, the variables required to
+        compute the quality mask are read only once.
+
+        Args:
+            target_data: A Path or str pointing to a target data file or an xarray.Dataset containing
+                the data from a loaded retrieval target file.
+            window: An optional dictionary mapping the names of spatial dimensions to
+                slices defining a spatial window to load.
+
+        Return:
+            A TargetBundle containing the loaded reference data.
+        """
+        data = load_subset(target_data, self.get_required_variables(), window).load()
+        target = np.asarray(data[self.target].data)
+        invalid = self.get_mask(data)
+
+        surface_precip = target.copy()
+        surface_precip[invalid] = np.nan
+        precip_mask = np.asarray(self.precip_threshold <= target, dtype=np.float32)
+        precip_mask[invalid] = np.nan
+        heavy_precip_mask = np.asarray(self.heavy_precip_threshold <= target, dtype=np.float32)
+        heavy_precip_mask[invalid] = np.nan
+        return TargetBundle(
+            surface_precip=surface_precip,
+            invalid=invalid,
+            precip_mask=precip_mask,
+            heavy_precip_mask=heavy_precip_mask,
+        )
+
     def to_dict(self) -> Dict[str, Any]:
         """
         .toml compatible dictionary representation of input config.
@@ -143,7 +224,11 @@ class TargetConfig:
             name: val for name, val in dct.items() if val is not None
         }
 
-    def load_reference_precip(self, target_data: Path | str | xr.Dataset) -> np.ndarray:
+    def load_reference_precip(
+            self,
+            target_data: Path | str | xr.Dataset,
+            window: Optional[Dict[str, slice]] = None
+    ) -> np.ndarray:
         """
         Loads reference precip field data from a target file. The method ensure that the correct
         target variable is selected and masks samples not satisfying the quality requirements
@@ -152,18 +237,23 @@ class TargetConfig:
         Args:
             target_data: A Path or str pointing to a target data file or an xarray.Dataset containing
                 the data from a loaded retrieval target file.
+            window: An optional dictionary mapping the names of spatial dimensions to
+                slices defining a spatial window to load.
 
         Return:
             A numpy.ndarray containing the loaded target data.
         """
-        with open_if_required(target_data) as data:
-            target = data[self.target].data.copy()
-            invalid = self.get_mask(data)
-            target[invalid] = np.nan
-        del data
-        return target.copy()
-
-    def load_precip_mask(self, target_data: Path | str | xr.Dataset) -> np.ndarray:
+        data = load_subset(target_data, self.get_required_variables(), window)
+        target = data[self.target].data.copy()
+        invalid = self.get_mask(data)
+        target[invalid] = np.nan
+        return target
+
+    def load_precip_mask(
+            self,
+            target_data: Path | str | xr.Dataset,
+            window: Optional[Dict[str, slice]] = None
+    ) -> np.ndarray:
         """
         Load mask identifying  precipitation identified according to the
         target config object's heavy precipitation threshold.
@@ -171,19 +261,25 @@ class TargetConfig:
         Args:
             target_data: A Path or str pointing to a target data file or an xarray.Dataset containing
                 the data from a loaded retrieval target file.
+            window: An optional dictionary mapping the names of spatial dimensions to
+                slices defining a spatial window to load.
 
         Return:
             A boolean numpy.ndarray containing the heavy precipitation mask.
         """
-        with open_if_required(target_data) as data:
-            target = data[self.target].data
-            mask = (self.precip_threshold <= target).astype(np.float32)
-            invalid = self.get_mask(data)
-            if isinstance(mask, np.ndarray):
-                mask[invalid] = np.nan
-        return mask.copy()
-
-    def load_heavy_precip_mask(self, target_data: Path | str | xr.Dataset) -> np.ndarray:
+        data = load_subset(target_data, self.get_required_variables(), window)
+        target = data[self.target].data
+        mask = (self.precip_threshold <= target).astype(np.float32)
+        invalid = self.get_mask(data)
+        if isinstance(mask, np.ndarray):
+            mask[invalid] = np.nan
+        return mask
+
+    def load_heavy_precip_mask(
+            self,
+            target_data: Path | str | xr.Dataset,
+            window: Optional[Dict[str, slice]] = None
+    ) -> np.ndarray:
         """
         Load mask identifying heavy precipitation identified according to the
         target config object's heavy precipitation threshold.
@@ -191,15 +287,17 @@ class TargetConfig:
         Args:
             target_data: A Path or str pointing to a target data file or an xarray.Dataset containing
                 the data from a loaded retrieval target file.
+            window: An optional dictionary mapping the names of spatial dimensions to
+                slices defining a spatial window to load.
 
         Return:
             A boolean numpy.ndarray containing the heavy precipitation mask.
 
         """
-        with open_if_required(target_data) as data:
-            target = data[self.target].data
-            mask = (self.heavy_precip_threshold <= target).astype(np.float32)
-            invalid = self.get_mask(data)
-            if isinstance(mask, np.ndarray):
-                mask[invalid] = np.nan
-        return mask.copy()
+        data = load_subset(target_data, self.get_required_variables(), window)
+        target = data[self.target].data
+        mask = (self.heavy_precip_threshold <= target).astype(np.float32)
+        invalid = self.get_mask(data)
+        if isinstance(mask, np.ndarray):
+            mask[invalid] = np.nan
+        return mask
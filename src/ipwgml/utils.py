@@ -5,16 +5,113 @@ ipwgml.utils
 Defines helper functions used throught the ipwgml package.
 """
 
+from collections import OrderedDict
 from contextlib import contextmanager
 from datetime import datetime
+from functools import cache
 import gc
+import json
+import os
 from pathlib import Path
-from typing import Union
+import shutil
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import weakref
 
 import hdf5plugin
+import numpy as np
 import xarray as xr
 
 
+def get_zarr_group(path: str | Path) -> Optional[Tuple[Path, str]]:
+    """
+    Split a path pointing to a scene in a Zarr store into the store and the group.
+
+    Args:
+        path: A path pointing to a NetCDF file or to a group within a Zarr store.
+
+    Return:
+        A tuple ``(store, group)`` containing the path of the Zarr store and the name
+        of the group or 'None' if the path doesn't point into a Zarr store.
+    """
+    parts = Path(path).parts
+    for ind, part in enumerate(parts):
+        if part.endswith(".zarr"):
+            return Path(*parts[:ind + 1]), "/".join(parts[ind + 1:])
+    return None
+
+
+@cache
+def _open_zarr_store(store: str, pid: int) -> Any:
+    """
+    Open the root group of a consolidated Zarr store.
+
+    The result is cached so that the consolidated metadata of each store is read only
+    once per process. The process ID is part of the cache key so that worker
+    processes don't reuse groups opened in their parent.
+
+    Args:
+        store: The path of the Zarr store.
+        pid: The ID of the calling process.
+
+    Return:
+        The root zarr.Group of the store.
+    """
+    try:
+        import zarr
+    except ImportError:
+        raise RuntimeError(
+            "Reading data from a Zarr store requires the 'zarr' package to be installed."
+        )
+    return zarr.open_consolidated(store, mode="r")
+
+
+def open_dataset(path: str | Path) -> xr.Dataset:
+    """
+    Lazily open a training scene from a NetCDF file or a Zarr store.
+
+    Args:
+        path: A path pointing to a NetCDF file or to the group of a scene in a
+            consolidated Zarr store created using :func:`ipwgml.data.convert_to_zarr`.
+
+    Return:
+        A lazily opened xarray.Dataset providing access to the data of the scene.
+    """
+    zarr_group = get_zarr_group(path)
+    if zarr_group is None:
+        return xr.open_dataset(path, engine="h5netcdf", cache=False)
+    store, group = zarr_group
+    # With zarr 2, the store of the cached root group serves the metadata from the
+    # consolidated metadata in memory and the chunks from its separate chunk store.
+    # With zarr 3, only the metadata of the requested group is read.
+    root = _open_zarr_store(str(store.resolve()), os.getpid())
+    kwargs = {}
+    if getattr(root, "chunk_store", None) is not None:
+        kwargs["chunk_store"] = root.chunk_store
+    return xr.open_zarr(
+        root.store,
+        group=group if group else None,
+        consolidated=False,
+        chunks=None,
+        **kwargs
+    )
+
+
+def load_dataset(path: str | Path) -> xr.Dataset:
+    """
+    Load a training scene from a NetCDF file or a Zarr store into memory.
+
+    Args:
+        path: A path pointing to a NetCDF file or to the group of a scene in a
+            Zarr store.
+
+    Return:
+        An xarray.Dataset containing the data of the scene.
+    """
+    with open_dataset(path) as data:
+        return data.load()
+
+
 @contextmanager
 def open_if_required(path_or_dataset: str | Path | xr.Dataset) -> xr.Dataset:
     """
@@ -29,7 +126,7 @@ def open_if_required(path_or_dataset: str | Path | xr.Dataset) -> xr.Dataset:
     """
     try:
         if isinstance(path_or_dataset, (str, Path)):
-            handle = xr.load_dataset(path_or_dataset)
+            handle = load_dataset(path_or_dataset)
             yield handle
         else:
             handle = None
@@ -41,13 +138,269 @@ def open_if_required(path_or_dataset: str | Path | xr.Dataset) -> xr.Dataset:
         del handle
 
 
+def load_subset(
+    path_or_dataset: str | Path | xr.Dataset,
+    variables: List[str],
+    indexers: Optional[Dict[str, Any]] = None,
+) -> xr.Dataset:
+    """
+    Load a subset of the variables and elements from a NetCDF4 file.
+
+    In contrast to loading the file using ``xarray.load_dataset``, only the requested
+    variables are decoded and, if indexers are given, only the selected elements, such
+    as channels, time steps, or a spatial window, are read from the file.
+
+    Args:
+        path_or_dataset: A Path pointing to a NetCDF4 file to read the data from or
+            an already loaded dataset.
+        variables: The names of the variables to load. Variables that are not
+            present in the file are ignored.
+        indexers: An optional dictionary mapping dimension names to integer,
+            slice, or list indexers to apply to the loaded variables. Indexers for
+            dimensions that are not present in the file are ignored.
+
+    Return:
+        An xarray.Dataset containing the selected data loaded into memory. If
+        'path_or_dataset' is a lazily opened dataset, the data is loaded into a new
+        dataset and 'path_or_dataset' remains unchanged.
+    """
+    def select(data: xr.Dataset) -> xr.Dataset:
+        data = data[[name for name in variables if name in data]]
+        if indexers is not None:
+            data = data[
+                {dim: ind for dim, ind in indexers.items() if dim in data.dims}
+            ]
+        return data
+
+    if isinstance(path_or_dataset, (str, Path)):
+        with open_dataset(path_or_dataset) as data:
+            return select(data).load()
+    return select(path_or_dataset).compute()
+
+
+class FileHandleCache:
+    """
+    A least-recently-used cache of open NetCDF files.
+
+    Opening HDF5 files is expensive, so the FileHandleCache keeps up to a maximum number
+    of lazily opened datasets and closes the least recently used one when the limit
+    is exceeded. Handles are never shared between processes: When the cache is
+    accessed from a process other than the one that created it, for example a forked
+    data loader worker, or when it is pickled, the cached handles are discarded.
+    """
+    def __init__(self, max_handles: int = 16):
+        """
+        Args:
+            max_handles: The maximum number of files to keep open.
+        """
+        self.max_handles = max_handles
+        self._handles = OrderedDict()
+        self._pid = os.getpid()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_handles"] = OrderedDict()
+        return state
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def get(self, path: str | Path) -> xr.Dataset:
+        """
+        Get a lazily opened dataset for a file.
+
+        Args:
+            path: The path of the NetCDF file to open.
+
+        Return:
+            An xarray.Dataset providing access to the data in the file. The dataset
+            is owned by the cache and must not be closed by the caller.
+        """
+        if self._pid != os.getpid():
+            # Drop handles inherited from the parent process without closing them.
+            self._handles = OrderedDict()
+            self._pid = os.getpid()
+
+        path = str(path)
+        handle = self._handles.get(path)
+        if handle is not None:
+            self._handles.move_to_end(path)
+            return handle
+
+        handle = open_dataset(path)
+        self._handles[path] = handle
+        while len(self._handles) > self.max_handles:
+            _, evicted = self._handles.popitem(last=False)
+            evicted.close()
+        return handle
+
+    def close(self) -> None:
+        """
+        Close all cached files.
+        """
+        if self._pid == os.getpid():
+            for handle in self._handles.values():
+                handle.close()
+        self._handles = OrderedDict()
+
+
+@contextmanager
+def write_atomically(path: str | Path, directory: bool = False) -> Iterator[Path]:
+    """
+    Context manager to atomically create a file or directory.
+
+    Yields a temporary path in the parent directory of 'path' to which the content
+    should be written. When the block exits without an exception, the temporary path
+    is renamed to 'path', so that other processes never see a partially written
+    result. Existing files are replaced. If 'directory' is 'True' and the
+    directory has been created concurrently by another process, the temporary
+    directory is discarded. The temporary path is always removed on exit.
+
+    Args:
+        path: The path of the file or directory to create.
+        directory: Whether to create a directory instead of a file.
+
+    Return:
+        The temporary path to which to write the file or the directory's content.
+        For directories, the temporary directory already exists.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    prefix = f".{path.name}."
+    if directory:
+        tmp = Path(tempfile.mkdtemp(dir=path.parent, prefix=prefix))
+    else:
+        handle, tmp = tempfile.mkstemp(dir=path.parent, prefix=prefix, suffix=path.suffix)
+        os.close(handle)
+        tmp = Path(tmp)
+    try:
+        yield tmp
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            if not (directory and path.is_dir()):
+                raise
+    finally:
+        if tmp.is_dir():
+            shutil.rmtree(tmp, ignore_errors=True)
+        elif tmp.exists():
+            tmp.unlink()
+
+
+def _remove_cache_dir(path: Path, pid: int) -> None:
+    """
+    Remove a cache directory if called from the process that created it.
+    """
+    if os.getpid() == pid:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class SceneCache:
+    """
+    A least-recently-used cache of numpy arrays with a limit on the total size in bytes.
+
+    The cache stores each entry as a directory of '.npy' files, which are memory-mapped
+    when the entry is read. All state is kept in the cache directory, so the cache
+    can be shared between the processes of a data loader. By default, the directory is
+    created in '/dev/shm' so that the cached arrays reside in shared memory. Entries are
+    written atomically and the least recently accessed entries are removed when the
+    total size exceeds the limit. The directory is removed when the cache object
+    in the process that created it is garbage collected or the interpreter exits.
+    """
+    def __init__(self, max_bytes: int, path: Optional[Path] = None):
+        """
+        Args:
+            max_bytes: The maximum size of all cached arrays in bytes.
+            path: An optional path in which to create the cache directory. Defaults to
+                '/dev/shm' if available and the system's temporary directory otherwise.
+        """
+        if path is None and Path("/dev/shm").is_dir():
+            path = Path("/dev/shm")
+        self.max_bytes = max_bytes
+        self.path = Path(tempfile.mkdtemp(prefix="ipwgml_scene_cache_", dir=path))
+        self._finalizer = weakref.finalize(self, _remove_cache_dir, self.path, os.getpid())
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_finalizer"] = None
+        return state
+
+    def get(self, key: Any) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Get a cached entry.
+
+        Args:
+            key: The key identifying the entry.
+
+        Return:
+            A dictionary containing the memory-mapped arrays of the entry or 'None' if
+            the entry is not in the cache.
+        """
+        entry = self.path / str(key)
+        try:
+            with open(entry / "names.json") as names_file:
+                names = json.load(names_file)
+            arrays = {
+                name: np.load(entry / f"{ind}.npy", mmap_mode="r")
+                for ind, name in enumerate(names)
+            }
+            os.utime(entry)
+        except (OSError, ValueError):
+            return None
+        return arrays
+
+    def put(self, key: Any, arrays: Dict[str, np.ndarray]) -> None:
+        """
+        Add an entry to the cache and evict least recently used entries if the size
+        limit is exceeded.
+
+        Args:
+            key: The key identifying the entry.
+            arrays: A dictionary containing the arrays to cache.
+        """
+        entry = self.path / str(key)
+        if entry.exists():
+            return
+        if sum([arr.nbytes for arr in arrays.values()]) > self.max_bytes:
+            return
+
+        with write_atomically(entry, directory=True) as tmp:
+            for ind, arr in enumerate(arrays.values()):
+                np.save(tmp / f"{ind}.npy", np.asarray(arr))
+            with open(tmp / "names.json", "w") as names_file:
+                json.dump(list(arrays), names_file)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove least recently used entries until the cache size is within the limit.
+        """
+        entries = []
+        for entry in self.path.iterdir():
+            if entry.name.startswith("."):
+                continue
+            try:
+                size = sum([path.stat().st_size for path in entry.iterdir()])
+                entries.append((entry.stat().st_mtime, size, entry))
+            except OSError:
+                continue
+
+        total = sum([size for _, size, _ in entries])
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+
 def get_median_time(path: Union[Path, str]) -> datetime:
     """
-    Extract median time from filename.
+    Extract median time from filename or the name of a scene in a Zarr store.
     """
-    if isinstance(path, Path):
-        path = path.name
-    date = datetime.strptime(path.split("_")[-1][:-3], "%Y%m%d%H%M%S")
+    name = Path(path).name
+    if name.endswith(".nc"):
+        name = name[:-3]
+    date = datetime.strptime(name.split("_")[-1], "%Y%m%d%H%M%S")
     return date
 
 
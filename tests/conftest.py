@@ -158,3 +158,107 @@ def satrain_gmi_testing(tmp_path_factory):
                 destination=dest
             )
     return dest
+
+
+def write_synthetic_scene(path, time, rng, shape=(40, 50)):
+    """
+    Write synthetic GMI, ancillary, and target files for a single SatRain scene.
+
+    Args:
+        path: The directory containing the data of the domain.
+        time: The time stamp of the scene as string.
+        rng: The numpy random generator to use to generate the data.
+        shape: The shape of the scene.
+    """
+    import numpy as np
+    import xarray as xr
+    from ipwgml.definitions import ANCILLARY_VARIABLES
+
+    time_np = np.datetime64(
+        f"{time[:4]}-{time[4:6]}-{time[6:8]}T{time[8:10]}:{time[10:12]}:{time[12:14]}"
+    )
+    for geometry in ["gridded", "on_swath"]:
+        if geometry == "gridded":
+            dims = ("latitude", "longitude")
+            coords = {
+                "latitude": np.linspace(30, 35, shape[0]),
+                "longitude": np.linspace(-100, -94, shape[1]),
+            }
+        else:
+            dims = ("scan", "pixel")
+            coords = {
+                "latitude": (dims, rng.uniform(30, 35, shape).astype(np.float32)),
+                "longitude": (dims, rng.uniform(-100, -94, shape).astype(np.float32)),
+            }
+        output_path = path / geometry / time[:4] / time[4:6] / time[6:8]
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        surface_precip = rng.gamma(0.3, 3.0, size=shape) - 0.2
+        surface_precip = np.maximum(surface_precip, 0.0).astype(np.float32)
+        surface_precip[:3] = np.nan
+
+        def uniform(low=0.0, high=1.0):
+            return (dims, rng.uniform(low, high, shape).astype(np.float32))
+
+        target = xr.Dataset(
+            {
+                "surface_precip": (dims, surface_precip),
+                "surface_precip_fpavg": (dims, surface_precip),
+                "radar_quality_index": uniform(0.3),
+                "valid_fraction": uniform(0.3),
+                "precip_fraction": uniform(),
+                "snow_fraction": uniform(),
+                "hail_fraction": uniform(),
+                "convective_fraction": uniform(),
+                "stratiform_fraction": uniform(),
+                "gauge_correction_factor": uniform(0.5, 2.0),
+                "time": (dims, np.full(shape, time_np)),
+                "scan_index": (dims, np.broadcast_to(np.arange(shape[0])[:, None], shape)),
+                "pixel_index": (dims, np.broadcast_to(np.arange(shape[1])[None], shape)),
+            },
+            coords=coords,
+        )
+        target.to_netcdf(output_path / f"target_{time}.nc", engine="h5netcdf")
+
+        channel_dims = ("channel",) + dims
+        channel_shape = (13,) + shape
+        gmi = xr.Dataset(
+            {
+                "observations": (
+                    channel_dims,
+                    rng.uniform(100, 300, channel_shape).astype(np.float32)
+                ),
+                "earth_incidence_angle": (
+                    channel_dims,
+                    rng.uniform(40, 60, channel_shape).astype(np.float32)
+                ),
+            },
+            coords=coords,
+        )
+        gmi.attrs["sensor"] = "gmi"
+        gmi.to_netcdf(output_path / f"gmi_{time}.nc", engine="h5netcdf")
+
+        ancillary = xr.Dataset(
+            {
+                name: (dims, rng.normal(size=shape).astype(np.float32))
+                for name in ANCILLARY_VARIABLES
+            },
+            coords=coords,
+        )
+        ancillary.to_netcdf(output_path / f"ancillary_{time}.nc", engine="h5netcdf")
+
+
+@pytest.fixture(scope="session")
+def satrain_gmi_testing_synthetic(tmp_path_factory):
+    """
+    Fixture providing synthetic SatRain test data for GMI that doesn't require
+    downloading any files.
+    """
+    import numpy as np
+
+    dest = tmp_path_factory.mktemp("ipwgml")
+    rng = np.random.default_rng(42)
+    domain_path = dest / "satrain" / "gmi" / "testing" / "conus"
+    for time in ["20220101022714", "20220102031500", "20220103120000"]:
+        write_synthetic_scene(domain_path, time, rng)
+    return dest
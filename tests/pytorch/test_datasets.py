@@ -2,9 +2,19 @@
 Tests for the ipwgml.pytorch.data module.
 """
 
+from math import ceil
+
+import numpy as np
 import torch
 
-from ipwgml.pytorch.datasets import SatRainTabular, SatRainSpatial
+from ipwgml.pytorch.datasets import (
+    SatRainTabular,
+    SatRainTabularStream,
+    SatRainShards,
+    SatRainSpatial,
+    SatRainTiles,
+    write_shards
+)
 
 
 def test_dataset_satrain_tabular(satrain_gmi_on_swath_train):
@@ -107,6 +117,127 @@ def test_dataset_satrain_tabular_batched(satrain_gmi_on_swath_train):
             assert y["surface_precip"].numel() == batch_size
 
 
+def test_dataset_satrain_tabular_cached(satrain_gmi_on_swath_train, tmp_path):
+    """
+    Test that cached tabular data is memory-mapped and identical to the uncached data.
+    """
+    data_path = satrain_gmi_on_swath_train
+    kwargs = dict(
+        base_sensor="gmi",
+        geometry="on_swath",
+        split="training",
+        retrieval_input=["gmi", "geo_ir", "ancillary"],
+        ipwgml_path=data_path,
+        download=False,
+        batch_size=256,
+        shuffle=False,
+    )
+    dataset = SatRainTabular(**kwargs)
+    SatRainTabular(cache=True, cache_path=tmp_path, **kwargs)
+    dataset_cached = SatRainTabular(cache=True, cache_path=tmp_path, **kwargs)
+
+    assert len(list((tmp_path / "tabular").iterdir())) == 1
+    assert isinstance(dataset_cached.target_data.surface_precip.data, np.memmap)
+    assert len(dataset) == len(dataset_cached)
+
+    x, y = dataset[0]
+    x_c, y_c = dataset_cached[0]
+    for name in x:
+        assert torch.allclose(x[name], x_c[name], equal_nan=True)
+    assert torch.allclose(y["surface_precip"], y_c["surface_precip"], equal_nan=True)
+
+
+def test_dataset_satrain_tabular_precomputed(satrain_gmi_on_swath_train):
+    """
+    Test that precomputed tabular data is identical to data loaded per batch.
+    """
+    data_path = satrain_gmi_on_swath_train
+    for stack in [False, True]:
+        kwargs = dict(
+            base_sensor="gmi",
+            geometry="on_swath",
+            split="training",
+            retrieval_input=["gmi", "geo_ir", "ancillary"],
+            ipwgml_path=data_path,
+            download=False,
+            batch_size=256,
+            shuffle=False,
+            stack=stack,
+        )
+        dataset = SatRainTabular(**kwargs)
+        dataset_pre = SatRainTabular(precompute=True, **kwargs)
+        assert dataset_pre.features.dtype == np.float32
+        assert len(dataset) == len(dataset_pre)
+
+        x, y = dataset[0]
+        x_p, y_p = dataset_pre[0]
+        if stack:
+            x, x_p = {"input": x}, {"input": x_p}
+        for name in x:
+            assert x[name].shape == x_p[name].shape
+            assert torch.allclose(x[name], x_p[name], equal_nan=True)
+        for name in y:
+            assert torch.allclose(y[name], y_p[name], equal_nan=True)
+
+
+def test_dataset_satrain_tabular_load_subsample(satrain_gmi_on_swath_train):
+    """
+    Test that subsampling at load time only loads the selected samples and retains heavy
+    precipitation samples when stratified.
+    """
+    data_path = satrain_gmi_on_swath_train
+    kwargs = dict(
+        base_sensor="gmi",
+        geometry="on_swath",
+        split="training",
+        retrieval_input=["gmi"],
+        ipwgml_path=data_path,
+        download=False,
+        batch_size=256,
+    )
+    dataset = SatRainTabular(**kwargs)
+    n_samples = dataset.target_data.samples.size
+
+    dataset_sub = SatRainTabular(load_subsample=0.1, **kwargs)
+    assert dataset_sub.target_data.samples.size == round(0.1 * n_samples)
+
+    dataset_sub = SatRainTabular(load_subsample=1000, stratify=True, **kwargs)
+    assert dataset_sub.target_data.samples.size == 1000
+    n_heavy = (dataset.target_data.surface_precip.data >= 10.0).sum()
+    n_heavy_sub = (dataset_sub.target_data.surface_precip.data >= 10.0).sum()
+    assert n_heavy_sub == min(n_heavy, 1000 // 3)
+
+
+def test_dataset_satrain_tabular_stream(satrain_gmi_on_swath_train):
+    """
+    Test that streaming tabular data yields all samples of the SatRainTabular dataset
+    and that scenes are split between data loader workers without overlap.
+    """
+    data_path = satrain_gmi_on_swath_train
+    kwargs = dict(
+        base_sensor="gmi",
+        geometry="on_swath",
+        split="training",
+        retrieval_input=["gmi", "geo_ir", "ancillary"],
+        ipwgml_path=data_path,
+        download=False,
+        batch_size=256,
+        stack=True,
+    )
+    dataset = SatRainTabular(shuffle=False, precompute=True, **kwargs)
+    features = np.nan_to_num(dataset.features)
+    features = features[np.lexsort(features.T)]
+
+    dataset_stream = SatRainTabularStream(buffer_size=4096, **kwargs)
+    data_loader = torch.utils.data.DataLoader(dataset_stream, batch_size=None, num_workers=2)
+    batches = list(data_loader)
+    assert sum([x.shape[0] < 256 for x, _ in batches]) <= 2
+
+    features_stream = np.nan_to_num(torch.cat([x for x, _ in batches]).numpy())
+    features_stream = features_stream[np.lexsort(features_stream.T)]
+    assert np.all(features == features_stream)
+
+
 def test_dataset_satrain_spatial(satrain_gmi_gridded_train):
     """
     Test loading of tabular data from the SatRain dataset.
@@ -147,3 +278,166 @@ def test_dataset_satrain_spatial_stacked(satrain_gmi_gridded_train):
     assert len(dataset) > 0
     x, y = next(iter(dataset))
     assert isinstance(x, torch.Tensor)
+
+
+def test_dataset_satrain_spatial_cropped(satrain_gmi_gridded_train):
+    """
+    Test that cropped samples match the corresponding window of the full scenes.
+    """
+    data_path = satrain_gmi_gridded_train
+    kwargs = dict(
+        base_sensor="gmi",
+        geometry="gridded",
+        split="training",
+        retrieval_input=["gmi", "ancillary", "geo_ir"],
+        augment=False,
+        ipwgml_path=data_path,
+        download=False,
+    )
+    dataset = SatRainSpatial(**kwargs)
+    dataset_cropped = SatRainSpatial(crop_size=(64, 96), **kwargs)
+
+    dataset_cropped.rng = np.random.default_rng(42)
+    window, _ = dataset_cropped.get_crop(dataset_cropped.get_target_files()[0])
+    dataset_cropped.rng = np.random.default_rng(42)
+    x_c, y_c = dataset_cropped[0]
+    x, y = dataset[0]
+    rows, cols = window.values()
+
+    assert y_c["surface_precip"].shape == (64, 96)
+    assert torch.isfinite(y_c["surface_precip"]).any()
+    for name in x:
+        assert torch.allclose(x[name][..., rows, cols], x_c[name], equal_nan=True)
+    for name in y:
+        assert torch.allclose(y[name][rows, cols], y_c[name], equal_nan=True)
+
+
+def test_dataset_satrain_spatial_scene_cache(satrain_gmi_gridded_train, tmp_path):
+    """
+    Test that scenes loaded from the scene cache are identical to freshly loaded scenes.
+    """
+    data_path = satrain_gmi_gridded_train
+    kwargs = dict(
+        base_sensor="gmi",
+        geometry="gridded",
+        split="training",
+        retrieval_input=["gmi", "ancillary", "geo_ir"],
+        augment=False,
+        ipwgml_path=data_path,
+        download=False,
+    )
+    dataset = SatRainSpatial(**kwargs)
+    dataset_cached = SatRainSpatial(
+        scene_cache_size=10 ** 9, scene_cache_path=tmp_path, **kwargs
+    )
+
+    x, y = dataset[0]
+    for _ in range(2):
+        x_c, y_c = dataset_cached[0]
+        for name in x:
+            assert torch.allclose(x[name], x_c[name], equal_nan=True)
+        for name in y:
+            assert torch.allclose(y[name], y_c[name], equal_nan=True)
+    assert dataset_cached.scene_cache.get(0) is not None
+
+
+def test_dataset_satrain_spatial_crop_index(satrain_gmi_gridded_train, tmp_path):
+    """
+    Test that crops drawn using the crop index satisfy the minimum valid fraction and
+    that the crop index is reused.
+    """
+    data_path = satrain_gmi_gridded_train
+    kwargs = dict(
+        base_sensor="gmi",
+        geometry="gridded",
+        split="training",
+        retrieval_input=["gmi", "ancillary", "geo_ir"],
+        ipwgml_path=data_path,
+        download=False,
+        crop_size=64,
+        min_valid_fraction=0.5,
+        precip_weight=0.5,
+        crop_index_path=tmp_path,
+    )
+    dataset = SatRainSpatial(**kwargs)
+    dataset = SatRainSpatial(**kwargs)
+    assert len(list((tmp_path / "crop_index").iterdir())) == 1
+
+    for ind in range(len(dataset)):
+        x, y = dataset[ind]
+        assert y["surface_precip"].shape == (64, 64)
+        assert torch.isfinite(y["surface_precip"]).float().mean() >= 0.5
+
+
+def test_dataset_satrain_tiles(satrain_gmi_gridded_train, tmp_path):
+    """
+    Test that tiles have a fixed size, contain valid reference pixels, and match the
+    corresponding window of the full scenes.
+    """
+    data_path = satrain_gmi_gridded_train
+    kwargs = dict(
+        base_sensor="gmi",
+        geometry="gridded",
+        split="training",
+        retrieval_input=["gmi", "ancillary", "geo_ir"],
+        augment=False,
+        ipwgml_path=data_path,
+        download=False,
+    )
+    dataset = SatRainSpatial(**kwargs)
+    dataset_tiles = SatRainTiles(
+        tile_size=64, overlap=16, tile_index_path=tmp_path, **kwargs
+    )
+    assert len(list((tmp_path / "tile_index").iterdir())) == 1
+    assert len(dataset_tiles) > len(dataset)
+
+    for ind in range(len(dataset_tiles)):
+        x_t, y_t = dataset_tiles[ind]
+        assert y_t["surface_precip"].shape == (64, 64)
+        assert torch.isfinite(y_t["surface_precip"]).any()
+
+    scene, row, col = dataset_tiles.tile_index[-1]
+    x, y = dataset[scene]
+    rows, cols = slice(row, row + 64), slice(col, col + 64)
+    for name in x:
+        assert torch.allclose(x[name][..., rows, cols], x_t[name], equal_nan=True)
+    for name in y:
+        assert torch.allclose(y[name][rows, cols], y_t[name], equal_nan=True)
+
+
+def test_dataset_satrain_shards(satrain_gmi_gridded_train, tmp_path):
+    """
+    Test that samples read from shards are identical to the samples of the repacked
+    dataset and that shuffling yields each sample exactly once.
+    """
+    data_path = satrain_gmi_gridded_train
+    dataset = SatRainTiles(
+        base_sensor="gmi",
+        geometry="gridded",
+        split="training",
+        retrieval_input=["gmi", "ancillary", "geo_ir"],
+        stack=True,
+        augment=False,
+        ipwgml_path=data_path,
+        download=False,
+        tile_size=64,
+        tile_index_path=tmp_path,
+    )
+    write_shards(dataset, tmp_path / "shards", samples_per_shard=4, compression="zstd")
+
+    dataset_shards = SatRainShards(tmp_path / "shards", shuffle=False, augment=False)
+    assert len(dataset_shards) == len(dataset)
+    assert len(dataset_shards.shards) == ceil(len(dataset) / 4)
+    for ind, (x_s, y_s) in enumerate(dataset_shards):
+        x, y = dataset[ind]
+        assert torch.allclose(x, x_s, equal_nan=True)
+        for name in y:
+            assert torch.allclose(y[name], y_s[name], equal_nan=True)
+
+    dataset_shards = SatRainShards(tmp_path / "shards")
+    data_loader = torch.utils.data.DataLoader(dataset_shards, batch_size=2, num_workers=2)
+    x_s = torch.cat([x for x, _ in data_loader])
+    x = torch.stack([dataset[ind][0] for ind in range(len(dataset))])
+    sums_s = torch.nan_to_num(x_s).sum((1, 2, 3)).sort()[0]
+    sums = torch.nan_to_num(x).sum((1, 2, 3)).sort()[0]
+    assert torch.allclose(sums, sums_s)
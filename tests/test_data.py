@@ -1,16 +1,25 @@
 """
 Tests for the ipwgml.data module.
 """
+from concurrent.futures import ThreadPoolExecutor
 import os
+import shutil
 
+import numpy as np
 import pytest
 
+import ipwgml.data
+
 from ipwgml.data import (
+    _map_bounded,
+    convert_to_zarr,
+    download_missing,
     enable_testing,
     get_files_in_dataset,
     get_local_files,
     load_tabular_data
 )
+from ipwgml.utils import load_subset
 
 
 def test_get_files_in_dataset():
@@ -77,3 +86,137 @@ def test_load_tabular_data(request, sensor_and_fixture):
     assert sensor in inpt
     assert 0 < inpt[sensor].samples.size
     assert inpt[sensor].samples.size == target.samples.size
+
+
+@pytest.mark.parametrize("sensor_and_fixture", [["gmi", "satrain_gmi_on_swath_train"]])
+def test_load_tabular_data_parallel(request, sensor_and_fixture):
+    """
+    Ensure that loading tabular data with multiple workers yields the same samples in the
+    same order as loading it sequentially.
+    """
+    sensor, fixture = sensor_and_fixture
+    data_path = request.getfixturevalue(fixture)
+
+    inpt, target = load_tabular_data("satrain", sensor, "on_swath", "training", "xs", [sensor], data_path=data_path)
+    inpt_p, target_p = load_tabular_data(
+        "satrain", sensor, "on_swath", "training", "xs", [sensor], data_path=data_path, n_workers=2
+    )
+    assert inpt[sensor].identical(inpt_p[sensor])
+    assert target.identical(target_p)
+
+
+def test_map_bounded():
+    """
+    Ensure that _map_bounded returns the results in order and doesn't submit more
+    than 'max_in_flight' tasks ahead of the consumed results.
+    """
+    calls = []
+
+    def square(value):
+        calls.append(value)
+        return value ** 2
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = _map_bounded(pool, square, range(10), max_in_flight=3)
+        assert next(results) == 0
+        assert len(calls) <= 3
+        assert list(results) == [value ** 2 for value in range(1, 10)]
+
+
+def test_convert_to_zarr(satrain_gmi_gridded_train, tmp_path):
+    """
+    Ensure that the scenes of a converted split are found in the Zarr store and that
+    loading data from the Zarr store yields the same data as loading the NetCDF files.
+    """
+    pytest.importorskip("zarr")
+    shutil.copytree(satrain_gmi_gridded_train / "satrain", tmp_path / "satrain")
+    files_nc = get_local_files("satrain", "gmi", "gridded", "training", "xs", data_path=tmp_path)
+
+    stores = convert_to_zarr(
+        "gmi", "gridded", "training", "xs",
+        data_path=tmp_path,
+        chunks={"latitude": 32, "longitude": 32}
+    )
+    assert len(stores) == 1
+    files_zarr = get_local_files("satrain", "gmi", "gridded", "training", "xs", data_path=tmp_path)
+
+    for source in ["gmi", "target"]:
+        assert len(files_zarr[source]) == len(files_nc[source])
+        assert ".zarr" in str(files_zarr[source][0])
+        window = {"latitude": slice(8, 40), "longitude": slice(16, 48)}
+        data_nc = load_subset(files_nc[source][0], ["observations", "surface_precip"], window)
+        data_zarr = load_subset(files_zarr[source][0], ["observations", "surface_precip"], window)
+        for name in data_nc:
+            assert np.allclose(data_nc[name].data, data_zarr[name].data, equal_nan=True)
+
+
+def test_download_missing_after_conversion(
+        satrain_gmi_testing_synthetic,
+        tmp_path,
+        monkeypatch
+):
+    """
+    Ensure that scenes converted to a Zarr store aren't downloaded again even if the
+    NetCDF files have been removed and that scenes downloaded after the conversion
+    are listed together with the converted scenes.
+    """
+    pytest.importorskip("zarr")
+    sources = ["gmi", "ancillary", "target"]
+    shutil.copytree(satrain_gmi_testing_synthetic / "satrain", tmp_path / "satrain")
+    files = get_local_files(
+        "satrain", "gmi", "gridded", "testing", domain="conus",
+        data_path=tmp_path, relative_to=tmp_path
+    )
+    listing = {"gmi": {"testing": {"conus": {"gridded": {
+        source: [str(path) for path in paths] for source, paths in files.items()
+    }}}}}
+    requested = []
+
+    def download_files(base_url, files, destination, progress_bar=True):
+        # Create downloaded files by copying the first scene of the source.
+        for path in files:
+            source = path.split("/")[-1].rsplit("_", 1)[0]
+            template = listing["gmi"]["testing"]["conus"]["gridded"][source][0]
+            (destination / path).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy(satrain_gmi_testing_synthetic / template, destination / path)
+        requested.extend(files)
+        return files
+
+    monkeypatch.setattr(ipwgml.data, "get_files_in_dataset", lambda name: listing)
+    monkeypatch.setattr(ipwgml.data, "download_files", download_files)
+
+    def download():
+        for source in sources:
+            download_missing(
+                "satrain", "gmi", "gridded", "testing", source,
+                domain="conus", destination=tmp_path
+            )
+
+    download()
+    assert len(requested) == 0
+
+    convert_to_zarr("gmi", "gridded", "testing", domain="conus", data_path=tmp_path)
+    download()
+    assert len(requested) == 0
+
+    split_path = tmp_path / "satrain" / "gmi" / "testing" / "conus" / "gridded"
+    shutil.rmtree(split_path)
+    download()
+    assert len(requested) == 0
+
+    new_files = [
+        f"satrain/gmi/testing/conus/gridded/2022/01/04/{source}_20220104000000.nc"
+        for source in sources
+    ]
+    for source, path in zip(sources, new_files):
+        listing["gmi"]["testing"]["conus"]["gridded"][source].append(path)
+    download()
+    assert requested == new_files
+
+    files = get_local_files(
+        "satrain", "gmi", "gridded", "testing", domain="conus", data_path=tmp_path
+    )
+    for source, path in zip(sources, new_files):
+        assert len(files[source]) == 4
+        assert all(".zarr" in str(path) for path in files[source][:3])
+        assert files[source][3] == tmp_path / path
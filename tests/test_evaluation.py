@@ -18,6 +18,9 @@ from ipwgml.evaluation import (
     load_retrieval_input_data,
     process_scene_spatial,
     process_scene_tabular,
+    TileScheduler,
+    ArrayRetrieval,
+    ArrayFunctionRetrieval,
 )
 from ipwgml.input import InputConfig, GMI, Ancillary
 from ipwgml.metrics import Metric, Bias, MSE, CorrelationCoef
@@ -796,3 +799,289 @@ def test_evaluate(geometry, satrain_gmi_testing, tmp_path):
     assert len(files) > 0
 
     results = evaluator.get_results()
+
+
+class ObservationRetrieval:
+    """
+    Synthetic retrieval deriving precipitation estimates from the GMI observations.
+    """
+    def __call__(self, input_data):
+        obs = input_data.obs_gmi.transpose("batch", "features_gmi", ...).data[:, 0]
+        surface_precip = np.abs(obs)
+        dims = ("batch",) + input_data.obs_gmi.dims[-2:]
+        return xr.Dataset({
+            "surface_precip": (dims, surface_precip),
+            "precip_flag": (dims, surface_precip > 0.5),
+        })
+
+
+def make_observation_retrieval():
+    """
+    Retrieval factory used to create the retrieval in the worker processes.
+    """
+    return ObservationRetrieval()
+
+
+def test_evaluate_pool(satrain_gmi_testing_synthetic, tmp_path):
+    """
+    Test that evaluating scenes in a worker pool using a retrieval factory produces
+    the same metrics as a sequential evaluation.
+    """
+    results = []
+    for kwargs in [
+            {"n_processes": 1, "prefetch": 0, "retrieval_fn": ObservationRetrieval()},
+            {
+                "n_processes": 2,
+                "retrieval_factory": make_observation_retrieval,
+                "threads_per_worker": 1,
+                "max_in_flight": 1,
+            },
+    ]:
+        evaluator = Evaluator(
+            "gmi",
+            "gridded",
+            ["gmi", "ancillary"],
+            domain="conus",
+            ipwgml_path=satrain_gmi_testing_synthetic,
+            download=False,
+        )
+        assert len(evaluator) == 3
+        evaluator.evaluate(tile_size=32, overlap=8, batch_size=2, **kwargs)
+        results.append(evaluator.get_results())
+
+    sequential, pooled = results
+    assert set(sequential.variables) == set(pooled.variables)
+    for name in sequential.variables:
+        assert np.allclose(
+            sequential[name].data, pooled[name].data, equal_nan=True
+        ), name
+
+
+def test_evaluate_prefetch(satrain_gmi_testing_synthetic, tmp_path):
+    """
+    Test that loading scenes ahead of the retrieval produces the same metrics and
+    output files as a sequential evaluation.
+    """
+    results = []
+    for prefetch in [0, 2]:
+        evaluator = Evaluator(
+            "gmi",
+            "gridded",
+            ["gmi", "ancillary"],
+            domain="conus",
+            ipwgml_path=satrain_gmi_testing_synthetic,
+            download=False,
+        )
+        evaluator.evaluate(
+            retrieval_fn=ObservationRetrieval(),
+            tile_size=32,
+            overlap=8,
+            batch_size=2,
+            n_processes=1,
+            prefetch=prefetch,
+            output_path=tmp_path / f"prefetch_{prefetch}",
+        )
+        results.append(evaluator.get_results())
+
+    sequential, pipelined = results
+    for name in sequential.variables:
+        assert np.array_equal(
+            sequential[name].data, pipelined[name].data, equal_nan=True
+        ), name
+
+    files_sequential = sorted((tmp_path / "prefetch_0").glob("results_*.nc"))
+    files_pipelined = sorted((tmp_path / "prefetch_2").glob("results_*.nc"))
+    assert len(files_sequential) == 3
+    assert [path.name for path in files_sequential] == [
+        path.name for path in files_pipelined
+    ]
+    for path_sequential, path_pipelined in zip(files_sequential, files_pipelined):
+        xr.testing.assert_identical(
+            xr.load_dataset(path_sequential), xr.load_dataset(path_pipelined)
+        )
+        assert "surface_precip_ref" in xr.load_dataset(path_pipelined)
+
+
+def test_tile_scheduler():
+    """
+    Test that the tile scheduler fills batches with tiles from multiple scenes, pads
+    whole scenes of different sizes, and routes the results back to their scenes.
+    """
+    rng = np.random.default_rng(42)
+    scenes = []
+    for shape in [(50, 60), (50, 60), (40, 70)]:
+        scenes.append(
+            xr.Dataset({
+                "latitude": (("latitude",), np.linspace(30, 35, shape[0])),
+                "longitude": (("longitude",), np.linspace(-100, -95, shape[1])),
+                "obs_gmi": (
+                    ("features_gmi", "latitude", "longitude"),
+                    rng.random((2,) + shape).astype(np.float32)
+                ),
+            })
+        )
+
+    batch_sizes = []
+
+    def retrieval_fn(input_data):
+        batch_sizes.append(input_data.sizes["batch"])
+        obs = input_data.obs_gmi.transpose("batch", "features_gmi", ...).data[:, 0]
+        dims = ("batch", "latitude", "longitude")
+        return xr.Dataset({
+            "surface_precip": (dims, obs),
+            "precip_flag": (dims, obs > 0.5),
+        })
+
+    for tile_size, batch_size in [(32, 4), (None, 2)]:
+        batch_sizes = []
+        scheduler = TileScheduler(
+            retrieval_fn, tile_size=tile_size, overlap=8, batch_size=batch_size
+        )
+        completed = []
+        for ind, scene in enumerate(scenes):
+            completed += scheduler.add_scene(ind, scene)
+        completed += scheduler.finish()
+
+        assert [key for key, _ in completed] == [0, 1, 2]
+        assert all(size == batch_size for size in batch_sizes[:-1])
+        for key, results in completed:
+            obs = scenes[key].obs_gmi.data[0]
+            assert np.allclose(results.surface_precip.data, obs, atol=1e-5)
+            assert np.all(results.precip_flag.data == (obs > 0.5))
+
+
+def test_array_retrieval():
+    """
+    Test that array retrievals receive batched input arrays and produce the same
+    results when called by the tile scheduler and through the xarray interface.
+    """
+    rng = np.random.default_rng(42)
+    input_data = xr.Dataset({
+        "latitude": (("latitude",), np.linspace(30, 35, 70)),
+        "longitude": (("longitude",), np.linspace(-100, -95, 90)),
+        "obs_gmi": (
+            ("features_gmi", "latitude", "longitude"),
+            rng.random((3, 70, 90)).astype(np.float32)
+        ),
+    })
+
+    shapes = []
+
+    def retrieve(inputs):
+        obs = inputs["obs_gmi"]
+        shapes.append(obs.shape)
+        return {
+            "surface_precip": obs[:, 0],
+            "precip_flag": obs[:, 1] > 0.5,
+        }
+
+    with pytest.raises(TypeError):
+        ArrayRetrieval()
+
+    retrieval = ArrayFunctionRetrieval(retrieve)
+    results = process_scene_spatial(
+        input_data, tile_size=32, overlap=8, batch_size=4, retrieval_fn=retrieval
+    )
+    assert all(shape[1:] == (3, 32, 32) for shape in shapes)
+    assert np.allclose(results.surface_precip.data, input_data.obs_gmi.data[0], atol=1e-5)
+    assert np.all(results.precip_flag.data == (input_data.obs_gmi.data[1] > 0.5))
+
+    results_xr = retrieval(input_data)
+    assert results_xr.surface_precip.dims == ("latitude", "longitude")
+    assert np.allclose(results_xr.surface_precip.data, input_data.obs_gmi.data[0])
+
+    results = process_scene_tabular(input_data, batch_size=1000, retrieval_fn=retrieval)
+    assert np.allclose(results.surface_precip.data, input_data.obs_gmi.data[0])
+
+
+def test_skip_invalid_tiles():
+    """
+    Test that tiles without required pixels are not passed to the retrieval and
+    that the corresponding results are set to NAN.
+    """
+    rng = np.random.default_rng(42)
+    input_data = xr.Dataset({
+        "latitude": (("latitude",), np.linspace(30, 35, 64)),
+        "longitude": (("longitude",), np.linspace(-100, -95, 64)),
+        "obs_gmi": (
+            ("features_gmi", "latitude", "longitude"),
+            rng.random((2, 64, 64)).astype(np.float32)
+        ),
+    })
+    required = np.zeros((64, 64), dtype=bool)
+    required[5, 5] = True
+
+    n_tiles = []
+
+    def retrieval_fn(input_data):
+        n_tiles.append(input_data.sizes["batch"])
+        obs = input_data.obs_gmi.transpose("batch", "features_gmi", ...).data[:, 0]
+        dims = ("batch", "latitude", "longitude")
+        return xr.Dataset({"surface_precip": (dims, obs)})
+
+    scheduler = TileScheduler(retrieval_fn, tile_size=32, overlap=0, batch_size=4)
+    completed = scheduler.add_scene(0, input_data, required=required)
+    completed += scheduler.finish()
+
+    assert sum(n_tiles) == 1
+    assert scheduler.skipped_fraction == 0.75
+    _, results = completed[0]
+    obs = input_data.obs_gmi.data[0]
+    assert np.allclose(results.surface_precip.data[:32, :32], obs[:32, :32])
+    assert np.all(np.isnan(results.surface_precip.data[32:]))
+    assert np.all(np.isnan(results.surface_precip.data[:, 32:]))
+
+    results = process_scene_spatial(
+        input_data,
+        tile_size=32,
+        overlap=0,
+        batch_size=4,
+        retrieval_fn=retrieval_fn,
+        required=required,
+    )
+    assert results.attrs["n_tiles"] == 4
+    assert results.attrs["n_tiles_skipped"] == 3
+
+
+def test_tabular_skip_invalid():
+    """
+    Test that only required pixels are passed to tabular retrievals and that the
+    results are scattered back to their original locations.
+    """
+    rng = np.random.default_rng(42)
+    input_data = xr.Dataset({
+        "latitude": (("latitude",), np.linspace(30, 35, 40)),
+        "longitude": (("longitude",), np.linspace(-100, -95, 50)),
+        "obs_gmi": (
+            ("features_gmi", "latitude", "longitude"),
+            rng.random((3, 40, 50)).astype(np.float32)
+        ),
+    })
+    required = rng.random((40, 50)) > 0.7
+    obs = input_data.obs_gmi.data
+
+    n_samples = []
+
+    def retrieval_fn(input_data):
+        n_samples.append(input_data.sizes["batch"])
+        obs = input_data.obs_gmi.transpose("batch", "features_gmi").data
+        return xr.Dataset({
+            "surface_precip": (("batch",), obs[:, 0]),
+            "precip_flag": (("batch",), obs[:, 1] > 0.5),
+        })
+
+    def retrieve(inputs):
+        n_samples.append(inputs["obs_gmi"].shape[0])
+        obs = inputs["obs_gmi"]
+        return {"surface_precip": obs[:, 0], "precip_flag": obs[:, 1] > 0.5}
+
+    for retrieval in [retrieval_fn, ArrayFunctionRetrieval(retrieve)]:
+        n_samples = []
+        results = process_scene_tabular(
+            input_data, batch_size=128, retrieval_fn=retrieval, required=required
+        )
+        assert sum(n_samples) == required.sum()
+        assert results.surface_precip.dims == ("latitude", "longitude")
+        assert np.allclose(results.surface_precip.data[required], obs[0][required])
+        assert np.all(np.isnan(results.surface_precip.data[~required]))
+        assert np.all(results.precip_flag.data[required] == (obs[1][required] > 0.5))
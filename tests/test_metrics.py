@@ -20,10 +20,16 @@ from ipwgml.metrics import (
     SMAPE,
     CorrelationCoef,
     SpectralCoherence,
+    get_windows,
     FAR,
     POD,
     HSS,
+    ETS,
+    CSI,
+    FrequencyBias,
+    Accuracy,
     PRCurve,
+    MetricSuite,
 )
 
 
@@ -56,6 +62,40 @@ def test_shared_memory():
     assert np.all(np.isclose(metric.buffer, n_jobs))
 
 
+def evaluate_local(metric: Metric, n_scenes: int = 16) -> dict:
+    """
+    Evaluates a process-local copy of the given metric on random predictions and
+    returns its state.
+    """
+    metric = metric.from_state()
+    for _ in range(n_scenes):
+        evaluate_normal_preds(metric)
+    return metric.state()
+
+
+def test_merge_states():
+    """
+    Ensure that states accumulated in process-local copies of a metric can be merged
+    into the original metric.
+    """
+    pool = ProcessPoolExecutor(max_workers=8)
+
+    metric = MSE()
+    tasks = [pool.submit(evaluate_local, metric) for _ in range(64)]
+    for task in tasks:
+        metric.merge(task.result())
+
+    assert metric.counts[0] == 64 * 16 * 100 * 100
+    result = metric.compute()
+    assert np.isclose(result.mse.data, 102, atol=1e-1)
+
+    local = metric.from_state(metric.state())
+    assert not local.shared
+    assert local.counts[0] == metric.counts[0]
+    local.merge(metric)
+    assert local.counts[0] == 2 * metric.counts[0]
+
+
 def evaluate_normal_preds(metric: Metric) -> None:
     """
     Helper function that  evaluates the given metric with
@@ -157,6 +197,34 @@ def test_mae():
     assert np.isclose(result.mae.data, 10.0, atol=1e-2)
 
 
+def test_metric_suite():
+    """
+    Ensure that metrics updated through a MetricSuite yield the same results as
+    metrics updated individually.
+    """
+    x = np.random.normal(size=(100, 100))
+    y = np.random.normal(size=(100, 100)) + 10
+    y[y < 9.5] = np.nan
+    x[np.random.rand(*x.shape) > 0.9] = np.nan
+
+    metrics = [ValidFraction(), Bias(), MAE(), MSE(), SMAPE(), CorrelationCoef()]
+    suite_metrics = [metric.from_state() for metric in metrics]
+    for metric in metrics:
+        metric.update(x, y)
+    MetricSuite(suite_metrics).update(x, y)
+
+    for metric, suite_metric in zip(metrics, suite_metrics):
+        ref = metric.compute()
+        res = suite_metric.compute()
+        for var in ref.variables:
+            assert np.allclose(ref[var].data, res[var].data, equal_nan=True)
+
+    metrics = [Bias(), MSE()]
+    MetricSuite(metrics).update(np.zeros((10, 10)), np.ones((10, 10)))
+    assert np.isclose(metrics[0].compute().bias.data, -100.0)
+    assert np.isclose(metrics[1].compute().mse.data, 1.0)
+
+
 def evaluate_fixed(metric: Metric) -> None:
     """
     Helper function the evaluated the given metric with fixed predictions
@@ -330,6 +398,57 @@ def test_spectral_coherence():
     assert result.effective_resolution.data < closest_scale
 
 
+def test_get_windows():
+    """
+    Test that windows are fully valid, don't overlap, and that their placement
+    is reproducible for a given random generator seed.
+    """
+    valid = np.ones((200, 300), dtype=bool)
+    valid[:17] = False
+    valid[120:, 250:] = False
+    window_size = 32
+
+    rows, cols = get_windows(valid, window_size, rng=np.random.default_rng(42))
+    assert len(rows) > 0
+
+    coverage = np.zeros(valid.shape, dtype=np.int64)
+    for row, col in zip(rows, cols):
+        assert valid[row : row + window_size, col : col + window_size].all()
+        coverage[row : row + window_size, col : col + window_size] += 1
+    assert coverage.max() == 1
+
+    rows_2, cols_2 = get_windows(valid, window_size, rng=np.random.default_rng(42))
+    assert np.all(rows == rows_2)
+    assert np.all(cols == cols_2)
+
+    rows, cols = get_windows(valid[:20], window_size)
+    assert len(rows) == 0
+
+
+def test_spectral_coherence_reproducible():
+    """
+    Test that the spectral coherence is independent of the order in which scenes
+    are processed.
+    """
+    rng = np.random.default_rng(42)
+    scenes = []
+    for _ in range(4):
+        target = rng.random((128, 160))
+        pred = target + 0.5 * rng.random((128, 160))
+        target[: rng.integers(1, 40)] = np.nan
+        scenes.append((pred, target))
+
+    metric_1 = SpectralCoherence(window_size=32, scale=1).from_state()
+    for pred, target in scenes:
+        metric_1.update(pred, target)
+    metric_2 = SpectralCoherence(window_size=32, scale=1).from_state()
+    for pred, target in scenes[::-1]:
+        metric_2.update(pred, target)
+
+    assert np.allclose(metric_1.coeffs_targetpred_sum, metric_2.coeffs_targetpred_sum)
+    assert np.all(metric_1.counts == metric_2.counts)
+
+
 def evaluate_always(metric):
     """
     Evaluates the given metric with detection prediction that are always true
@@ -451,6 +570,41 @@ def test_hss():
     assert np.isclose(hss.hss.data, 0.0, atol=1e-2)
 
 
+def test_detection_scores():
+    """
+    Test that the detection scores derived from the shared confusion matrix match
+    their definitions in terms of the true/false positive and negative counts.
+    """
+    rng = np.random.default_rng(42)
+    target = rng.random((100, 100)) > 0.6
+    pred = rng.random((100, 100)) > 0.5
+
+    n_tp = (pred * target).sum()
+    n_fp = (pred * ~target).sum()
+    n_tn = (~pred * ~target).sum()
+    n_fn = (~pred * target).sum()
+    n_tot = target.size
+
+    metrics = [POD(), FAR(), HSS(), ETS(), CSI(), FrequencyBias(), Accuracy()]
+    metrics = [metric.from_state() for metric in metrics]
+    MetricSuite(metrics).update(pred, target)
+    results = xr.merge([metric.compute() for metric in metrics])
+
+    assert np.isclose(results.pod.data, n_tp / (n_tp + n_fn))
+    assert np.isclose(results.far.data, n_fp / (n_tp + n_fp))
+    assert np.isclose(results.csi.data, n_tp / (n_tp + n_fn + n_fp))
+    assert np.isclose(results.frequency_bias.data, (n_tp + n_fp) / (n_tp + n_fn))
+    assert np.isclose(results.accuracy.data, (n_tp + n_tn) / n_tot)
+    hits_random = (n_tp + n_fn) * (n_tp + n_fp) / n_tot
+    ets = (n_tp - hits_random) / (n_tp + n_fn + n_fp - hits_random)
+    assert np.isclose(results.ets.data, ets)
+    expected = (
+        (n_tp + n_fp) * (n_tp + n_fn) + (n_tn + n_fn) * (n_fp + n_tn)
+    ) / n_tot ** 2
+    hss = ((n_tp + n_tn) / n_tot - expected) / (1.0 - expected)
+    assert np.isclose(results.hss.data, hss)
+
+
 def evaluate_random_probability(metric):
     """
     Evaluates the give metrics using a random probability.
@@ -480,6 +634,31 @@ def test_prcurve():
     assert np.isclose(pr_curve.area_under_curve.data, 0.5, rtol=5e-2)
 
 
+def test_prcurve_fine_thresholds():
+    """
+    Test that the histogram-based PR curve matches the true and false positives
+    obtained by explicitly thresholding the predictions on a fine threshold grid.
+    """
+    rng = np.random.default_rng(42)
+    target = rng.random(10_000) > 0.7
+    pred = np.clip(target * 0.3 + rng.random(10_000) * 0.7, 0.0, 1.0)
+    pred[:10] = np.nan
+
+    metric = PRCurve(n_bins=20_000).from_state()
+    metric.update(pred[:5_000], target[:5_000])
+    metric.update(pred[5_000:], target[5_000:])
+
+    inds = rng.choice(metric.thresholds.size, 100)
+    detected = pred[:, None] >= metric.thresholds[None, inds]
+    assert np.all(metric.n_tp[inds] == (detected * target[:, None]).sum(0))
+    assert np.all(metric.n_fp[inds] == (detected * ~target[:, None]).sum(0))
+    assert metric.n_t[0] == target.sum()
+
+    pr_curve = metric.compute()
+    assert pr_curve.precision.size == 20_000
+    assert 0.5 < pr_curve.area_under_curve.data <= 1.0
+
+
 
 def crps_normal(mu: float, sigma: float, x: np.ndarray) -> np.ndarray:
     """
@@ -0,0 +1,71 @@
+"""
+Tests for the ipwgml.sampling module.
+"""
+
+import numpy as np
+import xarray as xr
+
+from ipwgml.sampling import CropIndex, get_summed_area_table
+from ipwgml.target import TargetConfig
+
+
+def make_target_data(n_rows: int, n_cols: int) -> xr.Dataset:
+    """
+    Create target data with invalid pixels in the left half of the scene and
+    precipitation in the bottom right quarter.
+    """
+    surface_precip = np.zeros((n_rows, n_cols), dtype=np.float32)
+    surface_precip[n_rows // 2:, n_cols // 2:] = 1.0
+    rqi = np.ones((n_rows, n_cols), dtype=np.float32)
+    rqi[:, :n_cols // 2] = 0.0
+    return xr.Dataset({
+        "surface_precip": (("y", "x"), surface_precip),
+        "radar_quality_index": (("y", "x"), rqi),
+        "valid_fraction": (("y", "x"), np.ones_like(rqi)),
+    })
+
+
+def test_summed_area_table():
+    """
+    Test that the summed-area table yields the sum over arbitrary windows of a mask.
+    """
+    mask = np.random.rand(17, 23) > 0.5
+    table = get_summed_area_table(mask)
+    assert table.shape == (18, 24)
+    assert table[-1, -1] == mask.sum()
+    assert table[12, 20] - table[3, 20] - table[12, 5] + table[3, 5] == mask[3:12, 5:20].sum()
+
+
+def test_crop_index(tmp_path):
+    """
+    Test that the crop index counts valid and precipitating pixels correctly and that
+    drawn crops satisfy the minimum valid fraction and are biased towards precipitation.
+    """
+    target_data = [make_target_data(64, 64), make_target_data(32, 48)]
+    CropIndex.build(target_data, TargetConfig(), tmp_path / "index")
+    index = CropIndex(tmp_path / "index")
+
+    assert index.get_scene_shape(1) == (32, 48)
+    assert index.get_counts(0, 0, 0, (64, 64)) == (64 * 32, 32 * 32)
+    assert index.get_counts(1, 8, 20, (16, 16)) == (12 * 16, 8 * 12)
+    assert index.get_max_precip_fraction(0, (16, 16)) == 1.0
+
+    rng = np.random.default_rng(42)
+    for scene in range(2):
+        for _ in range(100):
+            rows, cols = index.draw(scene, (16, 16), rng, min_valid_fraction=0.5)
+            n_valid, _ = index.get_counts(scene, rows.start, cols.start, (16, 16))
+            assert n_valid >= 0.5 * 16 * 16
+
+    n_precip = [
+        index.get_counts(0, rows.start, cols.start, (16, 16))[1]
+        for rows, cols in [index.draw(0, (16, 16), rng) for _ in range(200)]
+    ]
+    n_precip_weighted = [
+        index.get_counts(0, rows.start, cols.start, (16, 16))[1]
+        for rows, cols in [index.draw(0, (16, 16), rng, precip_weight=1.0) for _ in range(200)]
+    ]
+    assert np.mean(n_precip) < np.mean(n_precip_weighted)
+
+    rows, cols = index.draw(1, (64, 64), rng, min_valid_fraction=0.5)
+    assert (rows, cols) == (slice(0, 64), slice(0, 64))
@@ -230,3 +230,40 @@ def test_load_load_heavy_precip_mask_tabular(satrain_gmi_gridded_train):
     precip_mask = 0 < target_config.load_heavy_precip_mask(target_data)
     mask = target_config.get_mask(target_data)
     assert (precip_data[~mask][precip_mask[~mask]] >= thresh).all()
+
+
+def test_load_bundle(satrain_gmi_gridded_train):
+    """
+    Test that loading the target bundle yields the same reference data as loading
+    reference precipitation and precipitation masks separately.
+    """
+    files = get_local_files(
+        dataset_name="satrain",
+        base_sensor="gmi",
+        split="training",
+        subset="xl",
+        geometry="gridded",
+        data_path=satrain_gmi_gridded_train
+    )
+    target_files = files["target"]
+    target_data = xr.load_dataset(target_files[0])
+
+    target_config = TargetConfig(min_rqi=0.8, no_snow=True, min_gcf=0.5)
+    for source in [target_files[0], target_data]:
+        bundle = target_config.load_bundle(source)
+        assert np.allclose(
+            bundle.surface_precip,
+            target_config.load_reference_precip(target_data),
+            equal_nan=True
+        )
+        assert (bundle.invalid == target_config.get_mask(target_data)).all()
+        assert np.allclose(
+            bundle.precip_mask,
+            target_config.load_precip_mask(target_data),
+            equal_nan=True
+        )
+        assert np.allclose(
+            bundle.heavy_precip_mask,
+            target_config.load_heavy_precip_mask(target_data),
+            equal_nan=True
+        )
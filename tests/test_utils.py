@@ -2,11 +2,28 @@
 Tests for the ipwgml.utils module.
 """
 
+from datetime import datetime
+import gc
+import os
+from pathlib import Path
+import pickle
+
 import numpy as np
+import pytest
 import xarray as xr
 
 
-from ipwgml.utils import open_if_required
+from ipwgml.utils import (
+    FileHandleCache,
+    SceneCache,
+    get_median_time,
+    get_zarr_group,
+    _open_zarr_store,
+    load_dataset,
+    load_subset,
+    open_if_required,
+    write_atomically,
+)
 
 
 def test_open_if_required(tmp_path):
@@ -27,3 +44,163 @@ def test_open_if_required(tmp_path):
         data_not_loaded = data.surface_precip
 
     assert np.all(data_not_loaded.data == test_data.surface_precip.data)
+
+
+def test_load_subset(tmp_path):
+    """
+    Test that 'load_subset' loads only the requested variables and elements from NetCDF
+    files and already-loaded datasets.
+    """
+    test_data = xr.Dataset({
+        "observations": (("time", "channel", "y", "x"), np.random.rand(4, 5, 32, 48)),
+        "surface_precip": (("y", "x"), np.random.rand(32, 48)),
+    })
+    test_data.to_netcdf(tmp_path / "test.nc", engine="h5netcdf")
+
+    indexers = {
+        "time": [3, 1],
+        "channel": [4, 0, 2],
+        "y": slice(8, 24),
+        "scan": slice(0, 4),
+    }
+    for source in [tmp_path / "test.nc", test_data]:
+        data = load_subset(source, ["observations", "eia"], indexers)
+        assert list(data.data_vars) == ["observations"]
+        assert data.observations.shape == (2, 3, 16, 48)
+        assert np.all(
+            data.observations.data
+            == test_data.observations.data[[3, 1]][:, [4, 0, 2], 8:24]
+        )
+
+
+def test_file_handle_cache(tmp_path):
+    """
+    Test that the 'FileHandleCache' reuses open files, closes the least recently used
+    files, and doesn't pickle open handles.
+    """
+    paths = []
+    for ind in range(3):
+        test_data = xr.Dataset({"surface_precip": (("y", "x"), np.random.rand(16, 16))})
+        test_data.to_netcdf(tmp_path / f"test_{ind}.nc", engine="h5netcdf")
+        paths.append(tmp_path / f"test_{ind}.nc")
+
+    cache = FileHandleCache(max_handles=2)
+    handle_0 = cache.get(paths[0])
+    assert cache.get(paths[0]) is handle_0
+    handle_1 = cache.get(paths[1])
+    cache.get(paths[0])
+    cache.get(paths[2])
+    assert len(cache) == 2
+    assert cache.get(paths[0]) is handle_0
+    assert cache.get(paths[1]) is not handle_1
+
+    data = load_subset(handle_0, ["surface_precip"], {"y": slice(0, 4)})
+    assert data.surface_precip.shape == (4, 16)
+
+    cache_pickled = pickle.loads(pickle.dumps(cache))
+    assert len(cache_pickled) == 0
+    cache.close()
+    assert len(cache) == 0
+
+
+def test_scene_cache(tmp_path):
+    """
+    Test that the 'SceneCache' returns cached arrays, respects its size limit by evicting
+    the least recently used entries, and can be shared through pickling.
+    """
+    arrays = {
+        "input/obs": np.random.rand(4, 16, 16).astype(np.float32),
+        "target/surface_precip": np.random.rand(16, 16).astype(np.float32),
+    }
+    n_bytes = sum([arr.nbytes for arr in arrays.values()])
+
+    cache = SceneCache(3.5 * n_bytes, path=tmp_path)
+    assert cache.get(0) is None
+    cache.put(0, arrays)
+    cached = cache.get(0)
+    assert list(cached) == list(arrays)
+    for name in arrays:
+        assert np.all(cached[name] == arrays[name])
+
+    cache_pickled = pickle.loads(pickle.dumps(cache))
+    assert cache_pickled.get(0) is not None
+
+    cache.put(1, arrays)
+    cache.put(2, arrays)
+    os.utime(cache.path / "0", (0, 0))
+    cache.put(3, arrays)
+    assert cache.get(0) is None
+    assert cache.get(3) is not None
+
+    path = cache.path
+    del cache_pickled
+    gc.collect()
+    assert path.exists()
+    del cache
+    gc.collect()
+    assert not path.exists()
+
+
+def test_get_zarr_group():
+    """
+    Test that paths pointing into Zarr stores are split into store and group and that
+    the median time is extracted from NetCDF files and Zarr scene groups.
+    """
+    assert get_zarr_group("/data/gridded/2022/01/gmi_20220101020000.nc") is None
+    store, group = get_zarr_group("/data/gridded.zarr/gmi/gmi_20220101020000")
+    assert store == Path("/data/gridded.zarr")
+    assert group == "gmi/gmi_20220101020000"
+
+    time = datetime(2022, 1, 1, 2)
+    assert get_median_time(Path("/data/gridded/gmi_20220101020000.nc")) == time
+    assert get_median_time("/data/gridded.zarr/gmi/gmi_20220101020000") == time
+
+
+def test_open_dataset_zarr(tmp_path):
+    """
+    Test that scenes are loaded from groups of a consolidated Zarr store and that the
+    store's consolidated metadata is read only once.
+    """
+    zarr = pytest.importorskip("zarr")
+    store = tmp_path / "gridded.zarr"
+    scenes = {}
+    for ind in range(3):
+        name = f"target_2022010{ind + 1}020000"
+        scenes[name] = xr.Dataset({
+            "surface_precip": (("latitude", "longitude"), np.random.rand(8, 16)),
+        })
+        scenes[name].to_zarr(store, group=f"target/{name}", mode="a", consolidated=False)
+    zarr.consolidate_metadata(str(store))
+
+    misses = _open_zarr_store.cache_info().misses
+    for name, scene in scenes.items():
+        data = load_dataset(store / "target" / name)
+        assert np.all(data.surface_precip.data == scene.surface_precip.data)
+    assert _open_zarr_store.cache_info().misses == misses + 1
+
+
+def test_write_atomically(tmp_path):
+    """
+    Test that files and directories are only created when writing succeeds, that
+    concurrently created directories are kept, and that no temporary files remain.
+    """
+    path = tmp_path / "output" / "array.npy"
+    with write_atomically(path) as tmp:
+        assert not path.exists()
+        np.save(tmp, np.arange(4))
+    assert np.all(np.load(path) == np.arange(4))
+
+    with pytest.raises(ValueError):
+        with write_atomically(path) as tmp:
+            np.save(tmp, np.arange(8))
+            raise ValueError()
+    assert np.all(np.load(path) == np.arange(4))
+
+    path = tmp_path / "output" / "index"
+    with write_atomically(path, directory=True) as tmp:
+        (tmp / "a.txt").write_text("a")
+    with write_atomically(path, directory=True) as tmp:
+        (tmp / "b.txt").write_text("b")
+    assert sorted(child.name for child in path.iterdir()) == ["a.txt"]
+
+    assert sorted(child.name for child in path.parent.iterdir()) == ["array.npy", "index"]